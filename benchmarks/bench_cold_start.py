@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+#-*- coding: utf-8 -*-
+
+"""Measures the cold start of a script using one relation, with and without the lazy mode.
+
+Usage:
+    HALFORM_CONF_DIR=$PWD/.config python benchmarks/bench_cold_start.py [--config halftest] [-n 3000]
+
+The schema bench_cold is filled with n tables, each one with a foreign key to the
+previous one. For each mode, a new process creates the Model, gets the class of
+one table and counts its rows. The time of each step is reported. The schema is
+dropped at the end.
+
+The modes are:
+
+* eager: the default;
+* lazy: Model(..., lazy=True);
+* cached: the metadata_cache entry is added to a copy of the config file (the cache
+  file is built by a first run);
+* compiled: the compiled_metadata entry is added to a copy of the config file, the
+  module is compiled with all the relations (half_orm metadata compile);
+* lazy-comp: lazy mode with a module compiled for bench_cold.table_1 only.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+MODES = ['eager', 'lazy', 'cached', 'compiled', 'lazy-comp']
+
+def run(config, mode):
+    "Returns the time spent in each step of the cold start."
+    start = time.perf_counter()
+    from half_orm.model import Model
+    imported = time.perf_counter()
+    model = Model(config, lazy=mode in ('lazy', 'lazy-comp'))
+    connected = time.perf_counter()
+    Table = model.get_relation_class('bench_cold.table_1')
+    loaded = time.perf_counter()
+    Table().ho_count()
+    done = time.perf_counter()
+    model.disconnect()
+    return {
+        'import': imported - start,
+        'model': connected - imported,
+        'class': loaded - connected,
+        'query': done - loaded,
+        'total': done - start}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', 1)[0])
+    parser.add_argument('--config', default='halftest')
+    parser.add_argument('--run', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('-n', type=int, default=3000)
+    args = parser.parse_args()
+    if args.run:
+        print(json.dumps(run(args.config, args.run)))
+        return
+
+    from half_orm.model import CONF_DIR, Model
+
+    model = Model(args.config, lazy=True)
+    conf_dir = tempfile.mkdtemp()
+    entries = {
+        'cached': f'metadata_cache = {conf_dir}/cache',
+        'compiled': 'compiled_metadata = bench_cold_all',
+        'lazy-comp': 'compiled_metadata = bench_cold_table_1'}
+    with open(os.path.join(CONF_DIR, args.config)) as config:
+        content = config.read()
+    for mode, entry in entries.items():
+        os.mkdir(os.path.join(conf_dir, mode))
+        with open(os.path.join(conf_dir, mode, args.config), 'w') as mode_config:
+            mode_config.write(content.replace('[database]', f'[database]\n{entry}', 1))
+    model.execute_query('create schema bench_cold')
+    try:
+        model.execute_query(
+            'create table bench_cold.table_0 (id serial primary key, label text)')
+        for num in range(1, args.n):
+            model.execute_query(
+                f'create table bench_cold.table_{num} (id serial primary key, label text, '
+                f'prev int references bench_cold.table_{num - 1}(id))')
+        for module, relations in (('bench_cold_all', []), ('bench_cold_table_1', ['bench_cold.table_1'])):
+            subprocess.run(
+                [sys.executable, '-m', 'half_orm.cli', 'metadata', 'compile', args.config,
+                 '-o', os.path.join(conf_dir, f'{module}.py'), *relations],
+                check=True, capture_output=True)
+        print(f"{args.n} relations")
+        print(f"{'mode':>9}" + ''.join(
+            f'{step + " (s)":>12}' for step in ('import', 'model', 'class', 'query', 'total')))
+        for mode in MODES:
+            env = dict(os.environ, PYTHONPATH=conf_dir)
+            env.pop('PYTHONDONTWRITEBYTECODE', None)
+            if mode in entries:
+                env['HALFORM_CONF_DIR'] = os.path.join(conf_dir, mode)
+            command = [sys.executable, __file__, '--config', args.config, '--run', mode]
+            if mode in entries:
+                # builds the cache file or the bytecode of the compiled module.
+                subprocess.run(command, check=True, capture_output=True, env=env)
+            out = subprocess.run(
+                command, check=True, capture_output=True, text=True, env=env).stdout
+            result = json.loads(out)
+            print(f'{mode:>9}' + ''.join(f'{value:>12.3f}' for value in result.values()))
+    finally:
+        # one table at a time: a single drop cascade exceeds max_locks_per_transaction.
+        for num in reversed(range(args.n)):
+            model.execute_query(f'drop table if exists bench_cold.table_{num}')
+        model.execute_query('drop schema bench_cold')
+        model.disconnect()
+        shutil.rmtree(conf_dir)
+
+if __name__ == '__main__':
+    main()
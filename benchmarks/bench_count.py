@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+#-*- coding: utf-8 -*-
+
+"""Measures ho_count: exact, bounded (max) and estimated counts.
+
+Usage:
+    HALFORM_CONF_DIR=$PWD/.config python benchmarks/bench_count.py [--config halftest] [-r 1000000] [-n 5]
+
+The table bench_count.item is filled with r rows. The time of the following counts
+is reported, for the whole table and for the items with a price lower than r / 2:
+
+* wrapped: count(*) over the select in a subquery (the previous implementation);
+* ho_count(): the exact count;
+* max=10000: the count of at most 10000 rows;
+* estimate: the estimate of the planner (pg_class.reltuples for the whole table).
+
+The schema is dropped at the end.
+"""
+
+import argparse
+import time
+
+from half_orm.model import Model
+
+def measure(fct, number):
+    "Returns the time of a call to fct in ms (best of 5)."
+    best = None
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(number):
+            fct()
+        elapsed = (time.perf_counter() - start) / number * 1e3
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def wrapped(relation):
+    "The previous implementation of ho_count."
+    query, values = relation._ho_prep_select()
+    return relation._ho_model.execute_query(
+        f'select count(*) from ({query}) as ho_count', values).fetchone()['count']
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', 1)[0])
+    parser.add_argument('--config', default='halftest')
+    parser.add_argument('-r', type=int, default=1000000)
+    parser.add_argument('-n', type=int, default=5)
+    args = parser.parse_args()
+
+    model = Model(args.config)
+    model.execute_query('create schema bench_count')
+    try:
+        model.execute_query('create table bench_count.item (id serial primary key, label text, price int)')
+        model.execute_query(
+            "insert into bench_count.item (label, price) "
+            "select 'item ' || num, num from generate_series(1, %s) as num", (args.r,))
+        model.execute_query('analyze bench_count.item')
+        model._reload()
+        Item = model.get_relation_class('bench_count.item')
+        print(f"{args.r} rows")
+        for label, item in (('all', Item), ('price < r/2', lambda: Item(price=('<', args.r // 2)))):
+            print(f'{label}:')
+            for count_label, fct in (
+                    ('wrapped', lambda: wrapped(item())),
+                    ('ho_count()', lambda: item().ho_count()),
+                    ('max=10000', lambda: item().ho_count(max=10000)),
+                    ('estimate', lambda: item().ho_count(estimate=True))):
+                print(f'{count_label:>12}: {measure(fct, args.n):8.2f} ms ({fct()})')
+    finally:
+        model.execute_query('drop schema bench_count cascade')
+        model.disconnect()
+
+if __name__ == '__main__':
+    main()
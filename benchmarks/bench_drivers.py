@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+#-*- coding: utf-8 -*-
+
+"""Compares the psycopg2 and psycopg3 drivers on the halftest database.
+
+Usage:
+    HALFORM_CONF_DIR=$PWD/.config python benchmarks/bench_drivers.py [-n 1000] [config ...]
+
+Each config file (``halftest`` and ``halftest_psycopg3`` by default) is benchmarked
+in its own process, the relation classes being bound to the first model loaded.
+The rows inserted are named ``bench...`` and removed at the end of each run.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+WORKLOADS = ['select', 'get', 'count', 'insert', 'insert (pipeline)']
+
+def timeit(func, number):
+    "Returns the number of calls per second."
+    start = time.perf_counter()
+    for idx in range(number):
+        func(idx)
+    return number / (time.perf_counter() - start)
+
+def run(config, number):
+    "Runs the workloads with the Model(config) and returns the results."
+    from half_orm.model import Model
+    from half_orm.transaction import Transaction
+
+    model = Model(config)
+    Person = model.get_relation_class('actor.person')
+    insert = "insert into actor.person (last_name, first_name, birth_date) values (%s, %s, now())"
+    Person(last_name=('like', 'bench%')).ho_delete()
+
+    def select(_):
+        list(Person(last_name=('like', 'a%')).ho_select())
+
+    def get(_):
+        Person(last_name='aa').ho_get()
+
+    def count(_):
+        Person(first_name=['aa', 'ba']).ho_count()
+
+    def insert_rel(idx):
+        Person(last_name=f'bench{idx}', first_name='bench', birth_date='1970-01-01').ho_insert()
+
+    def insert_pipeline(idx):
+        model.execute_query(insert, (f'bench_pl{idx}', 'bench'))
+
+    results = {}
+    results['select'] = timeit(select, number)
+    results['get'] = timeit(get, number)
+    results['count'] = timeit(count, number)
+    with Transaction(model):
+        results['insert'] = timeit(insert_rel, number)
+    with model.pipeline():
+        results['insert (pipeline)'] = timeit(insert_pipeline, number)
+    Person(last_name=('like', 'bench%')).ho_delete()
+    model.disconnect()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', 1)[0])
+    parser.add_argument('-n', '--number', type=int, default=1000, help='iterations per workload')
+    parser.add_argument('--run', help=argparse.SUPPRESS)
+    parser.add_argument('configs', nargs='*', default=['halftest', 'halftest_psycopg3'])
+    args = parser.parse_args()
+    if args.run:
+        print(json.dumps(run(args.run, args.number)))
+        return
+    results = {}
+    for config in args.configs:
+        out = subprocess.run(
+            [sys.executable, __file__, '-n', str(args.number), '--run', config],
+            check=True, capture_output=True, text=True).stdout
+        results[config] = json.loads(out)
+    print(f"{'calls/s':<20}" + ''.join(f'{config:>20}' for config in args.configs))
+    for workload in WORKLOADS:
+        print(f'{workload:<20}' + ''.join(
+            f'{results[config][workload]:>20.0f}' for config in args.configs))
+
+if __name__ == '__main__':
+    main()
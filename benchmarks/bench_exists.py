@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+#-*- coding: utf-8 -*-
+
+"""Measures ho_is_empty, the containment (in) and the equality (==) of relations.
+
+Usage:
+    HALFORM_CONF_DIR=$PWD/.config python benchmarks/bench_exists.py [--config halftest] [-r 1000000] [-n 20]
+
+The table bench_exists.item is filled with r rows. The time of the following
+checks is reported for the count based implementation (the previous one) and for
+the current one (NOT EXISTS):
+
+* is_empty: the whole table;
+* in: the items with an even id in the whole table;
+* ==: the whole table compared to itself (another relation object).
+
+The schema is dropped at the end.
+"""
+
+import argparse
+import time
+
+from half_orm.model import Model
+
+def measure(fct, number):
+    "Returns the time of a call to fct in ms (best of 5)."
+    best = None
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(number):
+            fct()
+        elapsed = (time.perf_counter() - start) / number * 1e3
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', 1)[0])
+    parser.add_argument('--config', default='halftest')
+    parser.add_argument('-r', type=int, default=1000000)
+    parser.add_argument('-n', type=int, default=20)
+    args = parser.parse_args()
+
+    model = Model(args.config)
+    model.execute_query('create schema bench_exists')
+    try:
+        model.execute_query('create table bench_exists.item (id serial primary key, label text)')
+        model.execute_query(
+            "insert into bench_exists.item (label) "
+            "select 'item ' || num from generate_series(1, %s) as num", (args.r,))
+        model.execute_query('analyze bench_exists.item')
+        model._reload()
+        Item = model.get_relation_class('bench_exists.item')
+        even = Item(id=('in', list(range(2, 1000, 2))))
+        results = [
+            ('is_empty', lambda: Item().ho_count() == 0, lambda: Item().ho_is_empty()),
+            ('in', lambda: (even - Item()).ho_count() == 0, lambda: even in Item()),
+            ('==',
+             lambda: (Item() - Item()).ho_count() == 0 and (Item() - Item()).ho_count() == 0,
+             lambda: Item() == Item())]
+        print(f"{args.r} rows")
+        print(f"{'':>10}  {'count':>10}  {'exists':>10}")
+        for label, count, exists in results:
+            print(f'{label:>10}: {measure(count, args.n):7.2f} ms  {measure(exists, args.n):7.2f} ms')
+    finally:
+        model.execute_query('drop schema bench_exists cascade')
+        model.disconnect()
+
+if __name__ == '__main__':
+    main()
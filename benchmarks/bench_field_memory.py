@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+#-*- coding: utf-8 -*-
+
+"""Measures the memory used by the fields and the foreign keys of the relation objects.
+
+Usage:
+    HALFORM_CONF_DIR=$PWD/.config python benchmarks/bench_field_memory.py [--config halftest] [--relation blog.post] [-n 100000]
+
+n Field objects and n FKey objects of the relation are created and their size is
+measured with tracemalloc. Then n / 10 relation objects are created with all their
+fields and foreign keys accessed (the reverse foreign keys included).
+"""
+
+import argparse
+import gc
+import tracemalloc
+
+from half_orm.field import Field
+from half_orm.fkey import FKey
+from half_orm.model import Model
+
+def measure(build, number):
+    "Returns the memory allocated by **number** calls to build in bytes per call."
+    gc.collect()
+    tracemalloc.start()
+    objs = [build() for _ in range(number)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objs
+    return size / number
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', 1)[0])
+    parser.add_argument('--config', default='halftest')
+    parser.add_argument('--relation', default='blog.post')
+    parser.add_argument('-n', type=int, default=100000)
+    args = parser.parse_args()
+
+    model = Model(args.config)
+    relation_class = model.get_relation_class(args.relation)
+    relation = relation_class()
+    name, metadata = next(iter(model._fields_metadata(relation._t_fqrn).items()))
+    fk_name, fk_metadata = next(iter(model._fkeys_metadata(relation._t_fqrn).items()))
+
+    def full_relation():
+        rel = relation_class()
+        for key in rel._ho_fields:
+            rel._ho_fields[key]
+        for key in rel._ho_fkeys:
+            rel._ho_fkeys[key]
+        return rel
+
+    print(f"{args.relation}: {len(relation._ho_fields)} fields, {len(relation._ho_fkeys)} foreign keys")
+    print(f"{'Field':>10}: {measure(lambda: Field(name, relation, metadata), args.n):8.0f} bytes")
+    print(f"{'FKey':>10}: {measure(lambda: FKey(fk_name, relation, *fk_metadata), args.n):8.0f} bytes")
+    print(f"{'relation':>10}: {measure(full_relation, args.n // 10):8.0f} bytes")
+    model.disconnect()
+
+if __name__ == '__main__':
+    main()
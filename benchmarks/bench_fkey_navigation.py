@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+#-*- coding: utf-8 -*-
+
+"""Measures the navigation through the foreign keys (no query is run).
+
+Usage:
+    HALFORM_CONF_DIR=$PWD/.config python benchmarks/bench_fkey_navigation.py [--config halftest] [--scope SCOPE] [-n 20000]
+
+The time of the following navigations of the halftest database is reported:
+
+* comment -> post: a foreign key;
+* post -> comments: a reverse foreign key;
+* comment -> post -> author: a chain of foreign keys;
+* ho_cast: a post cast to an event.
+
+Without --scope, the relations have no module: the classes are generated.
+"""
+
+import argparse
+import time
+
+from half_orm.model import Model
+
+def measure(fct, number):
+    "Returns the time of a call to fct in µs (best of 5)."
+    best = None
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(number):
+            fct()
+        elapsed = (time.perf_counter() - start) / number * 1e6
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', 1)[0])
+    parser.add_argument('--config', default='halftest')
+    parser.add_argument('--scope', default=None)
+    parser.add_argument('-n', type=int, default=20000)
+    args = parser.parse_args()
+
+    model = Model(args.config, scope=args.scope)
+    comment = model.get_relation_class('blog.comment')(id=1)
+    post = model.get_relation_class('blog.post')(id=1)
+    reverse = next(name for name in post._ho_fkeys if name.startswith('_reverse'))
+    results = [
+        ('comment -> post', lambda: comment._ho_fkeys['post']()),
+        ('post -> comments', lambda: post._ho_fkeys[reverse]()),
+        ('comment -> post -> author', lambda: comment._ho_fkeys['post']()._ho_fkeys['author']()),
+        ('ho_cast', lambda: post.ho_cast('blog.event'))]
+    for label, fct in results:
+        print(f'{label:>26}: {measure(fct, args.n):8.1f} µs')
+    model.disconnect()
+
+if __name__ == '__main__':
+    main()
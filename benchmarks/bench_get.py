@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+#-*- coding: utf-8 -*-
+
+"""Measures ho_get on primary key lookups.
+
+Usage:
+    HALFORM_CONF_DIR=$PWD/.config python benchmarks/bench_get.py [--config halftest] [-r 1000] [-n 2000]
+
+The table bench_get.item is filled with r rows. The time of a lookup by id is
+reported for:
+
+* count + select: the previous implementation of ho_get (a count of the rows,
+  limited to 2, then a select of the row);
+* ho_get: a single select of at most 2 rows;
+* @singleton: a method decorated with singleton, called on a relation object
+  constrained by its id.
+
+The schema is dropped at the end.
+"""
+
+import argparse
+import random
+import time
+
+from half_orm.model import Model
+from half_orm.relation import singleton
+
+def measure(fct, number):
+    "Returns the time of a call to fct in µs (best of 5)."
+    best = None
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(number):
+            fct()
+        elapsed = (time.perf_counter() - start) / number * 1e6
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def count_and_select(relation):
+    "The previous implementation of ho_get."
+    relation.ho_limit(2)
+    if relation.ho_count() != 1:
+        raise ValueError('not a singleton')
+    return relation(**next(relation.ho_select()))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', 1)[0])
+    parser.add_argument('--config', default='halftest')
+    parser.add_argument('-r', type=int, default=1000)
+    parser.add_argument('-n', type=int, default=2000)
+    args = parser.parse_args()
+
+    model = Model(args.config)
+    model.execute_query('create schema bench_get')
+    try:
+        model.execute_query(
+            'create table bench_get.item (id serial primary key, label text, price numeric)')
+        model.execute_query(
+            "insert into bench_get.item (label, price) "
+            "select 'item ' || num, num from generate_series(1, %s) as num", (args.r,))
+        model._reload()
+
+        class Item(model.get_relation_class('bench_get.item')):
+            @singleton
+            def label_value(self):
+                return self.label.value
+
+        ids = [random.randint(1, args.r) for _ in range(args.n)]
+        cursor = None
+        results = [
+            ('count + select', lambda: count_and_select(Item(id=next(cursor)))),
+            ('ho_get', lambda: Item(id=next(cursor)).ho_get()),
+            ('@singleton', lambda: Item(id=next(cursor)).label_value())]
+        print(f"{args.r} rows")
+        for label, fct in results:
+            # the same ids for each measure (5 rounds).
+            cursor = iter(ids * 5)
+            print(f'{label:>15}: {measure(fct, args.n):8.1f} µs')
+    finally:
+        model.execute_query('drop schema bench_get cascade')
+        model.disconnect()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+#-*- coding: utf-8 -*-
+
+"""Measures the loading of the metadata on a large catalog.
+
+Usage:
+    python benchmarks/bench_introspection.py [-n 10000] [-c 20]
+    HALFORM_CONF_DIR=$PWD/.config python benchmarks/bench_introspection.py --db [--config halftest] [-n 1000] [-c 20]
+
+Without --db, the rows of the catalog queries are generated for n relations of c
+columns (10k relations and 200k columns by default), each one with a primary key, a
+unique constraint, a foreign key to the previous relation and comments. The assembly
+of the metadata is timed on 1/8, 1/4, 1/2 and all of the relations: the time per
+relation should stay the same.
+
+With --db, the schema bench_meta is filled with n tables of c columns and the time
+spent in each catalog query and in the assembly is reported. The schema is dropped
+at the end.
+"""
+
+import argparse
+import time
+
+from half_orm import pg_meta
+from half_orm.pg_meta import PgMeta
+
+def synthetic_catalog(nb_relations, nb_columns):
+    "Returns the rows of the catalog queries for a synthetic database."
+    catalog = {name: [] for name in pg_meta._CATALOG_REQUESTS}
+    for num in range(nb_relations):
+        oid = 100000 + num
+        catalog['relations'].append({
+            'tableid': oid, 'schemaname': f'schema_{num % 10}',
+            'relationname': f'table_{num}', 'tablekind': 'r'})
+        catalog['comments'].append({'tableid': oid, 'fieldnum': 0, 'description': f'table {num}'})
+        for col in range(1, nb_columns + 1):
+            catalog['attributes'].append({
+                'tableid': oid, 'fieldnum': col, 'fieldname': f'col_{col}', 'fielddim': 0,
+                'fieldtype': 'int4', 'inherited': False, 'notnull': col == 1})
+            catalog['comments'].append({'tableid': oid, 'fieldnum': col, 'description': f'column {col}'})
+        constraint = {'tableid': oid, 'confrelid': 0, 'confkey': None, 'confupdtype': ' ', 'confdeltype': ' '}
+        catalog['constraints'].append(dict(constraint, conname=f'pk_{num}', contype='p', conkey=[1]))
+        catalog['constraints'].append(dict(constraint, conname=f'uniq_{num}', contype='u', conkey=[2, 3]))
+        if num:
+            catalog['constraints'].append(dict(
+                constraint, conname=f'fk_{num}', contype='f', conkey=[4], confrelid=oid - 1,
+                confkey=[1], confupdtype='a', confdeltype='c'))
+    return catalog
+
+def assemble(catalog):
+    "Assembles the metadata of the catalog rows. Returns the time spent."
+    pg_meta_ = PgMeta.__new__(PgMeta)
+    pg_meta_._PgMeta__dbname = 'bench'
+    start = time.perf_counter()
+    pg_meta_._PgMeta__assemble(catalog)
+    return time.perf_counter() - start
+
+def subset(catalog, nb_relations):
+    "Returns the rows of the catalog for the first nb_relations relations."
+    oids = {row['tableid'] for row in catalog['relations'][:nb_relations]}
+    return {name: [row for row in rows if row['tableid'] in oids] for name, rows in catalog.items()}
+
+def synthetic(nb_relations, nb_columns):
+    catalog = synthetic_catalog(nb_relations, nb_columns)
+    print(f"{'relations':>10}{'columns':>10}{'assembly (s)':>14}{'µs/relation':>13}")
+    for size in (nb_relations // 8, nb_relations // 4, nb_relations // 2, nb_relations):
+        elapsed = assemble(subset(catalog, size))
+        print(f'{size:>10}{size * nb_columns:>10}{elapsed:>14.3f}{elapsed / size * 1e6:>13.1f}')
+
+def database(config, nb_relations, nb_columns):
+    from half_orm.model import Model
+
+    model = Model(config, lazy=True)
+    columns = ', '.join(f'col_{col} int' for col in range(2, nb_columns))
+    model.execute_query('create schema bench_meta')
+    try:
+        model.execute_query(f'create table bench_meta.table_0 (id serial primary key, {columns})')
+        for num in range(1, nb_relations):
+            model.execute_query(
+                f'create table bench_meta.table_{num} (id serial primary key, {columns}, '
+                f'prev int references bench_meta.table_{num - 1}(id))')
+        with model._checkout() as conn:
+            with conn.cursor() as cur:
+                for name, request in pg_meta._REQUESTS.items():
+                    start = time.perf_counter()
+                    cur.execute(request)
+                    rows = cur.fetchall()
+                    print(f'{name:>12}: {time.perf_counter() - start:.3f}s ({len(rows)} rows)')
+            start = time.perf_counter()
+            PgMeta(conn, reload=True)
+            print(f"{'total':>12}: {time.perf_counter() - start:.3f}s "
+                  f"({len(PgMeta.meta[model._dbname]['byname'])} relations)")
+    finally:
+        # one table at a time: a single drop cascade exceeds max_locks_per_transaction.
+        for num in reversed(range(nb_relations)):
+            model.execute_query(f'drop table if exists bench_meta.table_{num}')
+        model.execute_query('drop schema bench_meta')
+        model.disconnect()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', 1)[0])
+    parser.add_argument('--db', action='store_true', help='load the metadata of a generated schema')
+    parser.add_argument('--config', default='halftest')
+    parser.add_argument('-n', type=int)
+    parser.add_argument('-c', type=int, default=20)
+    args = parser.parse_args()
+    if args.db:
+        database(args.config, args.n or 1000, args.c)
+    else:
+        synthetic(args.n or 10000, args.c)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+#-*- coding: utf-8 -*-
+
+"""Measures the memory used by the metadata of a large catalog.
+
+Usage:
+    python benchmarks/bench_metadata_memory.py [-n 10000] [-c 20]
+
+The metadata of a synthetic catalog (n relations of c columns, see
+bench_introspection.py) is assembled and its size is measured with tracemalloc.
+It is compared with the layout used before the FieldMeta/RelationMeta classes,
+rebuilt from the same metadata: a dict of 20 keys per column (a row of the catalog
+query, with the schema, relation and descriptions repeated), held by OrderedDicts,
+and the byid entries mapping the column numbers to their names.
+"""
+
+import argparse
+import gc
+import tracemalloc
+from collections import OrderedDict
+
+from bench_introspection import synthetic_catalog
+from half_orm.pg_meta import PgMeta
+
+def legacy(metadata):
+    "Returns the metadata in the layout of the previous versions."
+    byname = OrderedDict()
+    byid = {}
+    for sfqrn, relation in metadata['byname'].items():
+        fields = OrderedDict()
+        fields_by_num = OrderedDict()
+        for name, field in relation.fields.items():
+            row = OrderedDict([
+                ('tableid', field.tableid), ('schemaname', sfqrn[1]), ('relationname', sfqrn[2]),
+                ('tabledescription', relation.description)])
+            row.update((key, value) for key, value in field.items() if key not in ('name', 'tableid'))
+            fields[name] = fields_by_num[field.fieldnum] = row
+        byname[sfqrn] = OrderedDict([
+            ('description', relation.description), ('fields', fields),
+            ('fkeys', OrderedDict(relation.fkeys)), ('fields_by_num', fields_by_num),
+            ('tableid', relation.tableid), ('tablekind', relation.tablekind),
+            ('inherits', list(relation.inherits))])
+        byid[relation.tableid] = {
+            'sfqrn': sfqrn, 'fkeys': OrderedDict(),
+            'fields': OrderedDict((num, field.name) for num, field in relation.fields_by_num.items())}
+    return {'relations_list': list(metadata['relations_list']), 'byname': byname, 'byid': byid}
+
+def measure(build):
+    "Returns the object built by **build** and the memory allocated in MB."
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, size / 2 ** 20
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', 1)[0])
+    parser.add_argument('-n', type=int, default=10000)
+    parser.add_argument('-c', type=int, default=20)
+    args = parser.parse_args()
+
+    catalog = synthetic_catalog(args.n, args.c)
+    pg_meta = PgMeta.__new__(PgMeta)
+    pg_meta._PgMeta__dbname = 'bench'
+    metadata, compact = measure(lambda: pg_meta._PgMeta__assemble(catalog))
+    _, previous = measure(lambda: legacy(metadata))
+    print(f"{args.n} relations, {args.n * args.c} columns")
+    print(f"{'previous layout':>16}: {previous:8.1f} MB")
+    print(f"{'compact layout':>16}: {compact:8.1f} MB ({previous / compact:.1f}x smaller)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+#-*- coding: utf-8 -*-
+
+"""Measures a listing page with its total: select + count vs ho_page.
+
+Usage:
+    HALFORM_CONF_DIR=$PWD/.config python benchmarks/bench_page.py [--config halftest] [-r 100000] [-n 20]
+
+The table bench_page.item is filled with r rows. The time to get the page of 100
+rows at offset 1000 of the items with a price lower than r / 2, with the total
+number of items, is reported for:
+
+* select + count: ho_select then ho_count on the filters rebuilt (the previous
+  implementation of the listing of the instant-rest-api example);
+* ho_page: the rows and the total in a single query (the count is a CTE);
+* ho_page (estimate): the rows and the estimated total.
+
+The schema is dropped at the end.
+"""
+
+import argparse
+import time
+
+from half_orm.model import Model
+
+def measure(fct, number):
+    "Returns the time of a call to fct in ms (best of 5)."
+    best = None
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(number):
+            fct()
+        elapsed = (time.perf_counter() - start) / number * 1e3
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', 1)[0])
+    parser.add_argument('--config', default='halftest')
+    parser.add_argument('-r', type=int, default=100000)
+    parser.add_argument('-n', type=int, default=20)
+    args = parser.parse_args()
+
+    model = Model(args.config)
+    model.execute_query('create schema bench_page')
+    try:
+        model.execute_query('create table bench_page.item (id serial primary key, label text, price int)')
+        model.execute_query(
+            "insert into bench_page.item (label, price) "
+            "select 'item ' || num, num from generate_series(1, %s) as num", (args.r,))
+        model.execute_query('analyze bench_page.item')
+        model._reload()
+        Item = model.get_relation_class('bench_page.item')
+
+        def items():
+            return Item(price=('<', args.r // 2)).ho_order_by('id')
+
+        def select_and_count():
+            rows = list(items().ho_limit(100).ho_offset(1000).ho_select('id', 'label'))
+            return rows, items().ho_count()
+
+        print(f"{args.r} rows")
+        for label, fct in (
+                ('select + count', select_and_count),
+                ('ho_page', lambda: items().ho_page(100, 'id', 'label', offset=1000)),
+                ('ho_page (estimate)', lambda: items().ho_page(100, 'id', 'label', offset=1000, estimate=True))):
+            print(f'{label:>18}: {measure(fct, args.n):8.2f} ms')
+    finally:
+        model.execute_query('drop schema bench_page cascade')
+        model.disconnect()
+
+if __name__ == '__main__':
+    main()
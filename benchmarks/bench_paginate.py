@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+#-*- coding: utf-8 -*-
+
+"""Measures the pagination of a table: offset pagination vs ho_paginate (keyset).
+
+Usage:
+    HALFORM_CONF_DIR=$PWD/.config python benchmarks/bench_paginate.py [--config halftest] [-r 1000000] [-p 10000]
+
+The table bench_paginate.item is filled with r rows and read by pages of p rows:
+
+* offset: ho_order_by('id').ho_limit(p).ho_offset(n * p), for each page n;
+* ho_paginate: WHERE id > last id ORDER BY id LIMIT p;
+* ho_paginate (prefetch): the same, with the next page selected in a thread.
+
+The total time and the time of the first and last pages are reported. The schema
+is dropped at the end.
+"""
+
+import argparse
+import time
+
+from half_orm.model import Model
+
+def offset_pages(Item, page_size):
+    "Yields the pages with ho_offset."
+    num = 0
+    while True:
+        page = list(Item().ho_order_by('id').ho_limit(page_size).ho_offset(num * page_size).ho_select())
+        if not page:
+            return
+        yield page
+        num += 1
+
+def measure(pages):
+    "Returns the total time and the time of the first and last pages in ms."
+    times = []
+    start = time.perf_counter()
+    for _ in pages:
+        times.append(time.perf_counter())
+    total = times[-1] - start
+    return total * 1e3, (times[0] - start) * 1e3, (times[-1] - times[-2]) * 1e3
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', 1)[0])
+    parser.add_argument('--config', default='halftest')
+    parser.add_argument('-r', type=int, default=1000000)
+    parser.add_argument('-p', type=int, default=10000)
+    args = parser.parse_args()
+
+    model = Model(args.config)
+    model.execute_query('create schema bench_paginate')
+    try:
+        model.execute_query('create table bench_paginate.item (id serial primary key, label text)')
+        model.execute_query(
+            "insert into bench_paginate.item (label) "
+            "select 'item ' || num from generate_series(1, %s) as num", (args.r,))
+        model.execute_query('analyze bench_paginate.item')
+        model._reload()
+        Item = model.get_relation_class('bench_paginate.item')
+        print(f"{args.r} rows, pages of {args.p} rows")
+        for label, pages in (
+                ('offset', lambda: offset_pages(Item, args.p)),
+                ('ho_paginate', lambda: Item().ho_paginate(args.p)),
+                ('ho_paginate (prefetch)', lambda: Item().ho_paginate(args.p, prefetch=True))):
+            total, first, last = measure(pages())
+            print(f'{label:>22}: {total:9.1f} ms (first page {first:6.1f} ms, last page {last:6.1f} ms)')
+    finally:
+        model.execute_query('drop schema bench_paginate cascade')
+        model.disconnect()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+#-*- coding: utf-8 -*-
+
+"""Measures the memory of the workers of a pre-fork server on a large schema.
+
+Usage:
+    HALFORM_CONF_DIR=$PWD/.config python benchmarks/bench_prefork.py [--config halftest] [-n 2000] [-w 8]
+
+The schema bench_prefork is filled with n tables of 20 columns. For each mode, a new
+process forks w workers. Each worker creates the Model, counts the rows of 10 tables,
+runs a garbage collection (as a long-running worker eventually does) and reports its
+memory (Linux only): the RSS and the private memory (the pages not shared with the
+master, read in /proc/self/smaps_rollup). The schema is dropped at the end.
+
+The modes are:
+
+* cold: the master only imports half_orm, each worker loads the metadata;
+* preload: the master creates the Model before the fork, the workers reuse its metadata;
+* prefork: same as preload, with Model.prefork() called by the master.
+"""
+
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+
+MODES = ['cold', 'preload', 'prefork']
+
+def memory():
+    "Returns the RSS and the private memory of the process in MB (Linux only)."
+    values = {}
+    with open('/proc/self/smaps_rollup') as smaps:
+        for line in smaps:
+            key, _, value = line.partition(':')
+            if key in ('Rss', 'Private_Clean', 'Private_Dirty'):
+                values[key] = int(value.split()[0]) / 1024
+    return {'rss': values['Rss'], 'private': values['Private_Clean'] + values['Private_Dirty']}
+
+def worker(config, nb_tables, output):
+    "The work of a worker. Writes its memory on **output**."
+    from half_orm.model import Model
+
+    model = Model(config)
+    for num in range(0, nb_tables, max(1, nb_tables // 10)):
+        model.get_relation_class(f'bench_prefork.table_{num}')().ho_count()
+    gc.collect()
+    os.write(output, (json.dumps(memory()) + '\n').encode())
+    model.disconnect()
+
+def run(config, mode, nb_tables, nb_workers):
+    "Forks the workers. Returns the average memory of a worker."
+    from half_orm.model import Model
+
+    if mode != 'cold':
+        model = Model(config)
+        if mode == 'prefork':
+            model.prefork()
+    read_end, write_end = os.pipe()
+    children = []
+    for _ in range(nb_workers):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                worker(config, nb_tables, write_end)
+            finally:
+                os._exit(0)
+        children.append(pid)
+    os.close(write_end)
+    with os.fdopen(read_end) as results:
+        measures = [json.loads(line) for line in results]
+    for pid in children:
+        os.waitpid(pid, 0)
+    return {key: sum(measure[key] for measure in measures) / len(measures) for key in ('rss', 'private')}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', 1)[0])
+    parser.add_argument('--config', default='halftest')
+    parser.add_argument('--run', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('-n', type=int, default=2000)
+    parser.add_argument('-w', type=int, default=8)
+    args = parser.parse_args()
+    if args.run:
+        print(json.dumps(run(args.config, args.run, args.n, args.w)))
+        return
+
+    from half_orm.model import Model
+
+    model = Model(args.config, lazy=True)
+    columns = ', '.join(f'col_{col} int' for col in range(1, 20))
+    model.execute_query('create schema bench_prefork')
+    try:
+        for num in range(args.n):
+            model.execute_query(
+                f'create table bench_prefork.table_{num} (id serial primary key, {columns})')
+        print(f"{args.n} relations, {args.w} workers")
+        print(f"{'mode':>8}{'RSS/worker (MB)':>18}{'private/worker (MB)':>22}")
+        for mode in MODES:
+            out = subprocess.run(
+                [sys.executable, __file__, '--config', args.config, '--run', mode,
+                 '-n', str(args.n), '-w', str(args.w)],
+                check=True, capture_output=True, text=True).stdout
+            result = json.loads(out)
+            print(f"{mode:>8}{result['rss']:>18.1f}{result['private']:>22.1f}")
+    finally:
+        # one table at a time: a single drop cascade exceeds max_locks_per_transaction.
+        for num in reversed(range(args.n)):
+            model.execute_query(f'drop table if exists bench_prefork.table_{num}')
+        model.execute_query('drop schema bench_prefork')
+        model.disconnect()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+#-*- coding: utf-8 -*-
+
+"""Measures the construction of relation objects on a wide table.
+
+Usage:
+    HALFORM_CONF_DIR=$PWD/.config python benchmarks/bench_relation_init.py [--config halftest] [-c 60] [-f 20] [-n 20000]
+
+The schema bench_init is filled with a table of c columns, f of them referencing f
+other tables, and 5 tables referencing it (reverse foreign keys). The time of the
+construction of a relation object is reported for:
+
+* Wide(): no constraint;
+* Wide(col_1=...): a constraint set in the constructor;
+* Wide(...).col_1 + fkey: a constraint set, a field and a foreign key accessed.
+
+The schema is dropped at the end.
+"""
+
+import argparse
+import time
+
+from half_orm.model import Model
+
+def measure(fct, number):
+    "Returns the time of a call to fct in µs (best of 5)."
+    best = None
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(number):
+            fct()
+        elapsed = (time.perf_counter() - start) / number * 1e6
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', 1)[0])
+    parser.add_argument('--config', default='halftest')
+    parser.add_argument('-c', type=int, default=60)
+    parser.add_argument('-f', type=int, default=20)
+    parser.add_argument('-n', type=int, default=20000)
+    args = parser.parse_args()
+
+    model = Model(args.config)
+    model.execute_query('create schema bench_init')
+    try:
+        for num in range(args.f):
+            model.execute_query(f'create table bench_init.ref_{num} (id serial primary key)')
+        columns = [
+            f'col_{col} int references bench_init.ref_{col}(id)' if col < args.f else f'col_{col} text'
+            for col in range(args.c - 1)]
+        model.execute_query(
+            f'create table bench_init.wide (id serial primary key, {", ".join(columns)})')
+        for num in range(5):
+            model.execute_query(
+                f'create table bench_init.child_{num} (id serial primary key, '
+                'wide_id int references bench_init.wide(id))')
+        model._reload()
+        Wide = model.get_relation_class('bench_init.wide')
+        wide = Wide()
+        fkey = next(name for name in wide._ho_fkeys if not name.startswith('_reverse'))
+        print(f"{args.c} columns, {len(wide._ho_fkeys)} foreign keys (reverse included)")
+        results = [
+            ('Wide()', lambda: Wide()),
+            ('Wide(col_1=...)', lambda: Wide(col_1=1)),
+            ('+ field & fkey', lambda: (lambda rel: (rel.col_1.value, rel._ho_fkeys[fkey]))(Wide(col_1=1)))]
+        for label, fct in results:
+            print(f'{label:>18}: {measure(fct, args.n):8.1f} µs')
+    finally:
+        model.execute_query('drop schema bench_init cascade')
+        model.disconnect()
+
+if __name__ == '__main__':
+    main()
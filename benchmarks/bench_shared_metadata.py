@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+#-*- coding: utf-8 -*-
+
+"""Measures the models of many databases with the same schema (one database per tenant).
+
+Usage:
+    HALFORM_CONF_DIR=$PWD/.config python benchmarks/bench_shared_metadata.py [--config halftest] [-d 20] [-n 200]
+
+The database bench_tenant_0 is filled with n tables of 20 columns, each one with a
+foreign key to the previous one, and copied in d - 1 other databases. For each mode,
+a new process creates the models of the d databases and generates the classes of all
+their relations. The time spent and the memory allocated (tracemalloc) are reported.
+The config files of the databases are written in a temporary directory, with or
+without the share_metadata option. The databases are dropped at the end.
+"""
+
+import argparse
+import configparser
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+MODES = ['separate', 'shared']
+
+def run(nb_databases):
+    "Creates the models and their classes. Returns the time and the memory used."
+    from half_orm.model import Model
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    models = []
+    for num in range(nb_databases):
+        model = Model(f'bench_tenant_{num}')
+        for _, fqrn in model._relations():
+            model.get_relation_class(f'{fqrn[1]}.{fqrn[2]}')
+        models.append(model)
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    for model in models:
+        model.disconnect()
+    return {'time': elapsed, 'memory': size / 2 ** 20}
+
+def write_configs(config, nb_databases, directory, share):
+    "Writes the config files of the databases in **directory**."
+    from half_orm.model import CONF_DIR
+
+    parser = configparser.ConfigParser()
+    parser.read(os.path.join(CONF_DIR, config))
+    for num in range(nb_databases):
+        parser['database']['name'] = f'bench_tenant_{num}'
+        parser['database']['share_metadata'] = '1' if share else '0'
+        with open(os.path.join(directory, f'bench_tenant_{num}'), 'w') as config_file:
+            parser.write(config_file)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', 1)[0])
+    parser.add_argument('--config', default='halftest')
+    parser.add_argument('--run', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('-d', type=int, default=20)
+    parser.add_argument('-n', type=int, default=200)
+    args = parser.parse_args()
+    if args.run:
+        print(json.dumps(run(args.d)))
+        return
+
+    from half_orm.model import Model
+
+    model = Model(args.config, lazy=True)
+    columns = ', '.join(f'col_{col} int' for col in range(2, 20))
+    model.execute_query('create database bench_tenant_0')
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            write_configs(args.config, args.d, directory, False)
+            # an absolute path: the config file is not searched in HALFORM_CONF_DIR.
+            template = Model(os.path.join(directory, 'bench_tenant_0'), lazy=True)
+            template.execute_query(
+                f'create table public.table_0 (id serial primary key, {columns})')
+            for num in range(1, args.n):
+                template.execute_query(
+                    f'create table public.table_{num} (id serial primary key, {columns}, '
+                    f'prev int references public.table_{num - 1}(id))')
+            template.disconnect()
+            for num in range(1, args.d):
+                model.execute_query(f'create database bench_tenant_{num} template bench_tenant_0')
+            print(f"{args.d} databases, {args.n} relations")
+            print(f"{'mode':>10}{'time (s)':>12}{'memory (MB)':>14}")
+            for mode in MODES:
+                write_configs(args.config, args.d, directory, mode == 'shared')
+                out = subprocess.run(
+                    [sys.executable, __file__, '--run', '-d', str(args.d)],
+                    env=dict(os.environ, HALFORM_CONF_DIR=directory),
+                    check=True, capture_output=True, text=True).stdout
+                result = json.loads(out)
+                print(f"{mode:>10}{result['time']:>12.2f}{result['memory']:>14.1f}")
+    finally:
+        for num in range(args.d):
+            model.execute_query(f'drop database if exists bench_tenant_{num} with (force)')
+        model.disconnect()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+#-*- coding: utf-8 -*-
+
+"""Measures the peak resident memory of ho_select with and without stream mode.
+
+Usage:
+    HALFORM_CONF_DIR=$PWD/.config python benchmarks/bench_stream_memory.py [--config halftest] [rows ...]
+
+For each number of rows, the table public.bench_stream is filled and iterated in a
+new process with ho_select(), ho_select(stream=True) and ho_select_batches(). The
+peak RSS of the process (ru_maxrss) is reported. The table is dropped at the end.
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+
+MODES = ['ho_select', 'stream', 'batches']
+
+def run(config, mode):
+    "Iterates over public.bench_stream and returns the peak RSS in MiB."
+    from half_orm.model import Model
+
+    model = Model(config)
+    Bench = model.get_relation_class('public.bench_stream')
+    count = 0
+    if mode == 'ho_select':
+        for _ in Bench().ho_select():
+            count += 1
+    elif mode == 'stream':
+        for _ in Bench().ho_select(stream=True, itersize=5000):
+            count += 1
+    else:
+        for rows in Bench().ho_select_batches(5000):
+            count += len(rows)
+    model.disconnect()
+    return {
+        'rows': count,
+        'rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', 1)[0])
+    parser.add_argument('--config', default='halftest')
+    parser.add_argument('--run', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('rows', nargs='*', type=int, default=[100000, 300000, 1000000])
+    args = parser.parse_args()
+    if args.run:
+        print(json.dumps(run(args.config, args.run)))
+        return
+
+    from half_orm.model import Model
+
+    model = Model(args.config)
+    model.execute_query('create table public.bench_stream (id int, payload text)')
+    try:
+        print(f"{'rows':>10}" + ''.join(f'{mode + " (MiB)":>16}' for mode in MODES))
+        filled = 0
+        for rows in sorted(args.rows):
+            model.execute_query(
+                "insert into public.bench_stream "
+                "select id, repeat('x', 100) from generate_series(%s, %s) as id",
+                (filled + 1, rows))
+            filled = rows
+            line = f'{rows:>10}'
+            for mode in MODES:
+                out = subprocess.run(
+                    [sys.executable, __file__, '--config', args.config, '--run', mode],
+                    check=True, capture_output=True, text=True).stdout
+                result = json.loads(out)
+                assert result['rows'] == rows
+                line += f"{result['rss']:>16.1f}"
+            print(line)
+    finally:
+        model.execute_query('drop table public.bench_stream')
+        model.disconnect()
+
+if __name__ == '__main__':
+    main()
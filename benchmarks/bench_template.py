@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+#-*- coding: utf-8 -*-
+
+"""Compares a lookup run with ho_select and with a prepared template.
+
+Usage:
+    HALFORM_CONF_DIR=$PWD/.config python benchmarks/bench_template.py [--config halftest] [-n 5000]
+
+The same query (a person by last name and first name pattern) is run n times:
+
+* ho_select: a new relation object is built and the query is planned at each call;
+* template: the query is prepared once on the connection, then executed.
+"""
+
+import argparse
+import time
+
+from half_orm.model import Model
+from half_orm.template import Param
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', 1)[0])
+    parser.add_argument('--config', default='halftest')
+    parser.add_argument('-n', type=int, default=5000)
+    args = parser.parse_args()
+
+    model = Model(args.config)
+    Person = model.get_relation_class('actor.person')
+    names = [row['last_name'] for row in Person().ho_select('last_name')] or ['none']
+    tmpl = Person.ho_template('id', last_name=Param('ln'), first_name=('like', Param('fn')))
+
+    def ho_select(name):
+        return list(Person(last_name=name, first_name=('like', '%')).ho_select('id'))
+
+    def template(name):
+        return tmpl.execute(ln=name, fn='%')
+
+    for label, fct in (('ho_select', ho_select), ('template', template)):
+        fct(names[0])
+        start = time.perf_counter()
+        for i in range(args.n):
+            fct(names[i % len(names)])
+        elapsed = time.perf_counter() - start
+        print(f'{label:>10}: {elapsed:.3f}s, {elapsed / args.n * 1e6:.1f}µs/query')
+    model.disconnect()
+
+if __name__ == '__main__':
+    main()
@@ -230,7 +230,8 @@ class UniversalAPI:
             request: Request,
             limit: Optional[int] = Query(100, ge=1, le=1000),
             offset: Optional[int] = Query(0, ge=0),
-            order_by: Optional[str] = Query(None)
+            order_by: Optional[str] = Query(None),
+            estimate: bool = Query(False)
         ):
             """List records with filtering and pagination"""
             relation_class = self._get_relation_class(schema, relation)
@@ -238,7 +239,7 @@ class UniversalAPI:
             # Extract filters from query parameters
             filters = {}
             for key, value in request.query_params.items():
-                if key not in ['limit', 'offset', 'order_by']:
+                if key not in ['limit', 'offset', 'order_by', 'estimate']:
                     filters[key] = value
             
             # Build query with filters
@@ -254,24 +255,22 @@ class UniversalAPI:
                         detail=f"Invalid order: {order_by}"
                     )
             
-            # Pagination
-            query = query.ho_limit(limit).ho_offset(offset)
-            
-            # Execute and filter columns
+            # Execute and filter columns. The page and the total are fetched
+            # in a single query (the total is estimated if estimate is set).
             try:
                 exposed_columns = self.config.get_exposed_columns(schema, relation)
                 if exposed_columns:
-                    results = list(query.ho_select(*exposed_columns))
+                    page = query.ho_page(limit, *exposed_columns, offset=offset, estimate=estimate)
                 else:
                     # This should not happen if config is properly checked
                     raise HTTPException(status_code=500, detail="No columns configured")
                 
                 return {
-                    "data": results,
-                    "count": len(results),
+                    "data": list(page),
+                    "count": len(page),
                     "limit": limit,
                     "offset": offset,
-                    "total": self._build_filters(relation_class, filters).ho_count()
+                    "total": page.total
                 }
             except Exception as e:
                 raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,217 @@
+#-*- coding: utf-8 -*-
+# pylint: disable=protected-access
+
+"""This module provides the AsyncModel and AsyncTransaction classes.
+
+The AsyncModel class is a `Model <#half_orm.model.Model>`_ that can also run the
+queries on an asyncio connection pool (psycopg 3). The classes returned by its
+`get_relation_class` method provide async counterparts of the
+`Relation <#half_orm.relation.Relation>`_ methods (``ho_aselect``, ``ho_acount``,
+``ho_ainsert``, ``ho_aupdate``, ``ho_adelete``, ``ho_aget``, ``ho_ais_empty``).
+The SQL queries are generated by the same code as their sync versions.
+
+The async driver is an optional dependency::
+
+    pip install half_orm[async]
+
+Example:
+    >>> from half_orm.async_model import AsyncModel, AsyncTransaction
+    >>> model = AsyncModel('halftest')
+    >>> Person = model.get_relation_class('actor.person')
+    >>> async def main():
+    ...     async for person in Person(last_name=('like', 'La%')).ho_aselect('id'):
+    ...         print(person)
+    ...     async with AsyncTransaction(model):
+    ...         await Person(last_name='Lagaffe').ho_aupdate(first_name='Gaston')
+    ...     await model.aclose()
+"""
+
+import typing
+
+from half_orm import utils
+from half_orm.driver import AsyncBindingCursor, register_dumpers
+from half_orm.model import Model
+
+try:
+    from psycopg import AsyncClientCursor
+    from psycopg.conninfo import make_conninfo
+    from psycopg.rows import dict_row
+    from psycopg_pool import AsyncConnectionPool
+except ImportError: # pragma: no cover
+    AsyncConnectionPool = None
+
+async def _configure(conn):
+    "Registers the half_orm adapters on a new connection of the pool."
+    register_dumpers(conn)
+
+# (transaction level, connection) of the current task for each async model.
+_ATX_STATE = utils.ModelVar('half_orm_atx_state', default=(0, None))
+
+class AsyncModel(Model):
+    """A Model with an asyncio connection pool.
+
+    Parameters:
+        config_file (str): see `Model <#half_orm.model.Model>`_.
+        scope (Optional[str]): see `Model <#half_orm.model.Model>`_.
+
+    The metadata is loaded once, with the sync connection, and shared with the sync
+    models. The async pool uses the ``[pool]`` section of the config file and is
+    opened on the first async query (or with `aconnect`).
+
+    Raises:
+        ImportError: if psycopg 3 and psycopg_pool are not installed.
+    """
+    _classes_ = {}
+    def __init__(self, config_file: None, scope: str=None):
+        if AsyncConnectionPool is None:
+            raise ImportError(
+                "AsyncModel requires psycopg 3 and psycopg_pool: pip install half_orm[async]")
+        super().__init__(config_file, scope)
+        self.__apool = None
+
+    @property
+    def _relation_model(self):
+        "The classes returned by get_relation_class are bound to self."
+        return self
+
+    def _import_class(self, qtn, scope=None):
+        """The classes of the scope modules are bound to the sync model.
+        Always returns the class generated for self.
+        """
+        return self.get_relation_class(qtn)
+
+    async def aconnect(self):
+        """Opens the async connection pool.
+
+        Returns:
+            AsyncConnectionPool: the pool.
+        """
+        if self.__apool is None:
+            pool_config = self._pool_config
+            conninfo = make_conninfo(
+                '', **{key: value for key, value in self._dbinfo.items() if value is not None})
+            self.__apool = AsyncConnectionPool(
+                conninfo,
+                min_size=pool_config['minconn'],
+                max_size=pool_config['maxconn'],
+                timeout=pool_config['timeout'] or 30.,
+                kwargs={
+                    'autocommit': True,
+                    'row_factory': dict_row,
+                    'cursor_factory': AsyncBindingCursor},
+                configure=_configure,
+                check=AsyncConnectionPool.check_connection,
+                open=False)
+        await self.__apool.open()
+        return self.__apool
+
+    async def aclose(self):
+        """Closes the async connection pool."""
+        if self.__apool is not None:
+            apool, self.__apool = self.__apool, None
+            await apool.close()
+
+    async def _atx_enter(self):
+        """Async version of `Model._tx_enter`."""
+        level, conn = _ATX_STATE.get(self)
+        if level == 0:
+            conn = await (await self.aconnect()).getconn()
+            await conn.set_autocommit(False)
+        return _ATX_STATE.set(self, (level + 1, conn))
+
+    async def _atx_exit(self, token):
+        """Async version of `Model._tx_exit`."""
+        level, conn = _ATX_STATE.get(self)
+        _ATX_STATE.reset(self, token)
+        if level != 1:
+            return
+        try:
+            await conn.commit()
+        except Exception:
+            await conn.rollback()
+        finally:
+            try:
+                await conn.set_autocommit(True)
+            except Exception: # pylint: disable=broad-except
+                # a broken connection: the pool discards it once closed.
+                await conn.close()
+            await self.__apool.putconn(conn)
+
+    @property
+    def _atx_level(self):
+        "Returns the async transaction level of the current task."
+        return _ATX_STATE.get(self)[0]
+
+    @property
+    def _aconnection(self):
+        """Returns the connection bound to the async transaction of the current task
+        or None outside of a transaction.
+        """
+        return _ATX_STATE.get(self)[1]
+
+    async def __aexecute(self, conn, query, values, mogrify):
+        cursor = conn.cursor()
+        try:
+            if mogrify:
+                print(AsyncClientCursor(conn).mogrify(query, values))
+            await cursor.execute(query, values)
+        except Exception as exc:
+            utils.error(f"Query execution failed:\nquery: {query}\n")
+            raise exc
+        if cursor.description is None:
+            return None
+        return await cursor.fetchall()
+
+    async def aexecute_query(self, query, values=None, mogrify=False) -> typing.Optional[typing.List[dict]]:
+        """Async version of `Model.execute_query <#half_orm.model.Model.execute_query>`_.
+
+        Returns:
+            List[dict] | None: the rows returned by the query (None if the query returns no rows).
+        """
+        conn = self._aconnection
+        if conn is not None:
+            return await self.__aexecute(conn, query, values, mogrify)
+        async with (await self.aconnect()).connection() as conn:
+            return await self.__aexecute(conn, query, values, mogrify)
+
+    async def aexecute_function(self, fct_name, *args, **kwargs) -> typing.List[dict]:
+        """Async version of `Model.execute_function <#half_orm.model.Model.execute_function>`_.
+
+        Raises:
+            RuntimeError: If you mix ***args** and ****kwargs**.
+        """
+        if bool(args) and bool(kwargs):
+            raise RuntimeError("You can't mix args and kwargs with the execute_function method!")
+        if kwargs:
+            params = ', '.join([f'{key} := %s' for key in kwargs])
+            values = tuple(kwargs.values())
+        else:
+            params = ', '.join(['%s' for _ in range(len(args))])
+            values = args
+        return await self.aexecute_query(f'select * from {fct_name}({params})', values)
+
+class AsyncTransaction:
+    """Async context manager for a (nested) transaction on an AsyncModel.
+
+    Example:
+        >>> async with AsyncTransaction(model):
+        ...     await Person(**gaston).ho_ainsert()
+    """
+    def __init__(self, model):
+        self.__model = model
+        self.__tokens = []
+
+    async def __aenter__(self):
+        self.__tokens.append(await self.__model._atx_enter())
+
+    async def __aexit__(self, *_):
+        await self.__model._atx_exit(self.__tokens.pop())
+
+    @property
+    def level(self):
+        "Returns the transaction level of the current task."
+        return self.__model._atx_level
+
+    def is_set(self):
+        "Returns True if the current task is in an async transaction."
+        return self.level > 0
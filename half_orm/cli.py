@@ -353,6 +353,128 @@ def version():
         click.echo("\nNo extensions installed")
         click.echo("Try: pip install half-orm-inspect")
 
+def _metadata_cache(config_file, cache_dir):
+    """Returns the Model (lazy, the metadata is not loaded) and the MetadataCache
+    for the **config_file**.
+    """
+    from half_orm.meta_cache import MetadataCache
+    from half_orm.model import Model
+
+    model = Model(config_file, lazy=True)
+    cache = MetadataCache(cache_dir) if cache_dir else model._metadata_cache
+    if cache is None:
+        raise click.UsageError(
+            f"No metadata_cache entry in the [database] section of '{config_file}'. "
+            "Use the --cache-dir option.")
+    return model, cache
+
+@main.group()
+def metadata():
+    """Build and inspect the on-disk metadata cache of a database, compile its metadata
+    in a python module, install the DDL triggers."""
+
+@metadata.command()
+@click.argument('config_file')
+@click.option('--cache-dir', help='Directory of the cache files (metadata_cache entry of the config file by default)')
+def build(config_file, cache_dir):
+    """Load the metadata of the database of CONFIG_FILE and store it in the cache."""
+    from half_orm import meta_cache, pg_meta
+
+    model, cache = _metadata_cache(config_file, cache_dir)
+    tenants = model._pg_meta_options['tenants']
+    key = meta_cache.cache_key(model._dbname, tenants)
+    try:
+        with model._checkout() as conn:
+            fingerprint = meta_cache.fingerprint(conn)
+            pg_meta.PgMeta(conn, reload=True, tenants=tenants)
+        metadata_ = pg_meta.PgMeta.meta[model._dbname]
+        cache.store(key, fingerprint, metadata_)
+    finally:
+        model.disconnect()
+    if cache.info(key) is None:
+        raise click.ClickException(f"Unable to write {cache.path(key)}")
+    click.echo(f"✅ {cache.path(key)}: {len(metadata_['byname'])} relations")
+
+@metadata.command()
+@click.argument('config_file')
+@click.option('--cache-dir', help='Directory of the cache files (metadata_cache entry of the config file by default)')
+def inspect(config_file, cache_dir):
+    """Show the cache file of the database of CONFIG_FILE and check if it is up to date."""
+    from half_orm import meta_cache
+
+    model, cache = _metadata_cache(config_file, cache_dir)
+    key = meta_cache.cache_key(model._dbname, model._pg_meta_options['tenants'])
+    path = cache.path(key)
+    entry = cache.info(key)
+    if entry is None:
+        model.disconnect()
+        click.echo(f"No cache file {path}")
+        return
+    try:
+        with model._checkout() as conn:
+            fingerprint = meta_cache.fingerprint(conn)
+    finally:
+        model.disconnect()
+    up_to_date = (
+        entry['fingerprint'] == fingerprint and entry['version'] == half_orm.__version__ and
+        entry.get('format') == meta_cache.FORMAT)
+    click.echo(f"File: {path} ({Path(path).stat().st_size} bytes)")
+    click.echo(f"Created: {datetime.fromtimestamp(entry['created']).isoformat(timespec='seconds')}")
+    click.echo(f"halfORM version: {entry['version']}")
+    click.echo(f"Fingerprint: {entry['fingerprint']}")
+    click.echo(f"Relations: {len(entry['metadata']['byname'])}")
+    click.echo(f"Status: {'✅ up to date' if up_to_date else '❌ stale'}")
+
+@metadata.command('compile')
+@click.argument('config_file')
+@click.argument('relations', nargs=-1)
+@click.option('-o', '--output', required=True, help='Path of the python module generated')
+def compile_(config_file, relations, output):
+    """Compile the metadata of the database of CONFIG_FILE in a python module (see the
+    compiled_metadata entry of the config file). Only the RELATIONS (<schema>.<relation>)
+    are compiled if some are given: the module is then only used by the lazy models."""
+    from half_orm import meta_cache, pg_meta
+    from half_orm.model import Model
+
+    model = Model(config_file, lazy=True)
+    tenants = model._pg_meta_options['tenants']
+    try:
+        with model._checkout() as conn:
+            fingerprint = meta_cache.fingerprint(conn)
+            pg_meta.PgMeta(conn, reload=True, tenants=tenants)
+        metadata_ = pg_meta.PgMeta.meta[model._dbname]
+    finally:
+        model.disconnect()
+    sfqrns = None
+    if relations:
+        sfqrns = [(model._dbname, *relation.replace('"', '').rsplit('.', 1)) for relation in relations]
+        unknown = [relation for relation, sfqrn in zip(relations, sfqrns)
+                   if sfqrn not in metadata_['byname']]
+        if unknown:
+            raise click.UsageError(f"Unknown relation(s): {', '.join(unknown)}")
+    source = meta_cache.compile_module(model._dbname, fingerprint, metadata_, sfqrns, tenants)
+    Path(output).write_text(source, encoding='utf-8')
+    click.echo(f"✅ {output}: {len(sfqrns or metadata_['byname'])} relations")
+
+@metadata.command('ddl-trigger')
+@click.argument('config_file')
+@click.option('--uninstall', is_flag=True, help='Remove the event triggers')
+def ddl_trigger(config_file, uninstall):
+    """Install the event triggers notifying the DDL on the database of CONFIG_FILE
+    (see Model.listen_ddl). Requires the superuser privilege."""
+    from half_orm import ddl_listener
+    from half_orm.model import Model
+
+    model = Model(config_file, lazy=True)
+    try:
+        if uninstall:
+            ddl_listener.uninstall(model)
+        else:
+            ddl_listener.install(model)
+    finally:
+        model.disconnect()
+    click.echo(f"✅ DDL event triggers {'removed from' if uninstall else 'installed on'} {model._dbname}")
+
 def register_extensions():
     """Discover and register all halfORM extensions."""
     extensions = discover_extensions()
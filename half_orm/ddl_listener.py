@@ -0,0 +1,195 @@
+#-*- coding: utf-8 -*-
+
+"""This module provides the DdlListener class: a thread reloading the metadata of the
+relations changed by a DDL (``CREATE``, ``ALTER``, ``DROP``, ``COMMENT``...) while the
+processes are running.
+
+The event triggers installed by `install` send a notification on the ``half_orm_ddl``
+channel at the end of each DDL command. The payload is a JSON object with the oids of
+the relations changed (``{"oids": [16384, 16390]}``), or ``{"all": true}`` when the
+change can affect any relation (``ALTER SCHEMA``, ``ALTER TYPE``...). As any
+notification, it is sent when the transaction of the DDL commits.
+
+The listener waits for the notifications on a dedicated connection, collects them for
+**delay** seconds and calls `Model._reload_relations <#half_orm.model.Model._reload_relations>`_:
+only the metadata of the relations changed and of the relations linked to them is
+reloaded, and only their classes are regenerated. The connections of the model are kept.
+
+Example:
+    >>> from half_orm import ddl_listener
+    >>> ddl_listener.install(model) # once, by a superuser
+    >>> model.listen_ddl()
+
+The event triggers are removed with `uninstall`.
+
+Note:
+    The changes made while the connection of the listener is broken are not notified:
+    all the metadata is reloaded when the listener reconnects.
+"""
+
+import json
+import threading
+import time
+
+from half_orm import utils
+
+CHANNEL = 'half_orm_ddl'
+
+# the payload of a notification is limited to 8000 bytes.
+MAX_PAYLOAD = 7999
+
+INSTALL_SQL = f"""
+CREATE OR REPLACE FUNCTION public.half_orm_ddl_notify() RETURNS event_trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    oids oid[];
+    payload text;
+BEGIN
+    IF tg_event = 'sql_drop' THEN
+        SELECT array_agg(DISTINCT objid) INTO oids
+        FROM pg_event_trigger_dropped_objects()
+        WHERE classid = 'pg_class'::regclass;
+    ELSIF EXISTS (
+            SELECT 1 FROM pg_event_trigger_ddl_commands()
+            WHERE command_tag IN ('ALTER SCHEMA', 'ALTER TYPE', 'ALTER DOMAIN')) THEN
+        PERFORM pg_notify('{CHANNEL}', '{{"all": true}}');
+        RETURN;
+    ELSE
+        SELECT array_agg(DISTINCT relid) INTO oids FROM (
+            SELECT objid AS relid FROM pg_event_trigger_ddl_commands()
+            WHERE classid = 'pg_class'::regclass
+            UNION
+            SELECT con.conrelid FROM pg_event_trigger_ddl_commands() cmd
+            JOIN pg_constraint con ON con.oid = cmd.objid
+            WHERE cmd.classid = 'pg_constraint'::regclass) AS changed;
+    END IF;
+    IF oids IS NULL THEN
+        RETURN;
+    END IF;
+    payload := json_build_object('oids', oids::int8[])::text;
+    IF length(payload) > {MAX_PAYLOAD} THEN
+        payload := '{{"all": true}}';
+    END IF;
+    PERFORM pg_notify('{CHANNEL}', payload);
+END;
+$$;
+DROP EVENT TRIGGER IF EXISTS half_orm_ddl_command_end;
+CREATE EVENT TRIGGER half_orm_ddl_command_end ON ddl_command_end
+    EXECUTE FUNCTION public.half_orm_ddl_notify();
+DROP EVENT TRIGGER IF EXISTS half_orm_sql_drop;
+CREATE EVENT TRIGGER half_orm_sql_drop ON sql_drop
+    EXECUTE FUNCTION public.half_orm_ddl_notify();
+"""
+
+UNINSTALL_SQL = """
+DROP EVENT TRIGGER IF EXISTS half_orm_ddl_command_end;
+DROP EVENT TRIGGER IF EXISTS half_orm_sql_drop;
+DROP FUNCTION IF EXISTS public.half_orm_ddl_notify();
+"""
+
+def install(model):
+    """Installs the event triggers notifying the DDL on the database of **model**.
+    Requires the superuser privilege.
+    """
+    model.execute_query(INSTALL_SQL)
+
+def uninstall(model):
+    "Removes the event triggers installed by `install`."
+    model.execute_query(UNINSTALL_SQL)
+
+def parse(payloads):
+    """Merges the **payloads** of the notifications.
+
+    Returns:
+        set: the oids of the relations changed or None if all the metadata must be reloaded.
+    """
+    oids = set()
+    for payload in payloads:
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            return None
+        if message.get('all'):
+            return None
+        oids.update(int(oid) for oid in message.get('oids', ()))
+    return oids
+
+class DdlListener(threading.Thread):
+    """The thread listening to the ``half_orm_ddl`` channel for the **model**.
+    Started by `Model.listen_ddl <#half_orm.model.Model.listen_ddl>`_.
+
+    Parameters:
+        model (Model): the model reloaded.
+        delay (float): the seconds spent collecting the notifications before a reload.
+            A migration running several DDL in a row triggers a single reload.
+        poll_interval (float): the maximum time in seconds to notice that the
+            listener is stopped.
+
+    Attributes:
+        reloads (int): the number of reloads done.
+    """
+    def __init__(self, model, delay=0.5, poll_interval=1.):
+        super().__init__(name=f'half_orm_ddl_listener_{model._dbname}', daemon=True)
+        self.__model = model
+        self.__delay = delay
+        self.__poll_interval = poll_interval
+        self.__stopped = threading.Event()
+        self.__listening = threading.Event()
+        self.reloads = 0
+
+    def run(self):
+        driver = self.__model._driver
+        conn = None
+        missed = False
+        while not self.__stopped.is_set():
+            try:
+                if conn is None:
+                    conn = driver.connect(self.__model._dbinfo)
+                    with conn.cursor() as cur:
+                        cur.execute(f'LISTEN {CHANNEL}')
+                    self.__listening.set()
+                    if missed:
+                        missed = False
+                        self.__reload(None)
+                payloads = driver.notifies(conn, self.__poll_interval)
+                if not payloads:
+                    continue
+                deadline = time.monotonic() + self.__delay
+                while time.monotonic() < deadline and not self.__stopped.is_set():
+                    payloads += driver.notifies(conn, max(0., deadline - time.monotonic()))
+                self.__reload(parse(payloads))
+            except driver.connection_errors as exc:
+                utils.warning(f'DDL listener: {exc}\n')
+                self.__listening.clear()
+                missed = True
+                if conn is not None and not conn.closed:
+                    conn.close()
+                conn = None
+                self.__stopped.wait(self.__poll_interval)
+        if conn is not None and not conn.closed:
+            conn.close()
+
+    def __reload(self, oids):
+        "Reloads the metadata of the relations **oids** (all if None)."
+        try:
+            self.__model._reload_relations(oids)
+            self.reloads += 1
+        except self.__model._driver.connection_errors:
+            raise
+        except Exception as exc: # pylint: disable=broad-except
+            # the thread must survive: the next notification reloads again.
+            utils.warning(f'DDL listener: unable to reload the metadata: {exc}\n')
+
+    def wait_listening(self, timeout=None):
+        """Waits until the listener is listening to the channel.
+
+        Returns:
+            bool: False if the timeout expired.
+        """
+        return self.__listening.wait(timeout)
+
+    def stop(self):
+        "Stops the listener and waits for the thread to end."
+        self.__stopped.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join()
@@ -0,0 +1,343 @@
+#-*- coding: utf-8 -*-
+
+"""This module provides the database drivers used by the `Model <#half_orm.model.Model>`_ class.
+
+A driver hides the DB-API library used to talk to PostgreSQL: how a connection is
+opened, how its state is checked by the `ConnectionPool <#half_orm.pool.ConnectionPool>`_
+and which exceptions signal a broken connection. Two drivers are available:
+
+* ``psycopg2`` (default): `psycopg2 <https://www.psycopg.org/docs/>`_;
+* ``psycopg3``: `psycopg 3 <https://www.psycopg.org/psycopg3/docs/>`_, an optional
+  dependency (``pip install half_orm[psycopg3]``) that adds the pipeline mode
+  (see `Model.pipeline <#half_orm.model.Model.pipeline>`_).
+
+The driver is selected in the ``[database]`` section of the config file::
+
+    [database]
+    name = halftest
+    driver = psycopg3
+
+Whatever the driver, the connections are in autocommit mode and their cursors
+return the rows as dictionaries. The queries built by half_orm use the ``%s``
+placeholders. psycopg2 renders the values client side. psycopg 3 binds them server
+side (see `bind`), which lets it prepare the queries executed often on a connection.
+"""
+
+import re
+import select
+from abc import ABC, abstractmethod
+from collections.abc import Mapping
+from contextlib import contextmanager
+
+import psycopg2
+import psycopg2.extras
+from psycopg2.extensions import (
+    AsIs, TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_UNKNOWN, adapt, register_adapter)
+
+from half_orm.field import Field
+from half_orm.null import Null
+
+try:
+    import psycopg
+    from psycopg import AsyncCursor, ClientCursor, Cursor
+    from psycopg.adapt import Dumper, Transformer
+    from psycopg.pq import TransactionStatus
+    from psycopg.rows import dict_row
+    from psycopg.types.json import Json
+except ImportError: # pragma: no cover
+    psycopg = None
+    Dumper = ABC
+    Cursor = AsyncCursor = object
+
+register_adapter(Null, lambda _: AsIs('NULL'))
+register_adapter(Field, lambda field: adapt(field.value))
+register_adapter(dict, psycopg2.extras.Json)
+psycopg2.extras.register_uuid()
+
+class _LiteralDumper(Dumper):
+    """Base class of the psycopg 3 dumpers used to render the values client side,
+    the way psycopg2 does.
+    """
+    @abstractmethod
+    def _literal(self, obj):
+        "Returns the SQL literal of **obj** (bytes)."
+
+    def dump(self, obj):
+        return self.quote(obj)
+
+    def quote(self, obj):
+        return self._literal(obj)
+
+class _NullDumper(_LiteralDumper):
+    "half_orm.null.NULL is rendered as NULL"
+    def _literal(self, obj):
+        return b'NULL'
+
+class _TupleDumper(_LiteralDumper):
+    "A tuple is rendered as a list of values: (v1, v2, ...) (used by the in operator)."
+    def _literal(self, obj):
+        transformer = Transformer.from_context(self.connection)
+        return b'(' + b', '.join(transformer.as_literal(elt) for elt in obj) + b')'
+
+class _FieldDumper(_LiteralDumper):
+    "A Field is rendered as its value."
+    def _literal(self, obj):
+        return Transformer.from_context(self.connection).as_literal(obj.value)
+
+class _DictDumper(_LiteralDumper):
+    "A dict is rendered as json."
+    def _literal(self, obj):
+        return Transformer.from_context(self.connection).as_literal(Json(obj))
+
+def register_dumpers(conn):
+    """Registers the half_orm adapters on a psycopg 3 connection (sync or async).
+    They are used by the client side rendering (mogrify and the prepared templates).
+    """
+    conn.adapters.register_dumper(Null, _NullDumper)
+    conn.adapters.register_dumper(tuple, _TupleDumper)
+    conn.adapters.register_dumper(Field, _FieldDumper)
+    conn.adapters.register_dumper(dict, _DictDumper)
+
+_PLACEHOLDER = re.compile(r'%(%|s)')
+
+def _bound_value(value):
+    "Returns the value of a named parameter as psycopg 3 binds it."
+    if isinstance(value, Field):
+        value = value.value
+    if isinstance(value, Null):
+        return None
+    if isinstance(value, dict):
+        return Json(value)
+    return value
+
+def bind(query, values):
+    """Returns the query and the values to bind server side with psycopg 3.
+
+    The values that psycopg2 renders as SQL are inlined in the query: None and NULL
+    (``"col" is %s``) become NULL and a tuple (``"col" in %s``) becomes a list of
+    placeholders. A Field is replaced by its value and a dict by its JSON.
+    """
+    if not values or not isinstance(query, str):
+        return query, values
+    if isinstance(values, Mapping):
+        return query, {key: _bound_value(value) for key, value in values.items()}
+    values_ = iter(values)
+    bound = []
+    def placeholder(value):
+        if isinstance(value, Field):
+            value = value.value
+        if value is None or isinstance(value, Null):
+            return 'NULL'
+        if isinstance(value, tuple):
+            return f"({', '.join(placeholder(elt) for elt in value)})"
+        bound.append(Json(value) if isinstance(value, dict) else value)
+        return '%s'
+    def replace(match):
+        if match.group(1) == '%':
+            return '%%'
+        return placeholder(next(values_))
+    return _PLACEHOLDER.sub(replace, query), bound
+
+class BindingCursor(Cursor):
+    "The psycopg 3 cursor of the connections: the values are bound server side (see bind)."
+    def execute(self, query, params=None, **kwargs):
+        return super().execute(*bind(query, params), **kwargs)
+
+class AsyncBindingCursor(AsyncCursor):
+    "Async version of BindingCursor."
+    async def execute(self, query, params=None, **kwargs):
+        return await super().execute(*bind(query, params), **kwargs)
+
+class Driver(ABC):
+    """Base class of the drivers. A driver must implement the abstract methods.
+
+    Attributes:
+        name (str): the value of the ``driver`` entry in the config file.
+        Error, OperationalError, InterfaceError, ProgrammingError: the exceptions of the library.
+        connection_errors (tuple): the exceptions raised on a broken connection.
+    """
+    name = None
+    Error = OperationalError = InterfaceError = ProgrammingError = Exception
+    connection_errors = ()
+
+    @abstractmethod
+    def connect(self, dbinfo):
+        """Opens a new connection in autocommit mode.
+
+        Parameters:
+            dbinfo (dict): the connection parameters (dbname, user, password, host, port,
+                connect_timeout). The None values are ignored.
+        """
+
+    @abstractmethod
+    def is_broken(self, conn):
+        "Returns True if the connection can't be used anymore."
+
+    @abstractmethod
+    def is_idle(self, conn):
+        "Returns True if the connection is not in a transaction."
+
+    @abstractmethod
+    def mogrify(self, cursor, query, values):
+        "Returns the query with the values rendered client side."
+
+    @abstractmethod
+    def client_cursor(self, conn):
+        """Returns a cursor of the connection rendering the values client side. Use it
+        for the statements that can't have parameters (PREPARE, EXECUTE...).
+        """
+
+    @abstractmethod
+    def sqlstate(self, exc):
+        "Returns the SQLSTATE code of the error raised by the server (None if unknown)."
+
+    @abstractmethod
+    def callproc(self, cursor, fct_name, values):
+        """Calls the function **fct_name** with **values** (a tuple or a dict)."""
+
+    @abstractmethod
+    def server_cursor(self, conn, name, query, values, hold):
+        """Declares a server side cursor **name** for the query and returns it.
+        The rows are then retrieved with ``fetchmany``.
+
+        Parameters:
+            hold (bool): declares the cursor ``WITH HOLD``: it survives the commit of
+                its transaction.
+        """
+
+    @abstractmethod
+    def notifies(self, conn, timeout):
+        """Waits at most **timeout** seconds for the notifications received by the
+        connection (see LISTEN). Returns the payloads received (possibly none).
+        """
+
+    @contextmanager
+    def pipeline(self, conn):
+        """Context manager sending the queries to the server without waiting
+        for their results. Does nothing if the driver doesn't support it.
+        """
+        yield
+
+class Psycopg2Driver(Driver):
+    "The psycopg2 driver (default)."
+    name = 'psycopg2'
+    Error = psycopg2.Error
+    OperationalError = psycopg2.OperationalError
+    InterfaceError = psycopg2.InterfaceError
+    ProgrammingError = psycopg2.ProgrammingError
+    connection_errors = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+    def connect(self, dbinfo):
+        conn = psycopg2.connect(
+            **{key: value for key, value in dbinfo.items() if value is not None},
+            cursor_factory=psycopg2.extras.RealDictCursor)
+        conn.autocommit = True
+        return conn
+
+    def is_broken(self, conn):
+        return bool(conn.closed) or conn.get_transaction_status() == TRANSACTION_STATUS_UNKNOWN
+
+    def is_idle(self, conn):
+        return conn.get_transaction_status() == TRANSACTION_STATUS_IDLE
+
+    def mogrify(self, cursor, query, values):
+        return cursor.mogrify(query, values).decode('utf-8')
+
+    def client_cursor(self, conn):
+        return conn.cursor()
+
+    def sqlstate(self, exc):
+        return getattr(exc, 'pgcode', None)
+
+    def callproc(self, cursor, fct_name, values):
+        cursor.callproc(fct_name, values)
+
+    def server_cursor(self, conn, name, query, values, hold):
+        cursor = conn.cursor(name, withhold=hold)
+        cursor.execute(query, values)
+        return cursor
+
+    def notifies(self, conn, timeout):
+        if not conn.notifies and select.select([conn], [], [], timeout) != ([], [], []):
+            conn.poll()
+        payloads = [notify.payload for notify in conn.notifies]
+        conn.notifies.clear()
+        return payloads
+
+class Psycopg3Driver(Driver):
+    """The psycopg 3 driver.
+
+    The values are bound server side (see `bind`): the queries executed often on a
+    connection are prepared by psycopg (``prepare_threshold``). mogrify renders the
+    query client side, with a ClientCursor, the way psycopg2 does.
+
+    Raises:
+        ImportError: if psycopg 3 is not installed.
+    """
+    name = 'psycopg3'
+
+    def __init__(self):
+        if psycopg is None:
+            raise ImportError("The psycopg3 driver requires psycopg 3: pip install half_orm[psycopg3]")
+        self.Error = psycopg.Error
+        self.OperationalError = psycopg.OperationalError
+        self.InterfaceError = psycopg.InterfaceError
+        self.ProgrammingError = psycopg.ProgrammingError
+        self.connection_errors = (psycopg.OperationalError, psycopg.InterfaceError)
+
+    def connect(self, dbinfo):
+        conn = psycopg.connect(
+            autocommit=True, row_factory=dict_row, cursor_factory=BindingCursor,
+            **{key: value for key, value in dbinfo.items() if value is not None})
+        register_dumpers(conn)
+        return conn
+
+    def is_broken(self, conn):
+        return conn.closed or conn.info.transaction_status == TransactionStatus.UNKNOWN
+
+    def is_idle(self, conn):
+        return conn.info.transaction_status == TransactionStatus.IDLE
+
+    def mogrify(self, cursor, query, values):
+        return ClientCursor(cursor.connection).mogrify(query, values)
+
+    def client_cursor(self, conn):
+        return ClientCursor(conn)
+
+    def sqlstate(self, exc):
+        return getattr(exc, 'sqlstate', None)
+
+    def callproc(self, cursor, fct_name, values):
+        if isinstance(values, dict):
+            params = ', '.join([f'{key} := %s' for key in values])
+            values = tuple(values.values())
+        else:
+            params = ', '.join(['%s' for _ in range(len(values))])
+        cursor.execute(f'select * from {fct_name}({params})', values)
+
+    def server_cursor(self, conn, name, query, values, hold):
+        cursor = conn.cursor(name, withhold=hold)
+        cursor.execute(*bind(query, values))
+        return cursor
+
+    def notifies(self, conn, timeout):
+        # the generator stops after the first notification or the timeout.
+        return [notify.payload for notify in conn.notifies(timeout=timeout, stop_after=1)]
+
+    @contextmanager
+    def pipeline(self, conn):
+        with conn.pipeline():
+            yield
+
+DRIVERS = {
+    Psycopg2Driver.name: Psycopg2Driver,
+    Psycopg3Driver.name: Psycopg3Driver,
+}
+
+def get_driver(name=None):
+    """Returns an instance of the driver **name** (psycopg2 by default).
+
+    Raises:
+        KeyError: if the driver is unknown.
+    """
+    return DRIVERS[name or Psycopg2Driver.name]()
@@ -5,8 +5,6 @@
 
 import sys
 import typing
-import psycopg2
-import psycopg2.extras
 
 from collections.abc import Iterable
 from half_orm.null import NULL
@@ -15,13 +13,16 @@ from half_orm.sql_adapter import SQL_ADAPTER
 class Field():
     """The class Field is for Relation internal usage. It is called by
     the RelationFactory metaclass for each field in the relation considered.
+
+    The fields are slotted: a relation object can hold many of them.
     """
+    __slots__ = ('__relation', '__name', '__is_set', '__metadata', '__value', '__unaccent', '__comp')
+
     def __init__(self, name, relation, metadata):
         self.__relation = relation
         self.__name = name
         self.__is_set = False
         self.__metadata = metadata
-        self.__sql_type = self.__metadata['fieldtype']
         self.__value = None
         self.__unaccent = False
         self.__comp = '='
@@ -36,7 +37,7 @@ class Field():
 
     @property
     def py_type(self):
-        sql_type = self.__sql_type
+        sql_type = self.__metadata['fieldtype']
         list_ = False
         if sql_type[0] == '_':
             sql_type = sql_type[1:]
@@ -92,13 +93,14 @@ class Field():
         where_repr = ''
         comp_str = '%s'
         isiterable = type(self.__value) in {tuple, list, set}
-        col_is_array = self.__sql_type[0] == '_'
+        sql_type = self.__metadata['fieldtype']
+        col_is_array = sql_type[0] == '_'
         comp = self._comp()
         if comp == '=' and isiterable:
             comp = 'in'
         cast = ''
         if self.__value != NULL and not isiterable:
-            cast = f'::{self.__sql_type}'
+            cast = f'::{sql_type}'
         if col_is_array and comp == '=':
             where_repr = f'{comp_str} = ANY({self.__praf(query, ho_id)})'
         elif not self.unaccent:
@@ -107,6 +109,15 @@ class Field():
             where_repr = f"unaccent({self.__praf(query, ho_id)}) {comp} unaccent({comp_str}{cast})"
         return where_repr
 
+    def _shape(self):
+        """Returns what the SQL representation of the field depends on (see
+        _where_repr), the name of the relation alias excepted. Used as a part of
+        the key of the SQL cache.
+        """
+        return (
+            self.__name, self.__comp, self.__unaccent,
+            type(self.__value) in {tuple, list, set}, self.__value != NULL)
+
     @property
     def value(self):
         "Returns the value of the field object"
@@ -180,10 +191,6 @@ class Field():
         """
         return self.__relation
 
-    def _psycopg_adapter(self):
-        """Return the SQL representation of self.__value"""
-        return psycopg2.extensions.adapt(self.__value)
-
     @property
     def _name(self):
         return self.__name
@@ -199,6 +206,3 @@ class Field():
             err_msg = f"{err_msg}\n{warn_msg}"
             err_msg = f"{err_msg}\nDo not use '{self.__name}' as a method name."
         raise TypeError(err_msg)
-
-psycopg2.extensions.register_adapter(Field, Field._psycopg_adapter)
-psycopg2.extensions.register_adapter(dict, psycopg2.extras.Json)
@@ -13,23 +13,30 @@ class FKey:
     corresponding type (see FKey.set method).
     It is then used to construct the join query for Relation.ho_select
     method.
+
+    The foreign keys are slotted: a relation object can hold many of them.
     """
+    __slots__ = (
+        '__relation', '__name', '__is_set', '__fk_names', '__fk_to',
+        '__confupdtype', '__confdeltype', '__fk_fqrn', '__fields_names')
 
     def __init__(self,
                  fk_name, relation, fk_sfqrn,
                  fk_names=None, fields=None, confupdtype=None, confdeltype=None):
         self.__relation = relation
-        self.__to_relation = None
         self.__name = fk_name
         self.__is_set = False
         self.__fk_names = fk_names or []
-        self.__fk_from = None
         self.__fk_to = None
         self.__confupdtype = confupdtype
         self.__confdeltype = confdeltype
         self.__fk_fqrn = fk_sfqrn
         self.__fields_names = fields
-        self.__fields = [f'"{name}"' for name in fields]
+
+    @property
+    def __fields(self):
+        "The quoted names of the fields composing the foreign key in the table."
+        return [f'"{name}"' for name in self.__fields_names]
 
     def __get_rel(self, fqtn):
         """Returns the relation class referenced by fqtn.
@@ -42,6 +49,9 @@ class FKey:
         Uses the __cast__ if it is set.
         """
         f_relation = self.__get_rel(__cast__ or normalize_qrn(self.__fk_fqrn))(**kwargs)
+        if self.__relation._ho_schema and f_relation._schemaname == self.__relation._schemaname:
+            # stays in the schema of the tenant (see Model.tenant).
+            f_relation._ho_schema = self.__relation._ho_schema
         rev_fkey_name = f'_reverse_{f_relation.ho_id}'
         f_relation._ho_fkeys[rev_fkey_name] = FKey(
             rev_fkey_name,
@@ -51,7 +61,7 @@ class FKey:
         return f_relation
 
     def values(self):
-        return [list(elt.values()) for elt in self.__to_relation.ho_select(*self.__fk_names)]
+        return [list(elt.values()) for elt in self.__fk_to.ho_select(*self.__fk_names)]
 
     def set(self, __to):
         """Sets the relation associated to the foreign key.
@@ -63,9 +73,7 @@ class FKey:
 
         if not issubclass(__to.__class__, Relation):
             raise RuntimeError("Fkey.set excepts an argument of type Relation")
-        self.__to_relation = __to
         from_ = self.__relation
-        self.__fk_from = from_
         self.__fk_to = __to
         self.__is_set = __to.ho_is_set()
         from_._ho_join_to[self] = __to
@@ -90,7 +98,7 @@ class FKey:
         """Returns the join_query, join_values of a foreign key.
         fkey interface: frel, from_, __to, fields, fk_names
         """
-        from_ = self.__fk_from
+        from_ = self.__relation
         __to = self.__fk_to
         orig_rel_id = f'r{orig_rel.ho_id}'
         to_id = f'r{__to.ho_id}'
@@ -105,6 +113,19 @@ class FKey:
             [f'{a} = {b}' for a, b in zip(to_fields, from_fields)])
         return f"({bounds})"
 
+    def _join_shape(self, orig_rel, alias):
+        """Returns what the join query depends on (see _join_query). Used as a part
+        of the key of the SQL cache.
+
+        alias is a function returning the canonical alias of a relation.
+        """
+        from_ = self.__relation
+        __to = self.__fk_to
+        return (
+            tuple(self.__fields_names), tuple(self.__fk_names),
+            alias(orig_rel), alias(__to), alias(from_),
+            __to._qrn == orig_rel._qrn, from_._qrn == orig_rel._qrn)
+
     #@utils.trace
     def _fkey_prep_select(self):
         return (self.__fields, self.__fk_to._ho_prep_select(*self.fk_names)) if self.__is_set else None
@@ -0,0 +1,304 @@
+#-*- coding: utf-8 -*-
+
+"""This module provides the MetadataCache class: an on-disk cache of the metadata
+loaded by the `pg_meta <#module-half_orm.pg_meta>`_ module.
+
+Loading the metadata of a large database takes time. With the cache, a process
+only runs the cheap FINGERPRINT_QUERY on the catalog and reuses the metadata stored
+by a previous process if the fingerprint (and the version of half_orm) hasn't
+changed. Otherwise the metadata is loaded from the database and the cache is
+updated.
+
+The cache is enabled by the ``metadata_cache`` entry of the ``[database]`` section
+of the config file. Its value is the directory of the cache files (one per database)::
+
+    [database]
+    name = halftest
+    metadata_cache = /var/cache/half_orm
+
+The cache can be built and inspected with the ``half_orm metadata`` command:
+
+.. code-block:: sh
+
+    half_orm metadata build halftest
+    half_orm metadata inspect halftest
+
+With a ``[tenants]`` section (see the `Model <#half_orm.model.Model>`_), the
+schemas of the tenants are left out of the metadata. It is stored in its own file,
+named after the template schema and the pattern of the schemas of the tenants (see
+`cache_key`), so the models of the database with and without tenants don't read the
+metadata of each other.
+
+Warning:
+    The cache files are pickle files. The directory must only be writable by the
+    users running the code.
+
+The metadata can also be compiled in a python module shipped with the code, for the
+processes that can't keep a cache directory (jobs, serverless handlers...):
+
+.. code-block:: sh
+
+    half_orm metadata compile halftest -o myapp/halftest_metadata.py [actor.person blog.post ...]
+
+The module is set by the ``compiled_metadata`` entry of the ``[database]`` section::
+
+    [database]
+    name = halftest
+    compiled_metadata = myapp.halftest_metadata
+
+The metadata of the module is used if the fingerprint of the database is the one of
+the compilation. Otherwise, the metadata is loaded from the database. A module holding
+only some relations is used by the lazy models (see `Model <#half_orm.model.Model>`_):
+the other relations are loaded when needed.
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+
+import half_orm
+
+# the version of the structure of the metadata stored.
+FORMAT = 2
+
+FINGERPRINT_QUERY = """
+WITH rel AS (
+    SELECT c.oid
+    FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname <> 'pg_catalog' AND n.nspname <> 'information_schema'
+    AND c.relkind IN ('r', 'v', 'm', 'f', 'p'))
+SELECT md5(concat_ws('|',
+    (SELECT string_agg(
+        concat_ws(':', c.oid, n.nspname, c.relname, c.relkind, md5(d.description)), ','
+        ORDER BY c.oid)
+     FROM pg_class c
+     JOIN pg_namespace n ON n.oid = c.relnamespace
+     LEFT JOIN pg_description d ON d.objoid = c.oid AND d.objsubid = 0
+     WHERE c.oid IN (SELECT oid FROM rel)),
+    (SELECT string_agg(
+        concat_ws(':', a.attrelid, a.attnum, a.attname, a.atttypid, a.attnotnull,
+                  a.attndims, a.attislocal, md5(d.description)), ','
+        ORDER BY a.attrelid, a.attnum)
+     FROM pg_attribute a
+     LEFT JOIN pg_description d ON d.objoid = a.attrelid AND d.objsubid = a.attnum
+     WHERE a.attrelid IN (SELECT oid FROM rel) AND a.attnum > 0 AND NOT a.attisdropped),
+    (SELECT string_agg(
+        concat_ws(':', co.oid, co.conname, co.contype, co.conrelid, co.conkey,
+                  co.confrelid, co.confkey, co.confupdtype, co.confdeltype), ','
+        ORDER BY co.oid)
+     FROM pg_constraint co
+     WHERE co.conrelid IN (SELECT oid FROM rel) AND co.contype IN ('p', 'u', 'f')),
+    (SELECT string_agg(concat_ws(':', i.inhrelid, i.inhparent, i.inhseqno), ','
+        ORDER BY i.inhrelid, i.inhseqno)
+     FROM pg_inherits i)
+)) AS fingerprint
+"""
+
+# the same hash without the oids: the databases created with the same DDL have the same
+# structure fingerprint (see the share_metadata option of the Model).
+STRUCTURE_FINGERPRINT_QUERY = """
+WITH rel AS (
+    SELECT c.oid, n.nspname, c.relname, c.relkind
+    FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname <> 'pg_catalog' AND n.nspname <> 'information_schema'
+    AND c.relkind IN ('r', 'v', 'm', 'f', 'p'))
+SELECT md5(concat_ws('|',
+    (SELECT string_agg(
+        concat_ws(':', rel.nspname, rel.relname, rel.relkind, md5(d.description)), ','
+        ORDER BY rel.nspname, rel.relname)
+     FROM rel
+     LEFT JOIN pg_description d ON d.objoid = rel.oid AND d.objsubid = 0),
+    (SELECT string_agg(
+        concat_ws(':', rel.nspname, rel.relname, a.attnum, a.attname, t.typname,
+                  a.attnotnull, a.attndims, a.attislocal, md5(d.description)), ','
+        ORDER BY rel.nspname, rel.relname, a.attnum)
+     FROM rel
+     JOIN pg_attribute a ON a.attrelid = rel.oid
+     JOIN pg_type t ON t.oid = a.atttypid
+     LEFT JOIN pg_description d ON d.objoid = a.attrelid AND d.objsubid = a.attnum
+     WHERE a.attnum > 0 AND NOT a.attisdropped),
+    (SELECT string_agg(
+        concat_ws(':', rel.nspname, rel.relname, co.conname, co.contype, co.conkey,
+                  fn.nspname, fc.relname, co.confkey, co.confupdtype, co.confdeltype), ','
+        ORDER BY rel.nspname, rel.relname, co.conname)
+     FROM rel
+     JOIN pg_constraint co ON co.conrelid = rel.oid
+     LEFT JOIN pg_class fc ON fc.oid = co.confrelid
+     LEFT JOIN pg_namespace fn ON fn.oid = fc.relnamespace
+     WHERE co.contype IN ('p', 'u', 'f')),
+    (SELECT string_agg(
+        concat_ws(':', rel.nspname, rel.relname, pn.nspname, pc.relname, i.inhseqno), ','
+        ORDER BY rel.nspname, rel.relname, i.inhseqno)
+     FROM rel
+     JOIN pg_inherits i ON i.inhrelid = rel.oid
+     JOIN pg_class pc ON pc.oid = i.inhparent
+     JOIN pg_namespace pn ON pn.oid = pc.relnamespace)
+)) AS fingerprint
+"""
+
+def fingerprint(connection):
+    """Returns the fingerprint of the schema of the database: a hash of the relations,
+    columns, constraints, inheritance and comments found in the catalog.
+    """
+    with connection.cursor() as cur:
+        cur.execute(FINGERPRINT_QUERY)
+        return cur.fetchone()['fingerprint']
+
+def structure_fingerprint(connection):
+    """Returns the fingerprint of the structure of the database: the same hash as
+    `fingerprint` computed with the names of the objects instead of their oids.
+    """
+    with connection.cursor() as cur:
+        cur.execute(STRUCTURE_FINGERPRINT_QUERY)
+        return cur.fetchone()['fingerprint']
+
+def cache_key(name, tenants=None):
+    """Returns the key of the metadata of **name** (a database name or a structure
+    fingerprint) loaded with the **tenants** filter (see PgMeta): **name** if there
+    is no filter, **name** suffixed with a hash of the filter otherwise.
+    """
+    if not tenants:
+        return name
+    digest = hashlib.md5('\n'.join(tenants).encode('utf-8')).hexdigest()[:12]
+    return f'{name}.tenants-{digest}'
+
+class MetadataCache:
+    """The metadata cache files stored in **directory**.
+
+    Parameters:
+        directory (str): the directory of the cache files. It is created if needed.
+    """
+    def __init__(self, directory):
+        self.directory = os.path.expanduser(directory)
+
+    def path(self, dbname):
+        """Returns the path of the cache file of the database **dbname** (a `cache_key`
+        with tenants).
+        """
+        return os.path.join(self.directory, f'{dbname}.metadata')
+
+    def info(self, dbname):
+        """Returns the content of the cache file of **dbname** or None if there is none
+        (or if it can't be read).
+
+        Returns:
+            dict: version (of half_orm), format (of the metadata), fingerprint, created
+            (timestamp) and metadata.
+        """
+        try:
+            with open(self.path(dbname), 'rb') as cache_file:
+                return pickle.load(cache_file)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            return None
+
+    def load(self, dbname, fingerprint_):
+        """Returns the metadata stored for **dbname** if it has been built for the
+        **fingerprint_** by the same version of half_orm (and FORMAT). Returns None otherwise.
+        """
+        entry = self.info(dbname)
+        if (not isinstance(entry, dict) or entry.get('version') != half_orm.__version__ or
+                entry.get('format') != FORMAT or entry.get('fingerprint') != fingerprint_):
+            return None
+        return entry['metadata']
+
+    def store(self, dbname, fingerprint_, metadata):
+        """Writes the cache file of **dbname**. The file is replaced atomically.
+        The errors are ignored: the cache is only an optimization.
+        """
+        entry = {
+            'version': half_orm.__version__,
+            'format': FORMAT,
+            'fingerprint': fingerprint_,
+            'created': time.time(),
+            'metadata': metadata}
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=f'.{dbname}.')
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                pickle.dump(entry, tmp_file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.path(dbname))
+        except (OSError, pickle.PicklingError):
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def remove(self, dbname):
+        "Removes the cache file of **dbname** if any."
+        try:
+            os.remove(self.path(dbname))
+        except FileNotFoundError:
+            pass
+
+def compile_module(dbname, fingerprint_, metadata, relations=None, tenants=None):
+    """Returns the source of the python module holding the metadata of the **relations**
+    (sfqrn) of **dbname**, all of them if **relations** is None. The metadata must have
+    been loaded for the **fingerprint_** of the database and the **tenants** filter.
+    """
+    byname = metadata['byname']
+    complete = relations is None
+    selected = set(relations or ())
+    relations = [sfqrn for sfqrn in byname if complete or sfqrn in selected]
+    lines = [
+        '# -*- coding: utf-8 -*-',
+        f'"""The metadata of {len(relations)} relations of the database {dbname}.',
+        '',
+        'Generated by half_orm metadata compile. Do not edit: compile it again when the',
+        'schema of the database changes (the module is ignored if the fingerprint of the',
+        'database is not the one of the compilation).',
+        '"""',
+        '',
+        'from half_orm.pg_meta import compiled_relation',
+        '',
+        f'VERSION = {half_orm.__version__!r}',
+        f'FORMAT = {FORMAT!r}',
+        f'DBNAME = {dbname!r}',
+        f'FINGERPRINT = {fingerprint_!r}',
+        f'TENANTS = {_tenants(tenants)!r}',
+        f'COMPLETE = {complete!r}',
+        '',
+        '# the values of the FieldMeta of the columns are in the order of FieldMeta.__slots__.',
+        'RELATIONS = [']
+    for sfqrn in relations:
+        relation = byname[sfqrn]
+        lines.append('    compiled_relation(')
+        lines.append(
+            f'        {relation.sfqrn!r}, {relation.tableid!r}, {relation.tablekind!r}, '
+            f'{relation.description!r},')
+        lines.append('        [')
+        lines.extend(f'            {field.__getstate__()!r},' for field in relation.fields.values())
+        lines.append('        ],')
+        lines.append(f'        {relation.fkeys!r},')
+        lines.append(f'        {relation.inherits!r}),')
+    lines.append(']')
+    return '\n'.join(lines) + '\n'
+
+def _tenants(tenants):
+    "The tenants filter as stored in a compiled module."
+    return tuple(tenants) if tenants else None
+
+def compiled_metadata(module, dbname, fingerprint_, tenants=None):
+    """Returns the metadata of the compiled **module** (see compile_module) if it has
+    been compiled for **dbname**, its **fingerprint_** and the **tenants** filter by the
+    same version of half_orm (and FORMAT). Returns None otherwise.
+
+    The metadata is lazy (see `PgMeta <#half_orm.pg_meta.PgMeta>`_) if the module
+    doesn't hold all the relations of the database.
+    """
+    if (getattr(module, 'VERSION', None) != half_orm.__version__ or
+            getattr(module, 'FORMAT', None) != FORMAT or
+            getattr(module, 'DBNAME', None) != dbname or
+            getattr(module, 'FINGERPRINT', None) != fingerprint_ or
+            getattr(module, 'TENANTS', None) != _tenants(tenants)):
+        return None
+    metadata = {'relations_list': [], 'byname': {}, 'byid': {}}
+    for relation in module.RELATIONS:
+        metadata['byname'][relation.sfqrn] = metadata['byid'][relation.tableid] = relation
+        metadata['relations_list'].append((relation.tablekind, relation.sfqrn))
+    metadata['relations_list'].sort()
+    if not module.COMPLETE:
+        metadata['lazy'] = True
+    return metadata
@@ -20,28 +20,42 @@ Note:
     ``my_table`` in this schema you'll have to use ``pubic.my_table``.
 """
 
+import fnmatch
+import gc
 import importlib
 import os
 import sys
+import threading
+import time
 import typing
+import uuid
+import weakref
 from configparser import ConfigParser
+from contextlib import contextmanager
 from os import environ
 
-import psycopg2
-from psycopg2.extras import RealDictCursor
-
 from half_orm import model_errors
 from half_orm import pg_meta
+from half_orm.meta_cache import MetadataCache
 from half_orm import utils
-from half_orm.relation_factory import factory, register_class
+from half_orm.driver import get_driver
+from half_orm.pool import ConnectionPool
+from half_orm.replicas import ReplicaSet
+from half_orm.relation_factory import factory, refresh, register_class, tenant_factory
+from half_orm.sql_cache import SQL_CACHE
+from half_orm.transaction import Transaction
 
 CONF_DIR = os.path.abspath(environ.get('HALFORM_CONF_DIR', '/etc/half_orm'))
 
-
-psycopg2.extras.register_uuid()
-
 register = register_class
 
+# (transaction level, connection) of the current thread/task for each model.
+_TX_STATE = utils.ModelVar('half_orm_tx_state', default=(0, None))
+# time.monotonic() of the last write of the current thread/task for each model.
+_LAST_WRITE = utils.ModelVar('half_orm_last_write')
+# the schema of the tenant of the current thread/task for each model.
+_TENANT = utils.ModelVar('half_orm_tenant')
+
 class Model:
     """
     Parameters:
@@ -49,6 +63,10 @@ class Model:
             to the database.
         scope (Optional[str]): used to agregate several modules in a package.
             See `hop <https://github.com/collorg/halfORM/blob/main/doc/hop.md>`_.
+        lazy (bool): if True, the connection is opened by the first query and the
+            metadata of a relation is loaded by the first ``get_relation_class`` on it
+            (instead of the metadata of the whole database at startup). Use it for the
+            short-lived scripts that only use a few relations.
 
     Note:
         The **config_file** is searched in the `HALFORM_CONF_DIR` variable if specified,
@@ -60,23 +78,88 @@ class Model:
             | password = <postgres password>
             | host = <host name | localhost>
             | port = <port | 5432>
+            | driver = <psycopg2 | psycopg3>
+            | target_session_attrs = <any | read-write | primary...>
+            | metadata_cache = <directory of the metadata cache files>
+            | compiled_metadata = <module of the compiled metadata>
+            | share_metadata = <0 | 1>
 
         *name* is the only mandatory entry if you are using an
         `ident login with a local account <https://www.postgresql.org/docs/current/auth-ident.html>`_.
+        The *driver* defaults to psycopg2 (see the `driver <#module-half_orm.driver>`_ module).
+        For a failover on several hosts, list them in *host* (and *port*) separated by
+        commas, and set *target_session_attrs* to ``read-write``: the connection is made to
+        the first host that accepts writes (see
+        `libpq <https://www.postgresql.org/docs/current/libpq-connect.html#LIBPQ-MULTIPLE-HOSTS>`_).
+        With *metadata_cache*, the metadata of the database is stored on disk and reused
+        by the next processes until the schema changes (see the
+        `meta_cache <#module-half_orm.meta_cache>`_ module).
+        With *compiled_metadata*, the metadata is read from a python module generated by
+        ``half_orm metadata compile`` as long as the schema hasn't changed.
+        With *share_metadata* = 1, the models of the databases with the same structure
+        (one database per tenant) share the metadata and the generated classes: the
+        metadata is loaded by the first model, the next ones only compute the structure
+        fingerprint of their database. The class of a relation generated for a database
+        is a subclass of the shared class only binding the model.
+
+        The connections are managed by a `ConnectionPool <#half_orm.pool.ConnectionPool>`_.
+        By default the pool holds a single connection. An optional ``[pool]`` section
+        configures it:
+
+            | [pool]
+            | minconn = <number of connections kept open | 1>
+            | maxconn = <maximum number of connections | 1>
+            | timeout = <seconds to wait for a free connection | no limit>
+            | check_idle = <idle seconds before a connection is probed on checkout | 30>
+
+        A connection is checked out for each query, or for the whole duration of a
+        `Transaction <#half_orm.transaction.Transaction>`_. The transaction state is
+        local to the current thread or asyncio task (see `contextvars`), so a Model
+        object can be shared by several threads.
+
+        The read queries (``ho_select``, ``ho_get``, ``ho_count``, ``ho_is_empty``,
+        ``execute_function``...) run outside of a transaction can be sent to read
+        replicas declared in an optional ``[replicas]`` section (see the
+        `replicas <#module-half_orm.replicas>`_ module). The transactions and the
+        other queries always go to the primary.
+
+        With one schema per tenant, an optional ``[tenants]`` section declares the
+        schema used as a template by all the tenants:
+
+            | [tenants]
+            | template = <template schema>
+            | schemas = <pattern of the schemas of the tenants with * and ?, e.g. tenant_*>
+
+        The schemas of the tenants are not loaded: the classes and the metadata of the
+        template schema are used for all of them. The schema of the tenant is picked by
+        `tenant <#half_orm.model.Model.tenant>`_ for the current thread/task, or by
+        the name of the class (``model.get_relation_class('tenant_42.orders')``): it
+        replaces the template schema in the queries.
     """
     __deja_vu = {}
+    __lock = threading.RLock()
     _classes_ = {}
-    def __init__(self, config_file: None, scope: str=None):
+    # {dbname: {(scope, qtn): class}} the classes resolved by _import_class.
+    __imported = {}
+    def __init__(self, config_file: None, scope: str=None, lazy: bool=False):
         """Model constructor
 
         Use @config_file in your scripts. The @dbname parameter is
         reserved to the __factory metaclass.
         """
         self.__dbinfo = {}
+        self.__pool_config = {}
+        self.__replicas_config = None
+        self.__driver = None
         self.__production_mode = True
+        self.__lazy = lazy
         self.__load_config(config_file)
         self._scope = scope and scope.split('.')[0]
-        self.__conn = None
+        self.__pool = None
+        self.__replicas = None
+        # {connection: {statement name: valid}} of the prepared statements.
+        self.__prepared = weakref.WeakKeyDictionary()
+        self.__ddl_listener = None
         self.__connect()
 
     def __load_config(self, config_file):
@@ -104,19 +187,90 @@ class Model:
                 raise RuntimeError(
                     f"Can't reconnect to another database: {dbname} != {self.__dbname}")
             self.__dbinfo['dbname'] = dbname
+            pool = config['pool'] if config.has_section('pool') else {}
+            replicas = config['replicas'] if config.has_section('replicas') else None
+            tenants = config['tenants'] if config.has_section('tenants') else None
 
         else:
             dbname = config_file
             self.__dbinfo['dbname'] = dbname
             # WARNING: use peer authentication only in development environment
             database = {'user': None, 'password': None, 'host': None, 'port': None, 'devel': True}
+            pool = {}
+            replicas = None
+            tenants = None
 
         self.__dbinfo['user'] = database.get('user')
         self.__dbinfo['password'] = database.get('password')
         self.__dbinfo['host'] = database.get('host')
         self.__dbinfo['port'] = database.get('port')
         self.__dbinfo['connect_timeout'] = database.get('timeout', 3)
+        self.__dbinfo['target_session_attrs'] = database.get('target_session_attrs')
         self.__production_mode = database.get('devel', False)
+        self.__metadata_cache = (
+            database.get('metadata_cache') and MetadataCache(database.get('metadata_cache')))
+        self.__share_metadata = (
+            str(database.get('share_metadata', '')).lower() in ('1', 'yes', 'true', 'on'))
+        self.__compiled_metadata = None
+        if database.get('compiled_metadata'):
+            try:
+                self.__compiled_metadata = importlib.import_module(database['compiled_metadata'])
+            except ImportError as exc:
+                raise model_errors.MalformedConfigFile(
+                    self.__config_file, 'Unknown module', database['compiled_metadata']) from exc
+        try:
+            self.__driver = get_driver(database.get('driver'))
+        except KeyError as exc:
+            raise model_errors.MalformedConfigFile(
+                self.__config_file, 'Unknown driver', database.get('driver')) from exc
+        try:
+            self.__pool_config = {
+                'minconn': int(pool.get('minconn', 1)),
+                'maxconn': int(pool.get('maxconn', pool.get('minconn', 1))),
+                'timeout': pool.get('timeout') and float(pool.get('timeout')),
+                'check_idle': float(pool.get('check_idle', 30))}
+        except ValueError as exc:
+            raise model_errors.MalformedConfigFile(
+                self.__config_file, 'Invalid value in section', 'pool') from exc
+        self.__replicas_config = replicas and self.__load_replicas_config(replicas)
+        self.__tenants = None
+        if tenants:
+            try:
+                self.__tenants = (tenants['template'], tenants['schemas'])
+            except KeyError as exc:
+                raise model_errors.MalformedConfigFile(
+                    self.__config_file, 'Missing mandatory parameter', exc.args[0]) from exc
+
+    def __load_replicas_config(self, replicas):
+        """Returns the parameters of the ReplicaSet from the [replicas] section.
+
+        Raises:
+            MalformedConfigFile: if the *hosts* are missing or a value is invalid.
+        """
+        def floats(value):
+            return [float(elt) for elt in value.split(',')] if value else None
+        try:
+            hosts = [
+                (host.strip().partition(':')[0], host.strip().partition(':')[2] or self.__dbinfo['port'])
+                for host in replicas['hosts'].split(',')]
+        except KeyError as exc:
+            raise model_errors.MalformedConfigFile(
+                self.__config_file, 'Missing mandatory parameter', 'hosts') from exc
+        try:
+            config = {
+                'hosts': hosts,
+                'weights': floats(replicas.get('weights')),
+                'max_lag': replicas.get('max_lag') and float(replicas.get('max_lag')),
+                'check_interval': float(replicas.get('check_interval', 5)),
+                'retry_after': float(replicas.get('retry_after', 30)),
+                'read_your_writes': float(replicas.get('read_your_writes', 1))}
+        except ValueError as exc:
+            raise model_errors.MalformedConfigFile(
+                self.__config_file, 'Invalid value in section', 'replicas') from exc
+        if config['weights'] and len(config['weights']) != len(hosts):
+            raise model_errors.MalformedConfigFile(
+                self.__config_file, 'One weight per host expected in section', 'replicas')
+        return config
 
     def __connect(self, config_file: str=None, reload: bool=False):
         """Setup a new connection to the database.
@@ -129,20 +283,102 @@ class Model:
             reload (bool): If set to True, reloads the metadata from the database. Usefull if
                 the model has changed.
         """
-        self.disconnect()
+        self.__close()
 
         if config_file:
             self.__load_config(config_file)
-        self.__conn = psycopg2.connect(**self.__dbinfo, cursor_factory=RealDictCursor)
-        self.__conn.autocommit = True
-        self.__pg_meta = pg_meta.PgMeta(self.__conn, reload)
-        if reload:
-            self._classes_[self._dbname] = {}
-        if self.__dbname not in self.__class__.__deja_vu:
-            self.__deja_vu[self.__dbname] = self
+        self.__pool = ConnectionPool(
+            self.__dbinfo, **self.__pool_config, driver=self.__driver, lazy=self.__lazy)
+        if self.__lazy:
+            self.__pg_meta = pg_meta.PgMeta(
+                reload=reload, checkout=self.__meta_connection, dbname=self.__dbname,
+                **self._pg_meta_options)
+        else:
+            with self._checkout() as conn:
+                self.__pg_meta = pg_meta.PgMeta(conn, reload, **self._pg_meta_options)
+        if self.__replicas_config:
+            config = dict(self.__replicas_config)
+            config.pop('read_your_writes')
+            self.__replicas = ReplicaSet(
+                self.__dbinfo, **config, pool_config=self.__pool_config, driver=self.__driver)
+        with Model.__lock:
+            if reload:
+                self._classes_[self._dbname] = {}
+                self.__imported.pop(self.__dbname, None)
+            if self.__dbname not in self.__class__.__deja_vu:
+                self.__deja_vu[self.__dbname] = self
 
     reconnect = __connect
 
+    @contextmanager
+    def __meta_connection(self):
+        """Yields a connection to the primary to load the metadata in lazy mode.
+        Inside a transaction, the connection of the transaction is used.
+        """
+        conn = self._connection
+        if conn is not None:
+            yield conn
+            return
+        conn = self.__pool.getconn()
+        try:
+            yield conn
+        finally:
+            self.__pool.putconn(conn)
+
+    @property
+    def _pg_meta_options(self):
+        """The options of PgMeta from the config file. The pattern of the schemas of the
+        tenants is translated in a LIKE pattern.
+        """
+        tenants = None
+        if self.__tenants is not None:
+            template, pattern = self.__tenants
+            like = pattern.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            tenants = (template, like.replace('*', '%').replace('?', '_'))
+        return {
+            'cache': self.__metadata_cache, 'share': self.__share_metadata, 'tenants': tenants,
+            'compiled': self.__compiled_metadata}
+
+    def __is_tenant(self, schema):
+        "Returns True if **schema** is the schema of a tenant."
+        return (self.__tenants is not None and schema != self.__tenants[0] and
+                fnmatch.fnmatchcase(schema, self.__tenants[1]))
+
+    @contextmanager
+    def tenant(self, schema: str):
+        """Sets the schema of the tenant for the current thread/task (see the ``[tenants]``
+        section of the config file). Inside the context, the relations of the template
+        schema are read and written in the schema **schema**.
+
+        Raises:
+            UnknownTenant: if **schema** doesn't match the schemas of the tenants.
+
+        Example:
+            >>> Orders = model.get_relation_class('tenant_template.orders')
+            >>> with model.tenant('tenant_42'):
+            ...     Orders().ho_count() # select count(*) from "tenant_42"."orders"
+        """
+        if not self.__is_tenant(schema) or '"' in schema:
+            raise model_errors.UnknownTenant(schema)
+        model = self._relation_model
+        token = _TENANT.set(model, schema)
+        try:
+            yield
+        finally:
+            _TENANT.reset(model, token)
+
+    def _tenant(self):
+        "Returns the schema of the tenant of the current thread/task or None."
+        return _TENANT.get(self)
+
+    def _tenant_schema(self, schemaname):
+        """Returns the schema of the current tenant if **schemaname** is the template schema,
+        None otherwise.
+        """
+        if self.__tenants is None or schemaname != self.__tenants[0]:
+            return None
+        return _TENANT.get(self)
+
     def get_relation_class(self, relation_name: str, fields_aliases: typing.Dict=None): # -> Relation
         """This method is a factory that generates a class that inherits the `Relation <#half_orm.relation.Relation>`_ class.
 
@@ -181,7 +417,19 @@ class Model:
             schema, table = relation_name.replace('"', '').rsplit('.', 1)
         except ValueError as err:
             raise model_errors.MissingSchemaInName(relation_name) from err
-        return factory({'fqrn': (self.__dbname, schema, table), 'model': self.__deja_vu[self.__dbname], 'fields_aliases':fields_aliases})
+        if self.__is_tenant(schema) and '"' not in schema:
+            return tenant_factory({
+                'fqrn': (self.__dbname, self.__tenants[0], table), 'model': self._relation_model,
+                'fields_aliases': fields_aliases}, schema)
+        return factory({'fqrn': (self.__dbname, schema, table), 'model': self._relation_model, 'fields_aliases':fields_aliases})
+
+    @property
+    def _relation_model(self):
+        """The model the classes returned by get_relation_class are bound to.
+
+        The first Model loaded for a database is shared by all the relations of this database.
+        """
+        return self.__deja_vu[self.__dbname]
 
 
     @staticmethod
@@ -197,6 +445,26 @@ class Model:
     def __dbname(self):
         return self.__dbinfo['dbname']
 
+    @property
+    def _dbinfo(self):
+        "Returns a copy of the connection parameters."
+        return dict(self.__dbinfo)
+
+    @property
+    def _driver(self):
+        "Returns the driver used to connect to the database."
+        return self.__driver
+
+    @property
+    def _metadata_cache(self):
+        "Returns the MetadataCache configured or None."
+        return self.__metadata_cache
+
+    @property
+    def _pool_config(self):
+        "Returns a copy of the pool configuration."
+        return dict(self.__pool_config)
+
     def ping(self):
         """Checks if the connection is still established.
         Attempts a new connection otherwise.
@@ -207,21 +475,167 @@ class Model:
         try:
             self.execute_query("select 1")
             return True
-        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        except self.__driver.connection_errors:
             try:
                 self.__connect()
                 self.execute_query("select 1")
-            except (psycopg2.OperationalError, psycopg2.InterfaceError) as exc: #pragma: no cover
+            except self.__driver.connection_errors as exc: #pragma: no cover
                 # log reconnection attempt failure
                 sys.stderr.write(f'{exc.exception}\n')
                 sys.stderr.flush()
             return False
 
     def disconnect(self):
-        """Closes the connection to the database.
+        """Closes all the connections to the database.
+        """
+        self.stop_ddl_listener()
+        self.__close()
+
+    def __close(self):
+        "Closes the connection pools. The DDL listener is kept by reconnect."
+        if self.__pool is not None:
+            self.__pool.close()
+        if self.__replicas is not None:
+            self.__replicas.close()
+            self.__replicas = None
+
+    def pool_stats(self):
+        """Returns the metrics of the connection pool.
+
+        See `ConnectionPool.stats <#half_orm.pool.ConnectionPool.stats>`_.
+
+        Example:
+            >>> model.pool_stats()['in_use']
+            0
+        """
+        return self.__pool.stats()
+
+    def replicas_stats(self):
+        """Returns the state of the read replicas (see
+        `ReplicaSet.stats <#half_orm.replicas.ReplicaSet.stats>`_).
+
+        Returns:
+            list[dict]: an empty list if there is no replica.
+        """
+        if self.__replicas is None:
+            return []
+        return self.__replicas.stats()
+
+    def __read_from_replica(self):
+        """Returns True if a read query of the current thread/task can be sent to
+        a replica: not in the read-your-writes window of the last write.
+        """
+        if self.__replicas is None:
+            return False
+        last_write = _LAST_WRITE.get(self)
+        return (last_write is None or
+                time.monotonic() - last_write >= self.__replicas_config['read_your_writes'])
+
+    @contextmanager
+    def _checkout(self, read=False, dedicated=False):
+        """Context manager yielding a connection.
+
+        Inside a transaction, the connection bound to the transaction is returned.
+        Otherwise a connection is checked out from the pool and given back on exit.
+
+        Parameters:
+            read (bool): the query only reads the database. The connection is checked
+                out from a replica if any is available. Otherwise, the query is
+                considered as a write (see the read_your_writes parameter of the
+                `replicas <#module-half_orm.replicas>`_ module).
+            dedicated (bool): outside of a transaction, the connection is opened
+                outside of the pool and closed on exit. Use it to hold a connection
+                while other queries are run (the pool may have a single connection).
+        """
+        conn = self._connection
+        if conn is not None:
+            yield conn
+            return
+        pool = self.__pool
+        if read and self.__read_from_replica():
+            conn = self.__replicas.connect() if dedicated else self.__replicas.getconn()
+            if conn is not None:
+                pool = self.__replicas
+        elif not read and self.__replicas is not None:
+            _LAST_WRITE.set(self, time.monotonic())
+        if dedicated:
+            if conn is None:
+                conn = pool.connect()
+            try:
+                yield conn
+            finally:
+                if not conn.closed:
+                    conn.close()
+            return
+        if conn is None:
+            conn = pool.getconn()
+        discard = False
+        try:
+            yield conn
+        except self.__driver.connection_errors:
+            discard = True
+            raise
+        finally:
+            pool.putconn(conn, discard)
+
+    def _tx_enter(self):
+        """Enters a (nested) transaction in the current thread/task.
+
+        At level 0, a connection is checked out from the pool and bound to the
+        transaction. Every query of the thread/task goes through it until the
+        outermost transaction exits.
+
+        Returns:
+            Token: the token to pass to _tx_exit.
         """
-        if self.__conn is not None and not self.__conn.closed:
-            self.__conn.close()
+        level, conn = _TX_STATE.get(self)
+        if level == 0:
+            conn = self.__pool.getconn()
+            conn.autocommit = False
+        return _TX_STATE.set(self, (level + 1, conn))
+
+    def _tx_exit(self, token):
+        """Exits a transaction entered with _tx_enter.
+
+        The outermost transaction commits (or rolls back on failure) and gives the
+        connection back to the pool.
+        """
+        level, conn = _TX_STATE.get(self)
+        _TX_STATE.reset(self, token)
+        if level != 1:
+            return
+        try:
+            conn.commit()
+        except Exception:
+            conn.rollback()
+        finally:
+            if self.__replicas is not None:
+                _LAST_WRITE.set(self, time.monotonic())
+            if not self.__pool.closed:
+                self.__pool.putconn(conn)
+
+    @property
+    def _tx_level(self):
+        "Returns the transaction level of the current thread/task."
+        return _TX_STATE.get(self)[0]
+
+    @contextmanager
+    def pipeline(self):
+        """Context manager running the queries in a transaction in pipeline mode.
+
+        With the psycopg3 driver, the queries are sent to the server without waiting
+        for the results of the previous ones. Fetching a result (``ho_select``,
+        ``ho_insert``, ``fetchall``...) waits for all the pending queries.
+        With psycopg2, the queries are simply run in a transaction.
+
+        Example:
+            >>> with model.pipeline():
+            ...     for elt in data:
+            ...         model.execute_query('insert into my_table values (%s, %s)', elt)
+        """
+        with Transaction(self):
+            with self.__driver.pipeline(self._connection):
+                yield
 
     def _reload(self, config_file=None):
         """Reload metadata
@@ -230,6 +644,93 @@ class Model:
         """
         self.__connect(config_file, True)
 
+    def _reload_relations(self, oids=None):
+        """Reloads the metadata of the relations **oids** and of the relations linked
+        to them (all the metadata if **oids** is None). Then regenerates the classes of
+        these relations and empties the SQL cache. The connections are kept.
+
+        Called by the `DdlListener <#half_orm.ddl_listener.DdlListener>`_.
+
+        Returns:
+            list: the fqrn of the classes regenerated or removed.
+        """
+        with self.__meta_connection() as conn:
+            if oids is None:
+                if self.__lazy:
+                    self.__pg_meta = pg_meta.PgMeta(
+                        reload=True, checkout=self.__meta_connection, dbname=self.__dbname,
+                        **self._pg_meta_options)
+                else:
+                    self.__pg_meta = pg_meta.PgMeta(conn, True, **self._pg_meta_options)
+                fqrns = None
+            else:
+                fqrns = self.__pg_meta.reload_relations(conn, oids)
+            if fqrns is None:
+                fqrns = set(self._classes_.get(self.__dbname, {}))
+        SQL_CACHE.clear()
+        try:
+            return refresh(self._relation_model, fqrns)
+        finally:
+            self.__imported.pop(self.__dbname, None)
+
+    def listen_ddl(self, delay: float=0.5):
+        """Starts a `DdlListener <#half_orm.ddl_listener.DdlListener>`_: a thread
+        reloading the metadata of the relations changed by a DDL in the database.
+        The event triggers must be installed (see the
+        `ddl_listener <#module-half_orm.ddl_listener>`_ module).
+
+        Parameters:
+            delay (float): the seconds spent collecting the notifications before a reload.
+
+        Returns:
+            DdlListener: the listener (already started).
+        """
+        from half_orm.ddl_listener import DdlListener
+
+        with Model.__lock:
+            if self.__ddl_listener is None or not self.__ddl_listener.is_alive():
+                self.__ddl_listener = DdlListener(self, delay=delay)
+                self.__ddl_listener.start()
+            return self.__ddl_listener
+
+    def stop_ddl_listener(self):
+        "Stops the DdlListener started by listen_ddl if any."
+        listener, self.__ddl_listener = self.__ddl_listener, None
+        if listener is not None:
+            listener.stop()
+
+    def prefork(self, classes: bool=True):
+        """Prepares the model to be shared by the workers of a pre-fork server (gunicorn
+        with ``preload_app``, uwsgi without ``lazy-apps``...). Call it in the master
+        process, once the models are created.
+
+        All the metadata of the database is loaded (even in lazy mode) and, if **classes**
+        is True, the classes of all the relations are generated. Then the idle
+        connections are closed and the objects of the process are moved to the permanent
+        generation of the garbage collector (`gc.freeze`): the collections run by the
+        workers don't write to the memory pages holding them, so they stay shared with
+        the master (copy-on-write) instead of being copied in each worker.
+
+        The workers don't query the catalog again: a Model created in a worker for the
+        same database uses the metadata of the master. The connections are opened by
+        each worker on demand.
+
+        Example:
+            >>> # app.py, loaded by the master with gunicorn --preload
+            >>> model = Model('my_database')
+            >>> model.prefork()
+        """
+        self.__pg_meta.metadata(self.__dbname)
+        if classes:
+            for _, fqrn in self._relations():
+                factory({'fqrn': fqrn, 'model': self._relation_model})
+        self.stop_ddl_listener()
+        self.__pool.clear()
+        if self.__replicas is not None:
+            self.__replicas.clear()
+        gc.collect()
+        gc.freeze()
+
     @property
     def _dbname(self):
         """
@@ -240,9 +741,10 @@ class Model:
     @property
     def _connection(self):
         """\
-        Property. Returns the psycopg2 connection attached to the Model object.
+        Property. Returns the connection bound to the transaction of the
+        current thread/task or None outside of a transaction.
         """
-        return self.__conn
+        return _TX_STATE.get(self)[1]
 
     def _fields_metadata(self, sfqrn):
         "Proxy to PgMeta.fields_meta"
@@ -252,6 +754,10 @@ class Model:
         "Proxy to PgMeta.fkeys_meta"
         return self.__pg_meta.fkeys_meta(self.__dbname, sfqrn)
 
+    def _shared_metadata(self):
+        "Proxy to PgMeta.shared"
+        return self.__pg_meta.shared(self.__dbname)
+
     def _relation_metadata(self, fqrn):
         "Proxy to PgMeta.relation_meta"
         return self.__pg_meta.relation_meta(self.__dbname, fqrn)
@@ -268,21 +774,39 @@ class Model:
         """Executes a raw SQL query.
 
         Warning:
-            This method calls the psycopg2
+            This method calls the
             `cursor.execute <https://www.psycopg.org/docs/cursor.html?highlight=execute#cursor.execute>`_
-            function.
+            function of the driver.
             Please read the psycopg2 documentation on
             `passing parameters to SQL queries <https://www.psycopg.org/docs/usage.html#query-parameters>`_.
+
+        Note:
+            The query is always sent to the primary. See `_execute_read` for the queries
+            that can be sent to a replica.
+        """
+        return self.__execute(query, values, mogrify)
+
+    def _execute_read(self, query, values=None, mogrify=False):
+        """Same as execute_query for a query that doesn't write in the database.
+        Outside of a transaction, it is sent to a replica if any is available.
         """
-        cursor = self.__conn.cursor(cursor_factory=RealDictCursor)
+        return self.__execute(query, values, mogrify, read=True)
+
+    def __execute(self, query, values, mogrify, read=False):
         try:
-            if mogrify:
-                print(cursor.mogrify(query, values).decode('utf-8'))
-            cursor.execute(query, values)
-        except (psycopg2.OperationalError, psycopg2.InterfaceError):
-            self.ping()
-            cursor = self.__conn.cursor(cursor_factory=RealDictCursor)
-            cursor.execute(query, values)
+            with self._checkout(read) as conn:
+                cursor = conn.cursor()
+                if mogrify:
+                    print(self.__driver.mogrify(cursor, query, values))
+                cursor.execute(query, values)
+        except self.__driver.connection_errors:
+            if self._connection is not None or self.__pool.closed:
+                raise
+            # the broken connection has been discarded (and its replica put aside).
+            # Retry once.
+            with self._checkout(read) as conn:
+                cursor = conn.cursor()
+                cursor.execute(query, values)
         except Exception as exc:
             vals = ''
             if not self.__production_mode:
@@ -292,6 +816,104 @@ class Model:
             raise exc
         return cursor
 
+    def _mogrify(self, query, values):
+        "Returns the query with the values rendered by the driver."
+        with self._checkout(read=True) as conn:
+            return self.__driver.mogrify(conn.cursor(), query, values)
+
+    def _execute_batches(self, query, values=None, size=2000, mogrify=False, read=False):
+        """Generator executing the query with a server side (named) cursor.
+
+        Yields the rows by lists of at most **size** rows, fetched from the server
+        on demand. Inside a transaction, the cursor is declared on the connection of
+        the transaction. Otherwise the cursor is declared in a transaction on a
+        dedicated connection (to a replica if **read** is True), opened outside of
+        the pool, so that the queries run while iterating don't wait for it. The
+        connection is closed when the generator is exhausted or closed.
+        """
+        with self._checkout(read, dedicated=True) as conn:
+            if self._connection is None:
+                conn.autocommit = False
+            if mogrify:
+                print(self.__driver.mogrify(conn.cursor(), query, values))
+            try:
+                cursor = self.__driver.server_cursor(
+                    conn, f'half_orm_{uuid.uuid4().hex}', query, values, False)
+            except Exception as exc:
+                utils.error(f"Query execution failed:\nquery: {query}\n")
+                raise exc
+            try:
+                while True:
+                    rows = cursor.fetchmany(size)
+                    if not rows:
+                        break
+                    yield rows
+            finally:
+                if not conn.closed:
+                    cursor.close()
+
+    def _execute_prepared(self, name, query, values):
+        """Executes the prepared statement **name** with the **values** and returns
+        the rows.
+
+        The statement is prepared (``PREPARE name AS query``) the first time it is
+        executed on a connection: a new connection (after a reconnection or in
+        another process) prepares it again. If the statement is not valid anymore
+        (deallocated or its result type has changed after a DDL), it is prepared
+        again and the query is retried once. Inside a transaction, the error is
+        raised (the transaction is aborted) and the statement is prepared again
+        on the next execution. The statement must not write in the database: outside
+        of a transaction, it is executed on a replica if any is available.
+
+        Parameters:
+            query (str): the query with the positional parameters $1, $2...
+            values (tuple): the values of the parameters.
+        """
+        try:
+            with self._checkout(read=True) as conn:
+                return self.__run_prepared(conn, name, query, values)
+        except self.__driver.connection_errors:
+            if self._connection is not None or self.__pool.closed:
+                raise
+            # the broken connection has been discarded. Retry once.
+            with self._checkout(read=True) as conn:
+                return self.__run_prepared(conn, name, query, values)
+        except Exception as exc:
+            vals = ''
+            if not self.__production_mode:
+                vals = f"values: {values}\n"
+            utils.error(f"Query execution failed:\nquery: {query}\n{vals}")
+            raise exc
+
+    def __run_prepared(self, conn, name, query, values):
+        "Prepares the statement on the connection if needed and executes it."
+        with self.__lock:
+            prepared = self.__prepared.setdefault(conn, {})
+        cursor = self.__driver.client_cursor(conn)
+        params = f"({', '.join(['%s'] * len(values))})" if values else ''
+        def prepare():
+            if prepared.get(name) is False:
+                cursor.execute(f'deallocate {name}')
+            cursor.execute(f'prepare {name} as {query}')
+            prepared[name] = True
+        if not prepared.get(name):
+            prepare()
+        try:
+            cursor.execute(f'execute {name}{params}', values)
+        except self.__driver.Error as exc:
+            sqlstate = self.__driver.sqlstate(exc)
+            if sqlstate == '26000': # invalid_sql_statement_name
+                prepared.pop(name, None)
+            elif sqlstate == '0A000': # cached plan must not change result type
+                prepared[name] = False
+            else:
+                raise
+            if self._connection is not None:
+                raise
+            prepare()
+            cursor.execute(f'execute {name}{params}', values)
+        return cursor.fetchall()
+
     def execute_function(self, fct_name, *args, **kwargs) -> typing.List[tuple]:
         """`Executes a PostgreSQL function <https://www.postgresql.org/docs/current/sql-syntax-calling-funcs.html>`_.
 
@@ -307,16 +929,31 @@ class Model:
 
         Note:
             You can't mix args and kwargs with the execute_function method!
+
+            Outside of a transaction, the function is executed on a replica if any is
+            available. It is executed again on the primary if it attempts to write
+            in the database.
         """
         if bool(args) and bool(kwargs):
             raise RuntimeError("You can't mix args and kwargs with the execute_function method!")
-        cursor = self.__conn.cursor(cursor_factory=RealDictCursor)
         if kwargs:
             values = kwargs
         else:
             values = args
-        cursor.callproc(fct_name, values)
-        return cursor.fetchall()
+        try:
+            with self._checkout(read=True) as conn:
+                cursor = conn.cursor()
+                self.__driver.callproc(cursor, fct_name, values)
+                return cursor.fetchall()
+        except self.__driver.Error as exc:
+            # read_only_sql_transaction: the function writes. Run it on the primary.
+            if (self.__driver.sqlstate(exc) != '25006' or self._connection is not None or
+                    self.__replicas is None):
+                raise
+        with self._checkout() as conn:
+            cursor = conn.cursor()
+            self.__driver.callproc(cursor, fct_name, values)
+            return cursor.fetchall()
 
     def call_procedure(self, proc_name, *args, **kwargs):
         """`Executes a PostgreSQL procedure <https://www.postgresql.org/docs/current/sql-call.html>`_.
@@ -343,11 +980,12 @@ class Model:
             params = ', '.join(['%s' for _ in range(len(args))])
             values = args
         query = f'call {proc_name}({params})'
-        cursor = self.__conn.cursor(cursor_factory=RealDictCursor)
-        cursor.execute(query, values)
+        with self._checkout() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, values)
         try:
             return cursor.fetchall()
-        except psycopg2.ProgrammingError:
+        except self.__driver.ProgrammingError:
             return None
 
     def has_relation(self, qtn: str) -> bool:
@@ -369,9 +1007,18 @@ class Model:
 
         This method is used to import a class from a module. The module
         must reside in an accessible python package named `scope`.
+
+        The classes are cached, including the ones returned by get_relation_class
+        when the module is missing: the import is attempted once. The cache is
+        emptied when the metadata is reloaded.
         """
-        t_qtn = qtn.replace('"', '').rsplit('.', 1)
         self._scope = scope or self._scope
+        imported = self.__imported.setdefault(self.__dbname, {})
+        key = (self._scope, qtn)
+        rel_class = imported.get(key)
+        if rel_class is not None:
+            return rel_class
+        t_qtn = qtn.replace('"', '').rsplit('.', 1)
         module_path = ".".join(t_qtn)
         if self._scope:
             module_path = f'{self._scope}.{module_path}'
@@ -379,9 +1026,11 @@ class Model:
         try:
             module = __import__(
                 module_path, globals(), locals(), [_class_name], 0)
-            return module.__dict__[_class_name]
+            rel_class = module.__dict__[_class_name]
         except:
-            return self.get_relation_class(qtn)
+            rel_class = self.get_relation_class(qtn)
+        imported[key] = rel_class
+        return rel_class
 
     def _relations(self):
         """List all_ the relations in the database"""
@@ -29,3 +29,15 @@ class MissingSchemaInName(Exception):
     """The QRN should contain a schema name."""
     def __init__(self, qrn):
         Exception.__init__(self, f"do you mean 'public.{qrn}'?")
+
+class PoolTimeout(Exception):
+    """No connection could be checked out from the pool in time."""
+    def __init__(self, timeout):
+        self.timeout = timeout
+        Exception.__init__(self, f"No connection available after {timeout} seconds.")
+
+class UnknownTenant(Exception):
+    """The schema is not the schema of a tenant (see the [tenants] section of the config file)."""
+    def __init__(self, schema):
+        self.schema = schema
+        Exception.__init__(self, f"'{schema}' is not the schema of a tenant.")
@@ -3,19 +3,13 @@
 
 """The null module provides the Null class
 The Null class is used to set NULL value to relation fields.
+The NULL value is rendered as NULL in the SQL queries by the
+`driver <#module-half_orm.driver>`_.
 """
 
-from psycopg2.extensions import register_adapter, AsIs
-
 __all__ = ['NULL']
 
 class Null:
     """The Null class"""
 
-def adapt_null(_):
-    """NULL adapter"""
-    return AsIs("NULL")
-
-register_adapter(Null, adapt_null)
-
 NULL = Null()
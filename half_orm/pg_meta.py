@@ -1,10 +1,10 @@
-"""This module provides the SQL query to extract the metadata of a PostgreSQL
-database. The query extracts information about tables, views, materialized
+"""This module provides the SQL queries to extract the metadata of a PostgreSQL
+database. The queries extract information about tables, views, materialized
 views, foreign tables, and partitioned tables along with their columns,
 data types, constraints, inheritance hierarchy, and other related information.
 
 The module provides several helper functions to format the results of the
-query. These include functions to normalize fully qualified relation names,
+queries. These include functions to normalize fully qualified relation names,
 convert relation names to CamelCase, and strip double quotes from relation
 names.
 
@@ -22,17 +22,38 @@ Functions:
     * camel_case(string): Returns the given string transformed to camel case.
     * class_name(qrn): Returns the class name from the given qualified relation name (qrn).
 
-The main query is defined as a string variable named _REQUEST. It includes joins
-between several PostgreSQL system tables and views to extract the metadata.
-The resulting query returns data about tables, views, materialized views, foreign
-tables, and partitioned tables in the database, along with information about their
-columns and constraints.
-
-Note that this module requires the psycopg2 library to be installed.
+The metadata is extracted by the catalog queries defined in _REQUESTS: one query per
+kind of object (relations, attributes, constraints, inheritance and comments), each
+one returning one row per object. The rows are assembled in Python in a single pass.
+The queries return data about tables, views, materialized views, foreign tables, and
+partitioned tables in the database, along with information about their columns and
+constraints.
+
+In lazy mode, the metadata of a relation is loaded the first time it is needed with
+_RELATION_REQUESTS: the same queries restricted to the relation and to the relations it
+is linked to (by a foreign key in either direction or by inheritance).
+`PgMeta.reload_relations <#half_orm.pg_meta.PgMeta.reload_relations>`_ uses the same
+restriction to reload only the relations changed by a DDL (see the
+`ddl_listener <#module-half_orm.ddl_listener>`_ module).
+
+With **share**, the databases with the same structure (one database per tenant created
+with the same DDL) share their metadata: the metadata is loaded for the first one and
+registered under its structure fingerprint (see the
+`meta_cache <#module-half_orm.meta_cache>`_ module). The next ones only compute their
+fingerprint and reuse it. The keys of the shared metadata hold the name of the first
+database; PgMeta translates them to the name of the database requested.
+
+With **tenants** (one schema per tenant), the schemas of the tenants are excluded from
+the catalog queries: only the template schema is loaded, once for all the tenants.
+
+The connection can come from any `driver <#module-half_orm.driver>`_: its cursors
+must return the rows as dictionaries.
 """
 
-from collections import OrderedDict
-from psycopg2.extras import RealDictCursor
+import threading
+from sys import intern
+
+from half_orm import meta_cache
 
 REL_CLASS_NAMES = {
     'r': 'Table',
@@ -87,101 +108,230 @@ def class_name(qrn):
     "Returns the class name from qrn"
     return camel_case(qrn.replace('"', '').split('.')[-1])
 
-_REQUEST = """
-SELECT
-    a.attrelid AS tableid,
-    array_agg( distinct i.inhseqno::TEXT || ':' || i.inhparent::TEXT ) AS inherits,
-    c.relkind AS tablekind,
-    n.nspname AS schemaname,
-    c.relname AS relationname,
-    tdesc.description AS tabledescription,
-    a.attname AS fieldname,
-    a.attnum AS fieldnum,
-    adesc.description AS fielddescription,
-    a.attndims AS fielddim,
-    pt.typname AS fieldtype,
-    NOT( a.attislocal ) AS inherited,
-    cn_uniq.contype AS uniq,
-    cn_uniq.conkey as pkeynum,
-    a.attnotnull OR NULL AS notnull,
-    cn_pk.contype AS pkey,
-    cn_fk.contype AS fkey,
-    cn_fk.conname AS fkeyname,
-    cn_fk.conkey AS lfkeynum,
-    cn_fk.confrelid AS fkeytableid,
-    cn_fk.confkey AS fkeynum,
-    cn_fk.confupdtype as fkey_confupdtype,
-    cn_fk.confdeltype as fkey_confdeltype
-FROM
-    pg_class c -- table
-    LEFT JOIN pg_description tdesc ON
-    tdesc.objoid = c.oid AND
-    tdesc.objsubid = 0
-    LEFT JOIN pg_namespace n ON
-    n.oid = c.relnamespace
-    LEFT JOIN pg_inherits i ON
-    i.inhrelid = c.oid
-    LEFT JOIN pg_attribute a ON
-    a.attrelid = c.oid
-    LEFT JOIN pg_description adesc ON
-    adesc.objoid = c.oid AND
-    adesc.objsubid = a.attnum
-    JOIN pg_type pt ON
-    a.atttypid = pt.oid
-    LEFT JOIN pg_constraint cn_uniq ON
-    cn_uniq.contype = 'u' AND
-    cn_uniq.conrelid = a.attrelid AND
-    a.attnum = ANY( cn_uniq.conkey )
-    LEFT JOIN pg_constraint cn_pk ON
-    cn_pk.contype = 'p' AND
-    cn_pk.conrelid = a.attrelid AND
-    a.attnum = ANY( cn_pk.conkey )
-    LEFT JOIN pg_constraint cn_fk ON
-    cn_fk.contype = 'f' AND
-    cn_fk.conrelid = a.attrelid AND
-    a.attnum = ANY( cn_fk.conkey )
-WHERE
-    n.nspname <> 'pg_catalog'::name AND
-    n.nspname <> 'information_schema'::name AND
-    ( c.relkind = 'r'::"char" -- table
-      OR c.relkind = 'v'::"char" -- view
-      OR c.relkind = 'm' -- materialized view
-      OR c.relkind = 'f' -- foreign table/view/mat. view
-      OR c.relkind = 'p' -- patitioned table
-    ) AND
-    a.attnum > 0 -- AND
-    AND (i.inhparent is null or i.inhparent not in (select oid from pg_class where relkind = 'p'))
-    AND (cn_fk is null or cn_fk.confrelid not in (select inhrelid from pg_inherits where inhparent in (select oid from pg_class where relkind = 'p')))
-GROUP BY
-    a.attrelid,
-    n.nspname,
-    c.relname,
-    tdesc.description,
-    c.relkind,
-    a.attnum,
-    a.attname,
-    a.attnum,
-    adesc.description,
-    a.attndims,
-    a.attislocal,
-    pt.typname,
-    cn_uniq.contype,
-    cn_uniq.conkey,
-    a.attnotnull,
-    cn_pk.contype,
-    cn_fk.contype,
-    cn_fk.conname,
-    cn_fk.conkey,
-    cn_fk.confrelid,
-    cn_fk.confkey,
-    cn_fk.confupdtype,
-    cn_fk.confdeltype
-ORDER BY
-    n.nspname, c.relname, a.attnum
+# The metadata is loaded by five catalog queries, each one returning one row per object
+# (relation, attribute, constraint, parent, comment) to avoid the fan-out of the joins.
+# They share the rel CTE: the relations loaded. The {where} placeholder restricts it.
+_REL_CTE = """
+WITH rel AS (
+    SELECT c.oid, n.nspname, c.relname, c.relkind
+    FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname <> 'pg_catalog' AND n.nspname <> 'information_schema'
+    AND c.relkind IN ('r', 'v', 'm', 'f', 'p')
+    -- the partitions are accessed through their partitioned table.
+    AND NOT EXISTS (
+        SELECT 1 FROM pg_inherits i JOIN pg_class pc ON pc.oid = i.inhparent
+        WHERE i.inhrelid = c.oid AND pc.relkind = 'p')
+    {where})
 """
 
+_CATALOG_REQUESTS = {
+    'relations': """
+SELECT rel.oid AS tableid, rel.nspname AS schemaname, rel.relname AS relationname,
+    rel.relkind AS tablekind
+FROM rel
+ORDER BY rel.nspname, rel.relname
+""",
+    'attributes': """
+SELECT a.attrelid AS tableid, a.attnum AS fieldnum, a.attname AS fieldname,
+    a.attndims AS fielddim, t.typname AS fieldtype, NOT a.attislocal AS inherited,
+    a.attnotnull AS notnull
+FROM pg_attribute a JOIN pg_type t ON t.oid = a.atttypid
+WHERE a.attrelid IN (SELECT oid FROM rel) AND a.attnum > 0 AND NOT a.attisdropped
+ORDER BY a.attrelid, a.attnum
+""",
+    'constraints': """
+SELECT co.conrelid AS tableid, co.conname, co.contype, co.conkey, co.confrelid,
+    co.confkey, co.confupdtype, co.confdeltype
+FROM pg_constraint co
+WHERE co.conrelid IN (SELECT oid FROM rel) AND co.contype IN ('p', 'u', 'f')
+AND NOT (co.contype = 'f' AND co.confrelid IN (
+    SELECT i.inhrelid FROM pg_inherits i JOIN pg_class pc ON pc.oid = i.inhparent
+    WHERE pc.relkind = 'p'))
+ORDER BY co.oid
+""",
+    'inherits': """
+SELECT i.inhrelid AS tableid, i.inhparent AS parentid
+FROM pg_inherits i
+WHERE i.inhrelid IN (SELECT oid FROM rel)
+ORDER BY i.inhrelid, i.inhseqno
+""",
+    'comments': """
+SELECT d.objoid AS tableid, d.objsubid AS fieldnum, d.description
+FROM pg_description d
+WHERE d.classoid = 'pg_class'::regclass AND d.objoid IN (SELECT oid FROM rel)
+""",
+}
+
+def _requests(where=''):
+    "Returns the catalog queries with the rel CTE restricted by **where**."
+    rel_cte = _REL_CTE.format(where=where)
+    return {name: rel_cte + request for name, request in _CATALOG_REQUESTS.items()}
+
+_REQUESTS = _requests()
+
+# the relations {target} and the relations linked to them.
+_LINKED_TEMPLATE = """
+        WITH target AS ({target})
+        SELECT oid FROM target
+        UNION SELECT confrelid FROM pg_constraint
+            WHERE contype = 'f' AND conrelid IN (SELECT oid FROM target)
+        UNION SELECT conrelid FROM pg_constraint
+            WHERE contype = 'f' AND confrelid IN (SELECT oid FROM target)
+        UNION SELECT inhparent FROM pg_inherits
+            WHERE inhrelid IN (SELECT oid FROM target)"""
+
+_RELATION_WHERE = "AND c.oid IN ({})".format(
+    _LINKED_TEMPLATE.format(target="""
+            SELECT tc.oid
+            FROM pg_class tc JOIN pg_namespace tn ON tn.oid = tc.relnamespace
+            WHERE tn.nspname = %(schema)s AND tc.relname = %(relation)s"""))
+
+_RELATION_REQUESTS = _requests(_RELATION_WHERE)
+
+# the relations %(oids)s that still exist and their current neighbours (children included).
+_NEIGHBOURS_REQUEST = _LINKED_TEMPLATE.format(
+    target="SELECT oid FROM pg_class WHERE oid = ANY(%(oids)s::oid[])") + """
+        UNION SELECT inhrelid FROM pg_inherits
+            WHERE inhparent IN (SELECT oid FROM target)"""
+
+_RELATIONS_WHERE = "AND c.oid IN ({})".format(
+    _LINKED_TEMPLATE.format(target="SELECT unnest(%(oids)s::oid[]) AS oid"))
+
+_RELATIONS_REQUESTS = _requests(_RELATIONS_WHERE)
+
+# the schemas of the tenants are not loaded, only their template (see the tenants
+# parameter of PgMeta).
+_TENANTS_WHERE = """
+    AND (n.nspname NOT LIKE %(tenant_schemas)s OR n.nspname = %(template_schema)s)"""
+
+_TENANTS_REQUESTS = tuple(
+    _requests(_TENANTS_WHERE + where) for where in ('', _RELATION_WHERE, _RELATIONS_WHERE))
+
+class _SlotsMeta:
+    """Base class of FieldMeta and RelationMeta: the values are read as attributes or,
+    as with the dicts used previously, as keys (``meta['fieldtype']``, ``meta.get(...)``).
+    """
+    __slots__ = ()
+
+    def __init__(self, **kwargs):
+        for key in self.__slots__:
+            setattr(self, key, kwargs.get(key))
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError) as exc:
+            raise KeyError(key) from exc
+
+    def get(self, key, default=None):
+        "Returns the value of **key** or **default**."
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def keys(self):
+        "Returns the names of the values."
+        return self.__slots__
+
+    def items(self):
+        "Returns the (name, value) pairs."
+        return [(key, getattr(self, key)) for key in self.__slots__]
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.__getstate__() == other.__getstate__()
+
+    __hash__ = None
+
+    def __getstate__(self):
+        return tuple(getattr(self, key) for key in self.__slots__)
+
+    def __setstate__(self, state):
+        for key, value in zip(self.__slots__, state):
+            setattr(self, key, value)
+
+    def __repr__(self):
+        values = ', '.join(f'{key}={value!r}' for key, value in self.items())
+        return f'{self.__class__.__name__}({values})'
+
+class FieldMeta(_SlotsMeta):
+    """The metadata of a column.
+
+    The uniq/pkeynum and fkey* values describe one of the unique and foreign key
+    constraints the column belongs to. The constraints of the relation are in
+    `RelationMeta <#half_orm.pg_meta.RelationMeta>`_.
+    """
+    __slots__ = (
+        'name', 'tableid', 'fieldnum', 'fielddescription', 'fielddim', 'fieldtype',
+        'inherited', 'uniq', 'pkeynum', 'notnull', 'pkey', 'fkey', 'fkeyname', 'lfkeynum',
+        'fkeytableid', 'fkeynum', 'fkey_confupdtype', 'fkey_confdeltype')
+
+class RelationMeta(_SlotsMeta):
+    """The metadata of a relation.
+
+    Attributes:
+        fields (dict): the FieldMeta by column name (in the order of the columns).
+        fields_by_num (dict): the same FieldMeta by column number.
+        fkeys (dict): the foreign keys and reverse foreign keys:
+            name -> (sfqrn of the other relation, its fields, the fields of the relation,
+            on update action, on delete action).
+        pkey (list): the names of the columns of the primary key.
+        uniques (list): a tuple of column names for each unique constraint.
+    """
+    __slots__ = (
+        'sfqrn', 'tableid', 'tablekind', 'description', 'fields', 'fields_by_num', 'fkeys',
+        'inherits', 'pkey', 'uniques')
+
+def _fetch(connection, requests, params=None):
+    """Runs the catalog **requests** (see _requests).
+
+    Returns:
+        dict: the rows returned by each query.
+    """
+    catalog = {}
+    with connection.cursor() as cur:
+        for name, request in requests.items():
+            cur.execute(request, params)
+            catalog[name] = cur.fetchall()
+    return catalog
+
+def _set_constraints(relation):
+    "Sets the primary key and the unique constraints of the **relation** (RelationMeta)."
+    uniques = []
+    for field in relation.fields.values():
+        if field.pkey:
+            relation.pkey.append(field.name)
+        if field.uniq and field.pkeynum not in uniques:
+            uniques.append(field.pkeynum)
+    relation.uniques = [
+        tuple(relation.fields_by_num[num].name for num in uniq) for uniq in uniques]
+
+def compiled_relation(sfqrn, tableid, tablekind, description, fields, fkeys, inherits):
+    """Returns the RelationMeta of a relation of a compiled module (see
+    `meta_cache.compile_module <#half_orm.meta_cache.compile_module>`_).
+    **fields** holds the values of the FieldMeta of each column (in the order of the slots).
+    """
+    states, fields = fields, []
+    for state in states:
+        field = FieldMeta.__new__(FieldMeta)
+        field.__setstate__(state)
+        fields.append(field)
+    relation = RelationMeta(
+        sfqrn=sfqrn, tableid=tableid, tablekind=tablekind, description=description,
+        fields={field.name: field for field in fields},
+        fields_by_num={field.fieldnum: field for field in fields},
+        fkeys=fkeys, inherits=inherits, pkey=[], uniques=[])
+    _set_constraints(relation)
+    return relation
+
+def _reverse_fkey_prefix(dbname):
+    "Returns the prefix of the names of the reverse foreign keys in the metadata of **dbname**."
+    return strip_quotes(f'_reverse_fkey_{dbname}_'.replace(".", "_").replace(":", "_"))
+
 class _Meta(dict):
     __d_meta = {}
+    # structure fingerprint -> (dbname in the keys of the metadata, shared metadata).
+    __shared = {}
+    # dbname -> structure fingerprint of the shared metadata it uses.
+    __shares = {}
+    lock = threading.RLock()
 
     @classmethod
     def deja_vu(cls, dbname):
@@ -190,6 +340,35 @@ class _Meta(dict):
     @classmethod
     def register(cls, dbname, meta):
         cls.__d_meta[dbname] = meta
+        cls.__shares.pop(dbname, None)
+
+    @classmethod
+    def publish(cls, dbname, fingerprint):
+        "Shares the metadata of **dbname** with the databases of the same structure **fingerprint**."
+        cls.__shared[fingerprint] = (dbname, cls.__d_meta[dbname])
+        cls.__shares[dbname] = fingerprint
+
+    @classmethod
+    def share(cls, dbname, fingerprint):
+        """Registers the metadata shared for the structure **fingerprint** for **dbname**.
+        Returns False if no metadata is shared for this fingerprint.
+        """
+        if fingerprint not in cls.__shared:
+            return False
+        cls.__d_meta[dbname] = cls.__shared[fingerprint][1]
+        cls.__shares[dbname] = fingerprint
+        return True
+
+    @classmethod
+    def shared(cls, dbname):
+        "Returns the structure fingerprint of the shared metadata used by **dbname** or None."
+        return cls.__shares.get(dbname)
+
+    @classmethod
+    def label(cls, dbname):
+        "Returns the database name used in the keys of the metadata of **dbname**."
+        fingerprint = cls.__shares.get(dbname)
+        return cls.__shared[fingerprint][0] if fingerprint is not None else dbname
 
     def __getitem__(self, key):
         return _Meta.__d_meta.__getitem__(key)
@@ -201,17 +380,58 @@ class PgMeta:
         meta (_Meta): A singleton instance of the `_Meta` class.
     """
     meta = _Meta()
-    def __init__(self, connection, reload=False):
+    # (dbname, sfqrn) -> (RelationMeta, foreign keys translated for dbname).
+    __translated_fkeys = {}
+    def __init__(
+            self, connection=None, reload=False, checkout=None, dbname=None, cache=None,
+            share=False, tenants=None, compiled=None):
         """Initializes a new instance of the `PgMeta` class.
 
         Args:
-            connection (psycopg2.extensions.connection): A connection object to a PostgreSQL database.
+            connection: A connection object to a PostgreSQL database (psycopg2 or psycopg 3).
             reload (bool, optional): A flag indicating whether to reload the metadata from the database. \
             Defaults to False.
+            checkout (callable, optional): Lazy mode. A function returning a context manager that \
+            yields a connection. The metadata of a relation is loaded the first time it is needed. \
+            All the metadata is loaded when the list of the relations is needed.
+            dbname (str, optional): The name of the PostgreSQL database (lazy mode).
+            cache (MetadataCache, optional): The on-disk cache used when all the metadata is \
+            loaded (see the `meta_cache <#module-half_orm.meta_cache>`_ module).
+            share (bool, optional): Shares the metadata with the databases of the same \
+            structure when all the metadata is loaded.
+            tenants (tuple, optional): The template schema and the LIKE pattern of the \
+            schemas of the tenants. The schemas matching the pattern are not loaded, except \
+            the template schema: the tenants use its metadata.
+            compiled (module, optional): The module of the compiled metadata, used if it \
+            is up to date (see the `meta_cache <#half_orm.meta_cache>`_ module). In lazy \
+            mode, it is checked when the metadata is first needed.
         """
-        self.__dbname = connection.get_dsn_parameters()['dbname']
-        if not PgMeta.meta.deja_vu(self.__dbname) or reload:
-            self.__load_metadata(connection)
+        self.__checkout = checkout
+        self.__cache = cache
+        self.__compiled = compiled
+        self.__share = share
+        self.__requests = (_REQUESTS, _RELATION_REQUESTS, _RELATIONS_REQUESTS)
+        self.__params = {}
+        if tenants:
+            self.__requests = _TENANTS_REQUESTS
+            self.__params = {'template_schema': tenants[0], 'tenant_schemas': tenants[1]}
+        self.__dbname = dbname or connection.info.dbname
+        # the metadata loaded with tenants leaves out their schemas: it is cached and
+        # shared apart from the complete metadata.
+        self.__cache_key = meta_cache.cache_key(self.__dbname, tenants)
+        self.__tenants = tenants
+        with _Meta.lock:
+            deja_vu = PgMeta.meta.deja_vu(self.__dbname)
+            if checkout is not None:
+                if not deja_vu or reload:
+                    PgMeta.meta.register(
+                        self.__dbname, {'relations_list': [], 'byname': {}, 'byid': {}, 'lazy': True})
+            elif not deja_vu or reload or self.__is_lazy():
+                self.__load_metadata(connection)
+
+    def __is_lazy(self):
+        "Returns True if the metadata of the database is partially loaded."
+        return bool(self.meta[self.__dbname].get('lazy'))
 
     def metadata(self, dbname):
         """Retrieves the metadata for the specified database name.
@@ -222,8 +442,32 @@ class PgMeta:
         Returns:
             dict: The metadata of the specified database.
         """
+        if self.__checkout is not None and self.__is_lazy():
+            with _Meta.lock:
+                if self.__is_lazy():
+                    with self.__checkout() as connection:
+                        self.__load_metadata(connection)
         return self.meta[dbname]
 
+    def __relation(self, dbname, sfqrn):
+        """Returns the metadata of the relation **sfqrn**. In lazy mode, the metadata
+        of the relation is loaded if needed.
+
+        Raises:
+            KeyError: if the relation doesn't exist.
+        """
+        label = _Meta.label(dbname)
+        if label != dbname:
+            sfqrn = (label,) + tuple(sfqrn[1:])
+        byname = self.meta[dbname]['byname']
+        if sfqrn not in byname and self.__checkout is not None and self.__is_lazy():
+            with _Meta.lock:
+                if sfqrn not in byname:
+                    self.__load_relation(sfqrn)
+                    # the metadata is replaced if the compiled module holds all the relations.
+                    byname = self.meta[dbname]['byname']
+        return byname[sfqrn]
+
     def relations_list(self, dbname):
         """Retrieves a list of relations for the specified database.
 
@@ -233,69 +477,239 @@ class PgMeta:
         Returns:
             list: A list of relations for the specified database.
         """
-        return self.metadata(dbname)['relations_list']
+        relations_list = self.metadata(dbname)['relations_list']
+        if _Meta.label(dbname) == dbname:
+            return relations_list
+        return [(tablekind, (dbname,) + sfqrn[1:]) for tablekind, sfqrn in relations_list]
+
+    def shared(self, dbname):
+        """Returns the structure fingerprint of the metadata of **dbname** if it is shared
+        with the databases of the same structure, None otherwise.
+        """
+        return _Meta.shared(dbname)
 
     def __load_metadata(self, connection):
         """Loads the metadata by querying the PostgreSQL database and registers it in the _Meta singleton.
+        If a cache is used, the metadata is read from the cache file when the fingerprint
+        of the database hasn't changed.
+
+        With share, the metadata registered for the structure fingerprint of the database
+        is used if any.
 
         Args:
-            connection (psycopg2.extensions.connection): A connection object to a PostgreSQL database.
+            connection: A connection object to a PostgreSQL database (psycopg2 or psycopg 3).
         """
-        metadata = {'relations_list': []}
-        byname = metadata['byname'] = OrderedDict()
-        byid = metadata['byid'] = {}
-        with connection.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute(_REQUEST)
-            all_ = [elt for elt in cur.fetchall()]
-            for dct in all_:
-                table_key = (self.__dbname, dct['schemaname'], dct['relationname'])
-                tableid = dct['tableid']
-                description = dct['tabledescription']
-                if table_key not in byname:
-                    byid[tableid] = {}
-                    byid[tableid]['sfqrn'] = table_key
-                    byid[tableid]['fields'] = OrderedDict()
-                    byid[tableid]['fkeys'] = OrderedDict()
-                    byname[table_key] = OrderedDict()
-                    byname[table_key]['description'] = description
-                    byname[table_key]['fields'] = OrderedDict()
-                    byname[table_key]['fkeys'] = OrderedDict()
-                    byname[table_key]['fields_by_num'] = OrderedDict()
-            for dct in all_:
-                tableid = dct['tableid']
-                table_key = byid[tableid]['sfqrn']
-                fieldname = dct.pop('fieldname')
-                fieldnum = dct['fieldnum']
-                tablekind = dct.pop('tablekind')
-                inherits = [byid[int(elt.split(':')[1])]['sfqrn']
-                            for elt in dct.pop('inherits') if elt is not None]
-                byname[table_key]['tableid'] = tableid
-                byname[table_key]['tablekind'] = tablekind
-                byname[table_key]['inherits'] = inherits
-                byname[table_key]['fields'][fieldname] = dct
-                byname[table_key]['fields_by_num'][fieldnum] = dct
-                byid[tableid]['fields'][fieldnum] = fieldname
-                if (tablekind, table_key) not in metadata['relations_list']:
-                    metadata['relations_list'].append((tablekind, table_key))
-            for dct in all_:
-                tableid = dct['tableid']
-                table_key = byid[tableid]['sfqrn']
-                fkeyname = dct['fkeyname']
-                if fkeyname and fkeyname not in byname[table_key]['fkeys']:
-                    fkeytableid = dct['fkeytableid']
-                    ftable_key = byid[fkeytableid]['sfqrn']
-                    fields = [byid[tableid]['fields'][num] for num in dct['lfkeynum']]
-                    confupdtype = dct['fkey_confupdtype']
-                    confdeltype = dct['fkey_confdeltype']
-                    ffields = [byid[fkeytableid]['fields'][num] for num in dct['fkeynum']]
-                    rev_fkey_name = f'_reverse_fkey_{"_".join(table_key)}.{".".join(fields)}'
-                    rev_fkey_name = strip_quotes(rev_fkey_name.replace(".", "_").replace(":", "_"))
-                    byname[table_key]['fkeys'][fkeyname] = (
-                        ftable_key, ffields, fields, confupdtype, confdeltype)
-                    byname[ftable_key]['fkeys'][rev_fkey_name] = (table_key, fields, ffields, confupdtype, confdeltype)
-
+        structure = None
+        if self.__share:
+            structure = meta_cache.cache_key(
+                meta_cache.structure_fingerprint(connection), self.__tenants)
+            if PgMeta.meta.share(self.__dbname, structure):
+                return
+        fingerprint = None
+        if self.__cache is not None or self.__compiled is not None:
+            # computed first: a DDL run during the load invalidates the cache file.
+            fingerprint = meta_cache.fingerprint(connection)
+        if self.__compiled is not None:
+            metadata = meta_cache.compiled_metadata(
+                self.__compiled, self.__dbname, fingerprint, self.__tenants)
+            # a partial module is only used in lazy mode (see __load_compiled).
+            if metadata is not None and not metadata.get('lazy'):
+                self.__register(metadata, structure)
+                return
+        if self.__cache is not None:
+            metadata = self.__cache.load(self.__cache_key, fingerprint)
+            if metadata is not None:
+                self.__register(metadata, structure)
+                return
+        metadata = self.__assemble(_fetch(connection, self.__requests[0], self.__params or None))
         metadata['relations_list'].sort()
+        self.__register(metadata, structure)
+        if self.__cache is not None:
+            self.__cache.store(self.__cache_key, fingerprint, metadata)
+
+    def __register(self, metadata, structure):
+        "Registers the **metadata** and shares it for the **structure** fingerprint if any."
         PgMeta.meta.register(self.__dbname, metadata)
+        if structure is not None:
+            PgMeta.meta.publish(self.__dbname, structure)
+
+    def __load_relation(self, sfqrn):
+        """Lazy mode. Loads the metadata of the relation **sfqrn** and adds it to the
+        metadata registered in the _Meta singleton.
+
+        The relations linked to **sfqrn** are also fetched to resolve its foreign keys,
+        reverse foreign keys and inherited relations, but they are not registered:
+        their own links are not all known.
+        """
+        if self.__compiled is not None:
+            self.__load_compiled()
+            if sfqrn in self.meta[self.__dbname]['byname']:
+                return
+        _, schema, relation = sfqrn
+        with self.__checkout() as connection:
+            loaded = self.__assemble(_fetch(
+                connection, self.__requests[1], dict(self.__params, schema=schema, relation=relation)))
+        if sfqrn not in loaded['byname']:
+            return
+        metadata = self.meta[self.__dbname]
+        relation = loaded['byname'][sfqrn]
+        metadata['byname'][sfqrn] = metadata['byid'][relation.tableid] = relation
+        metadata['relations_list'].append((relation.tablekind, sfqrn))
+
+    def __load_compiled(self):
+        """Lazy mode. Adds the relations of the compiled module to the metadata if the
+        module is up to date. The module is checked once.
+        """
+        compiled, self.__compiled = self.__compiled, None
+        with self.__checkout() as connection:
+            loaded = meta_cache.compiled_metadata(
+                compiled, self.__dbname, meta_cache.fingerprint(connection), self.__tenants)
+        if loaded is None:
+            return
+        if not loaded.get('lazy'):
+            self.__register(loaded, None)
+            return
+        metadata = self.meta[self.__dbname]
+        for sfqrn, relation in loaded['byname'].items():
+            if sfqrn not in metadata['byname']:
+                metadata['byname'][sfqrn] = metadata['byid'][relation.tableid] = relation
+                metadata['relations_list'].append((relation.tablekind, sfqrn))
+
+    def reload_relations(self, connection, oids):
+        """Reloads the metadata of the relations **oids** (created, altered or dropped)
+        and of the relations linked to them before or after the change. The metadata
+        of the other relations is kept. In lazy mode, the entries are only removed:
+        they are loaded again when needed.
+
+        Args:
+            connection: A connection object to a PostgreSQL database (psycopg2 or psycopg 3).
+            oids (iterable): the oids of the relations changed.
+
+        Returns:
+            set: the sfqrn of the relations whose metadata has been reloaded or removed.
+            None if all the metadata has been reloaded: the shared metadata is replaced,
+            not updated.
+        """
+        oids = list(oids)
+        with _Meta.lock:
+            if _Meta.shared(self.__dbname) is not None:
+                self.__load_metadata(connection)
+                return None
+            metadata = self.meta[self.__dbname]
+            byname, byid = metadata['byname'], metadata['byid']
+            targets = set(oids)
+            for oid in oids:
+                if oid in byid:
+                    targets.update(
+                        byname[sfqrn].tableid for sfqrn in self.__neighbours(byid[oid].sfqrn)
+                        if sfqrn in byname)
+            with connection.cursor() as cur:
+                cur.execute(_NEIGHBOURS_REQUEST, {'oids': oids})
+                targets.update(row['oid'] for row in cur.fetchall())
+            loaded = {'byid': {}}
+            if not self.__is_lazy():
+                loaded = self.__assemble(_fetch(
+                    connection, self.__requests[2], dict(self.__params, oids=list(targets))))
+            affected = set()
+            for oid in targets:
+                relation = byid.pop(oid, None)
+                if relation is not None:
+                    affected.add(relation.sfqrn)
+                    byname.pop(relation.sfqrn, None)
+            for oid in targets:
+                if oid in loaded['byid']:
+                    relation = byid[oid] = loaded['byid'][oid]
+                    byname[relation.sfqrn] = relation
+                    affected.add(relation.sfqrn)
+            relations = sorted(byname.items())
+            byname.clear()
+            byname.update(relations)
+            metadata['relations_list'] = sorted(
+                (relation.tablekind, sfqrn) for sfqrn, relation in relations)
+        return affected
+
+    def __neighbours(self, sfqrn):
+        """Returns the relations linked to **sfqrn** in the metadata: by a foreign key
+        in either direction or by inheritance.
+        """
+        byname = self.meta[self.__dbname]['byname']
+        neighbours = {fkey[0] for fkey in byname[sfqrn].fkeys.values()}
+        neighbours.update(byname[sfqrn].inherits)
+        neighbours.update(
+            child for child, relation in byname.items() if sfqrn in relation.inherits)
+        return neighbours
+
+    def __assemble(self, catalog):
+        """Builds the metadata from the rows returned by the catalog queries (see _fetch).
+        Each row is visited once. The names are interned.
+
+        The foreign keys and inherited relations pointing to relations that are not
+        in the rows are ignored.
+        """
+        metadata = {'relations_list': []}
+        byname = metadata['byname'] = {}
+        byid = metadata['byid'] = {}
+        descriptions = {(row['tableid'], row['fieldnum']): row['description']
+                        for row in catalog['comments']}
+        for row in catalog['relations']:
+            tableid = row['tableid']
+            sfqrn = (self.__dbname, intern(row['schemaname']), intern(row['relationname']))
+            byid[tableid] = byname[sfqrn] = RelationMeta(
+                sfqrn=sfqrn, tableid=tableid, tablekind=row['tablekind'],
+                description=descriptions.get((tableid, 0)), fields={}, fields_by_num={},
+                fkeys={}, inherits=[], pkey=[], uniques=[])
+            metadata['relations_list'].append((row['tablekind'], sfqrn))
+        for row in catalog['attributes']:
+            relation = byid[row['tableid']]
+            fieldnum = row['fieldnum']
+            relation.fields[intern(row['fieldname'])] = relation.fields_by_num[fieldnum] = FieldMeta(
+                name=intern(row['fieldname']), tableid=row['tableid'], fieldnum=fieldnum,
+                fielddescription=descriptions.get((row['tableid'], fieldnum)),
+                fielddim=row['fielddim'], fieldtype=intern(row['fieldtype']),
+                inherited=row['inherited'], notnull=row['notnull'] or None)
+        for row in catalog['inherits']:
+            if row['parentid'] in byid:
+                byid[row['tableid']].inherits.append(byid[row['parentid']].sfqrn)
+        fkeys = []
+        for row in catalog['constraints']:
+            conkey = tuple(row['conkey'])
+            fields_by_num = byid[row['tableid']].fields_by_num
+            for num in conkey:
+                field = fields_by_num[num]
+                if row['contype'] == 'p':
+                    field.pkey = 'p'
+                elif row['contype'] == 'u':
+                    field.uniq = 'u'
+                    field.pkeynum = conkey
+                else:
+                    field.fkey = 'f'
+                    field.fkeyname = intern(row['conname'])
+                    field.lfkeynum = conkey
+                    field.fkeytableid = row['confrelid']
+                    field.fkeynum = tuple(row['confkey'])
+                    field.fkey_confupdtype = row['confupdtype']
+                    field.fkey_confdeltype = row['confdeltype']
+            if row['contype'] == 'f' and row['confrelid'] in byid:
+                fkeys.append(row)
+        # the foreign keys are registered in the order of the relations and of their first field.
+        position = {tableid: index for index, tableid in enumerate(byid)}
+        fkeys.sort(key=lambda row: (position[row['tableid']], min(row['conkey']), row['conname']))
+        for row in fkeys:
+            relation, frelation = byid[row['tableid']], byid[row['confrelid']]
+            fkeyname = intern(row['conname'])
+            if fkeyname in relation.fkeys:
+                continue
+            fields = [relation.fields_by_num[num].name for num in row['conkey']]
+            ffields = [frelation.fields_by_num[num].name for num in row['confkey']]
+            confupdtype, confdeltype = row['confupdtype'], row['confdeltype']
+            rev_fkey_name = f'_reverse_fkey_{"_".join(relation.sfqrn)}.{".".join(fields)}'
+            rev_fkey_name = strip_quotes(rev_fkey_name.replace(".", "_").replace(":", "_"))
+            relation.fkeys[fkeyname] = (
+                frelation.sfqrn, ffields, fields, confupdtype, confdeltype)
+            frelation.fkeys[rev_fkey_name] = (relation.sfqrn, fields, ffields, confupdtype, confdeltype)
+        for relation in byid.values():
+            _set_constraints(relation)
+        return metadata
 
     def has_relation(self, dbname, schema, relation):
         """Checks whether the specified relation exists in the specified database.
@@ -308,7 +722,11 @@ class PgMeta:
         Returns:
             bool: True if the relation exists, False otherwise.
         """
-        return (dbname, schema, relation) in self.meta[dbname]['byname']
+        try:
+            self.__relation(dbname, (dbname, schema, relation))
+            return True
+        except KeyError:
+            return False
 
 
     def desc(self, dbname):
@@ -331,8 +749,8 @@ class PgMeta:
             inh = []
             tablekind = entry[key]['tablekind']
             if entry[key]['inherits']:
-                inh = [elt for elt in entry[key]['inherits']]
-            ret_val.append((tablekind, key, inh))
+                inh = [(dbname,) + elt[1:] for elt in entry[key]['inherits']]
+            ret_val.append((tablekind, (dbname,) + key[1:], inh))
         return ret_val
 
     def fields_meta(self, dbname, sfqrn):
@@ -346,7 +764,7 @@ class PgMeta:
         Returns:
             dict: The metadata of the fields for the specified relation.
         """
-        return self.metadata(dbname)['byname'][sfqrn]['fields']
+        return self.__relation(dbname, sfqrn).fields
 
     def fkeys_meta(self, dbname, sfqrn):
         """
@@ -359,7 +777,29 @@ class PgMeta:
         Returns:
             dict: A dictionary containing metadata about the foreign keys for the given table.
         """
-        return self.metadata(dbname)['byname'][sfqrn]['fkeys']
+        relation = self.__relation(dbname, sfqrn)
+        label = _Meta.label(dbname)
+        if label == dbname:
+            return relation.fkeys
+        key = (dbname, tuple(sfqrn[1:]))
+        translated = PgMeta.__translated_fkeys.get(key)
+        if translated is None or translated[0] is not relation:
+            translated = PgMeta.__translated_fkeys[key] = (
+                relation, self.__translate_fkeys(relation.fkeys, label, dbname))
+        return translated[1]
+
+    @staticmethod
+    def __translate_fkeys(fkeys, label, dbname):
+        """Returns the foreign keys of the shared metadata (**label**) with the names of
+        the reverse foreign keys and the relations of **dbname**.
+        """
+        prefix, new_prefix = _reverse_fkey_prefix(label), _reverse_fkey_prefix(dbname)
+        translated = {}
+        for name, (fk_sfqrn, *fields) in fkeys.items():
+            if name.startswith(prefix):
+                name = new_prefix + name[len(prefix):]
+            translated[name] = ((dbname,) + fk_sfqrn[1:], *fields)
+        return translated
 
     def relation_meta(self, dbname, fqrn):
         """
@@ -372,7 +812,7 @@ class PgMeta:
         Returns:
             dict: A dictionary containing metadata about the given table.
         """
-        return self.metadata(dbname)['byname'][fqrn]
+        return self.__relation(dbname, fqrn)
 
     def str(self, dbname, with_hop_meta=False):
         """
@@ -437,22 +877,7 @@ class PgMeta:
         Returns:
             list: A list of tuples, where each tuple contains the names of the fields that make up a unique constraint.
         """
-        rel_meta_by_name = self.metadata(dbname)['byname'][sfqrn]
-        tableid = rel_meta_by_name['tableid']
-        rel_meta_by_id = self.metadata(dbname)['byid']
-        unique_by_num = []
-        for key, value in rel_meta_by_name['fields'].items():
-            if value['uniq']:
-                t_uniq = tuple(value['pkeynum'])
-                if unique_by_num.count(t_uniq) == 0:
-                    unique_by_num.append(t_uniq)
-        unique = []
-        for elt in unique_by_num:
-            fields_names = []
-            for num in elt:
-                fields_names.append(rel_meta_by_id[tableid]['fields'][num])
-            unique.append(tuple(fields_names))
-        return unique
+        return self.__relation(dbname, sfqrn).uniques
 
     def _pkey_constraint(self, dbname, sfqrn):
         """Returns the primary key constraint for the given sfqrn.
@@ -464,14 +889,4 @@ class PgMeta:
         Returns:
             list: A list of the names of the fields that make up the primary key constraint.
         """
-        rel_meta_by_name = self.metadata(dbname)['byname'][sfqrn]
-        tableid = rel_meta_by_name['tableid']
-        rel_meta_by_id = self.metadata(dbname)['byid']
-        pkey_by_num = []
-        for key, value in rel_meta_by_name['fields'].items():
-            if value['pkey']:
-                pkey_by_num.append(value['fieldnum'])
-        pkey = []
-        for num in pkey_by_num:
-            pkey.append(rel_meta_by_id[tableid]['fields'][num])
-        return pkey
+        return self.__relation(dbname, sfqrn).pkey
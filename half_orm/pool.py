@@ -0,0 +1,277 @@
+#-*- coding: utf-8 -*-
+
+"""This module provides the ConnectionPool class used by the
+`Model <#half_orm.model.Model>`_ class.
+
+The pool keeps between *minconn* and *maxconn* connections to the database.
+A connection is checked out for the duration of a query (or of a
+`Transaction <#half_orm.transaction.Transaction>`_) and given back to the pool
+afterwards. The health of a connection is checked when it is checked out.
+
+The pools are fork-safe: in a child process, the connections opened by the parent
+are left untouched and new connections are opened on demand.
+
+Example:
+    >>> from half_orm.pool import ConnectionPool
+    >>> pool = ConnectionPool({'dbname': 'halftest'}, minconn=1, maxconn=4)
+    >>> conn = pool.getconn()
+    >>> pool.putconn(conn)
+    >>> pool.stats()['idle']
+    1
+"""
+
+import os
+import threading
+import time
+import weakref
+
+from half_orm import model_errors
+from half_orm.driver import get_driver
+
+# the pools of the process. They are reset in the child processes (see _after_fork).
+_POOLS = weakref.WeakSet()
+# the connections inherited from the parent process by a child process. They are kept
+# but never closed: closing them would end the sessions of the parent.
+_INHERITED = []
+
+def _after_fork():
+    "Called in a child process after a fork: the pools forget the connections of the parent."
+    for pool in list(_POOLS):
+        pool._after_fork()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork)
+
+class ConnectionPool:
+    """A thread-safe pool of connections to a PostgreSQL database.
+
+    Parameters:
+        dbinfo (dict): the connection parameters passed to the driver.
+        minconn (int): the number of connections opened at startup and kept open.
+        maxconn (int): the maximum number of connections opened at the same time.
+        timeout (Optional[float]): the number of seconds to wait for a connection
+            when *maxconn* connections are in use. Waits forever if None.
+        check_idle (Optional[float]): a connection that has been idle for more than
+            *check_idle* seconds is probed with ``select 1`` when it is checked out.
+            The probe is never run if None.
+        driver (Optional[Driver]): the `driver <#module-half_orm.driver>`_ used to
+            open the connections (psycopg2 by default).
+        lazy (bool): if True, no connection is opened at startup. The connections are
+            opened when they are checked out.
+    """
+    def __init__(self, dbinfo, minconn=1, maxconn=1, timeout=None, check_idle=30., driver=None,
+                 lazy=False):
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError(
+                f"Invalid pool size: minconn={minconn}, maxconn={maxconn}")
+        self.__dbinfo = dbinfo
+        self.__driver = driver or get_driver()
+        self.__minconn = minconn
+        self.__maxconn = maxconn
+        self.__timeout = timeout
+        self.__check_idle = check_idle
+        self.__cond = threading.Condition()
+        self.__idle = []
+        self.__used = {}
+        self.__size = 0
+        self.__closed = False
+        self.__waiters = 0
+        self.__checkouts = 0
+        self.__wait_time = 0.
+        self.__max_wait_time = 0.
+        self.__timeouts = 0
+        self.__discarded = 0
+        for _ in range(0 if lazy else minconn):
+            self.__idle.append((self.__new_connection(), time.monotonic()))
+            self.__size += 1
+        _POOLS.add(self)
+
+    def __new_connection(self):
+        return self.__driver.connect(self.__dbinfo)
+
+    def __is_healthy(self, conn, last_used):
+        """Checks a connection before handing it out."""
+        try:
+            if self.__driver.is_broken(conn):
+                return False
+            if not self.__driver.is_idle(conn):
+                conn.rollback()
+            if not conn.autocommit:
+                conn.autocommit = True
+            if (self.__check_idle is not None and
+                    time.monotonic() - last_used >= self.__check_idle):
+                with conn.cursor() as cursor:
+                    cursor.execute('select 1')
+        except self.__driver.connection_errors:
+            return False
+        return True
+
+    def __discard(self, conn):
+        """Closes a connection and frees its slot. Must be called with the lock held."""
+        self.__size -= 1
+        self.__discarded += 1
+        if not conn.closed:
+            conn.close()
+        self.__cond.notify()
+
+    def getconn(self):
+        """Checks out a connection from the pool.
+
+        Returns:
+            connection: a connection of the driver in autocommit mode.
+
+        Raises:
+            InterfaceError: (of the driver) if the pool has been closed.
+            PoolTimeout: if no connection is available after *timeout* seconds.
+        """
+        start = time.monotonic()
+        while True:
+            conn = None
+            with self.__cond:
+                while True:
+                    if self.__closed:
+                        raise self.__driver.InterfaceError('connection pool is closed')
+                    if self.__idle:
+                        conn, last_used = self.__idle.pop()
+                        break
+                    if self.__size < self.__maxconn:
+                        self.__size += 1
+                        break
+                    remaining = None
+                    if self.__timeout is not None:
+                        remaining = self.__timeout - (time.monotonic() - start)
+                        if remaining <= 0:
+                            self.__timeouts += 1
+                            raise model_errors.PoolTimeout(self.__timeout)
+                    self.__waiters += 1
+                    try:
+                        self.__cond.wait(remaining)
+                    finally:
+                        self.__waiters -= 1
+            if conn is None:
+                try:
+                    conn = self.__new_connection()
+                except Exception:
+                    with self.__cond:
+                        self.__size -= 1
+                        self.__cond.notify()
+                    raise
+            elif not self.__is_healthy(conn, last_used):
+                with self.__cond:
+                    self.__discard(conn)
+                continue
+            with self.__cond:
+                self.__used[id(conn)] = conn
+                self.__checkouts += 1
+                wait_time = time.monotonic() - start
+                self.__wait_time += wait_time
+                self.__max_wait_time = max(self.__max_wait_time, wait_time)
+            return conn
+
+    def connect(self):
+        """Opens a connection to the database outside of the pool: it is not counted
+        in *maxconn* and the caller must close it.
+
+        Raises:
+            InterfaceError: (of the driver) if the pool has been closed.
+        """
+        if self.__closed:
+            raise self.__driver.InterfaceError('connection pool is closed')
+        return self.__new_connection()
+
+    def putconn(self, conn, discard=False):
+        """Gives a connection back to the pool.
+
+        Parameters:
+            conn (connection): a connection returned by getconn.
+            discard (bool): if True, the connection is closed instead of being reused.
+        """
+        if not (discard or conn.closed):
+            try:
+                if not self.__driver.is_idle(conn):
+                    conn.rollback()
+                if not conn.autocommit:
+                    conn.autocommit = True
+            except self.__driver.connection_errors:
+                discard = True
+        with self.__cond:
+            if self.__used.pop(id(conn), None) is None:
+                return
+            if discard or conn.closed or self.__closed:
+                self.__discard(conn)
+                return
+            self.__idle.append((conn, time.monotonic()))
+            self.__cond.notify()
+
+    def close(self):
+        """Closes all the connections of the pool, including the checked out ones."""
+        with self.__cond:
+            self.__closed = True
+            for conn, _ in self.__idle:
+                if not conn.closed:
+                    conn.close()
+            for conn in self.__used.values():
+                if not conn.closed:
+                    conn.close()
+            self.__idle = []
+            self.__used = {}
+            self.__size = 0
+            self.__cond.notify_all()
+
+    def clear(self):
+        """Closes the idle connections. The pool can still be used: the connections
+        are opened again on demand. See `Model.prefork <#half_orm.model.Model.prefork>`_.
+        """
+        with self.__cond:
+            for conn, _ in self.__idle:
+                if not conn.closed:
+                    conn.close()
+            self.__size -= len(self.__idle)
+            self.__idle = []
+            self.__cond.notify_all()
+
+    def _after_fork(self):
+        "In a child process: forgets the connections of the parent without closing them."
+        _INHERITED.extend(conn for conn, _ in self.__idle)
+        _INHERITED.extend(self.__used.values())
+        self.__cond = threading.Condition()
+        self.__idle = []
+        self.__used = {}
+        self.__size = 0
+        self.__waiters = 0
+
+    @property
+    def closed(self):
+        "Returns True if the pool has been closed."
+        return self.__closed
+
+    def stats(self):
+        """Returns the metrics of the pool.
+
+        Returns:
+            dict: with the following keys
+
+            * minconn, maxconn: the configuration of the pool;
+            * size: the number of open connections;
+            * idle: the number of connections available;
+            * in_use: the number of connections checked out;
+            * waiters: the number of threads waiting for a connection;
+            * checkouts: the total number of checkouts;
+            * avg_checkout_time, max_checkout_time: the time (in seconds) spent in getconn;
+            * timeouts: the number of PoolTimeout raised;
+            * discarded: the number of connections closed by the pool.
+        """
+        with self.__cond:
+            return {
+                'minconn': self.__minconn,
+                'maxconn': self.__maxconn,
+                'size': self.__size,
+                'idle': len(self.__idle),
+                'in_use': len(self.__used),
+                'waiters': self.__waiters,
+                'checkouts': self.__checkouts,
+                'avg_checkout_time': self.__checkouts and self.__wait_time / self.__checkouts,
+                'max_checkout_time': self.__max_wait_time,
+                'timeouts': self.__timeouts,
+                'discarded': self.__discarded,
+            }
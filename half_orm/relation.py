@@ -36,20 +36,95 @@ The following methods can be chained on the object before a select.
 
 """
 
+import base64
+import contextvars
+import datetime
 import inspect
+import json
+import re
+import uuid
+from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from decimal import Decimal
 from functools import wraps
-from collections import OrderedDict
+from collections.abc import MutableMapping
 from typing import List, Generic, TypeVar, Dict
 from keyword import iskeyword
-import psycopg2
-from psycopg2.extras import RealDictCursor
 
 from half_orm import relation_errors
 from half_orm.transaction import Transaction
 from half_orm.field import Field
+from half_orm.fkey import FKey
+from half_orm.sql_cache import SQL_CACHE
+from half_orm.template import QueryTemplate
 from half_orm import utils
 
+_ALIAS = re.compile(r'\br(\d+)\b')
+
+def _canonical_aliases(query, ids):
+    """Replaces the aliases r<ho_id> of the query by r<index> where ids maps
+    the ho_ids to the indexes. Returns None if an alias is missing in ids.
+    """
+    try:
+        return _ALIAS.sub(lambda match: f'r{ids[int(match.group(1))]}', query)
+    except KeyError:
+        return None
+
+# the types of the values of a page cursor (see Relation.ho_paginate):
+# tag -> (types, JSON encoding, decoding). The values are tagged by their type so that
+# they are passed back to the query with the type of the key.
+_CURSOR_TYPES = {
+    'bool': ((bool,), bool, bool),
+    'int': ((int,), int, int),
+    'float': ((float,), float, float),
+    'decimal': ((Decimal,), str, Decimal),
+    'str': ((str,), str, str),
+    'uuid': ((uuid.UUID,), str, uuid.UUID),
+    'bytes': ((bytes, memoryview), lambda value: base64.b64encode(value).decode(), base64.b64decode),
+    'datetime': ((datetime.datetime,), datetime.datetime.isoformat, datetime.datetime.fromisoformat),
+    'date': ((datetime.date,), datetime.date.isoformat, datetime.date.fromisoformat),
+    'time': ((datetime.time,), datetime.time.isoformat, datetime.time.fromisoformat),
+}
+_CURSOR_TAGS = {type_: tag for tag, (types, _, _) in _CURSOR_TYPES.items() for type_ in types}
+
+def _encode_cursor(key, after):
+    """Returns the cursor of the page following the values **after** of the **key**.
+    Raises ValueError if a value can't be restored from a cursor."""
+    values = []
+    for name, value in zip(key, after):
+        tag = _CURSOR_TAGS.get(type(value))
+        if tag is None:
+            raise ValueError(
+                f'The type {type(value).__name__} of {name} is not supported in a page cursor!')
+        values.append([tag, _CURSOR_TYPES[tag][1](value)])
+    return base64.urlsafe_b64encode(json.dumps([list(key), values]).encode()).decode()
+
+def _decode_cursor(key, cursor):
+    """Returns the values of the **key** in the **cursor** (see _encode_cursor).
+    Raises ValueError if the cursor is invalid or not ordered by the key."""
+    try:
+        cursor_key, values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        after = [_CURSOR_TYPES[tag][2](value) for tag, value in values]
+    except (ValueError, TypeError, KeyError) as exc:
+        raise ValueError(f'Invalid cursor: {cursor}') from exc
+    if cursor_key != list(key) or len(after) != len(key):
+        raise ValueError(f'The cursor {cursor} is not ordered by ({", ".join(key)})!')
+    return after
+
+class Page(list):
+    """A page of rows returned by `ho_paginate <#half_orm.relation.Relation.ho_paginate>`_
+    or `ho_page <#half_orm.relation.Relation.ho_page>`_.
+
+    The cursor attribute is the opaque token of the next page (None if the page is
+    the last one or with ho_page). The total attribute is the number of rows of the
+    relation (ho_page only).
+    """
+    def __init__(self, rows, cursor=None, total=None):
+        super().__init__(rows)
+        self.cursor = cursor
+        self.total = total
+
 class _SetOperators:
     """_SetOperators class stores the set operations made on the Relation class objects
 
@@ -107,13 +182,16 @@ class DC_Relation: # pragma: no cover
             It is not possible to insert more than one row with the ho_insert method
         """
         ...
-    def ho_select(self, *args: List[str]) -> [Dict]:
+    def ho_select(self, *args: List[str], stream: bool=False, itersize: int=2000) -> [Dict]:
         """Gets the set of values correponding to the constraint attached to self.
         This method is a generator.
 
         Arguments:
             *args: the fields names of the returned attributes. If omitted,
                 all the fields are returned.
+            stream: if True, the rows are fetched from a server side cursor,
+                itersize rows at a time.
+            itersize: the number of rows fetched at a time in stream mode.
 
         Yields:
             the result of the query as a list of dictionaries.
@@ -125,6 +203,36 @@ class DC_Relation: # pragma: no cover
         """
         ...
 
+    def ho_stream(self, *args: List[str], itersize: int=2000) -> [Dict]:
+        """Same as ho_select(*args, stream=True)."""
+        ...
+
+    def ho_select_batches(self, size: int, *args: List[str]) -> [[Dict]]:
+        """Same as ho_select in stream mode but yields lists of at most size rows."""
+        ...
+
+    def ho_paginate(self, page_size: int, *args: List[str], order=None, cursor: str=None,
+                    prefetch: bool=False) -> ['Page']:
+        """Yields the rows by pages of at most page_size rows, ordered by the primary
+        key or a unique key (keyset pagination)."""
+        ...
+
+    def ho_page(self, limit: int, *args: List[str], offset: int=0, estimate: bool=False) -> 'Page':
+        """Returns a page of at most limit rows after offset rows with the total number
+        of rows in the same query."""
+        ...
+
+    @classmethod
+    def ho_template(cls, *args: List[str], **kwargs) -> 'QueryTemplate':
+        """Returns a select query prepared on the server with named parameters.
+
+        Example:
+            >>> by_name = Person.ho_template('id', last_name=Param('ln'))
+            >>> by_name.execute(ln='La')
+            [{'id': 1772}]
+        """
+        ...
+
     def ho_update(self, *args, update_all=False, **kwargs) -> [Dict]:
         """Updates the elements defined by self.
 
@@ -204,8 +312,10 @@ class DC_Relation: # pragma: no cover
         """Set the offset for the next SQL select request."""
         ...
 
-    def ho_count(self, limit=0):
+    def ho_count(self, *args, estimate=False, max=None):
         """Returns the number of tuples matching the intention in the relation.
+        With estimate=True, returns the estimate of the planner. With max=N, counts
+        the tuples up to N.
         """
         ...
 
@@ -214,6 +324,94 @@ class DC_Relation: # pragma: no cover
         """
         ...
 
+class _Spec:
+    """The fields and foreign keys of a relation class, computed once from the metadata
+    of the relation (see Relation._ho_spec):
+
+    - fields: the python name of each field -> (column name, metadata), in the order
+      of the columns;
+    - pkey, ukeys: the python names of the fields of the primary key and unique;
+    - fkeys: the name of each foreign key -> its metadata;
+    - fkeys_attr: the aliases of the foreign keys defined in Fkeys -> their names;
+    - eager: the fields and aliases whose name is also an attribute of the class.
+      They are set on the instance at its creation, as they would never reach
+      Relation.__getattr__.
+    """
+    __slots__ = ('relation_meta', 'fields', 'pkey', 'ukeys', 'fkeys', 'fkeys_attr', 'eager')
+
+    def __init__(self, cls, relation_meta):
+        self.relation_meta = relation_meta
+        self.fields = {}
+        for name, metadata in cls._ho_model._fields_metadata(cls._t_fqrn).items():
+            self.fields[cls._Relation__py_field_name(name, metadata['fieldnum'])] = (name, metadata)
+        self.pkey = tuple(name for name, (_, metadata) in self.fields.items() if metadata['pkey'])
+        self.ukeys = tuple(name for name, (_, metadata) in self.fields.items() if metadata['uniq'])
+        self.fkeys = dict(cls._ho_model._fkeys_metadata(cls._t_fqrn))
+        self.fkeys_attr = {
+            key: value for key, value in getattr(cls, 'Fkeys', {}).items()
+            if key != ''} # we skip empty keys
+        self.eager = tuple(name for name in list(self.fields) + list(self.fkeys_attr)
+                           if hasattr(cls, name))
+
+class _LazyObjects(MutableMapping):
+    """The fields (or foreign keys) of a relation object. An object is created on its
+    first access from the spec of the class. Other objects can be added (the reverse
+    foreign keys, see FKey.__call__): they come after the ones of the spec.
+    """
+    __slots__ = ('_relation', '_specs', '_objects')
+
+    def __init__(self, relation, specs):
+        self._relation = relation
+        self._specs = specs
+        self._objects = {}
+
+    @abstractmethod
+    def _create(self, name, spec):
+        "Returns the object **name** of the relation."
+
+    def __getitem__(self, name):
+        try:
+            return self._objects[name]
+        except KeyError:
+            obj = self._objects[name] = self._create(name, self._specs[name])
+            return obj
+
+    def __setitem__(self, name, obj):
+        self._objects[name] = obj
+
+    def __delitem__(self, name):
+        raise TypeError(f"can't delete {name}")
+
+    def __contains__(self, name):
+        return name in self._specs or name in self._objects
+
+    def __iter__(self):
+        yield from self._specs
+        yield from (name for name in self._objects if name not in self._specs)
+
+    def __len__(self):
+        return len(self._specs) + sum(1 for name in self._objects if name not in self._specs)
+
+    def created(self):
+        "Returns the objects already created by name, in the order of the mapping."
+        if len(self._objects) < 2:
+            return self._objects
+        return {name: self._objects[name] for name in self if name in self._objects}
+
+class _Fields(_LazyObjects):
+    "The fields of a relation object."
+    __slots__ = ()
+
+    def _create(self, name, spec):
+        return Field(spec[0], self._relation, spec[1])
+
+class _FKeys(_LazyObjects):
+    "The foreign keys of a relation object."
+    __slots__ = ()
+
+    def _create(self, name, spec):
+        return FKey(name, self._relation, *spec)
+
 class Relation:
     """Used as a base class for the classes generated by
     `Model.get_relation_class <#half_orm.model.Model.get_relation_class>`_.
@@ -247,11 +445,52 @@ class Relation:
     """
     _ho_fields_aliases = {}
     _rels_ids = {}
+    # the fields and foreign keys of the class (see Relation.__spec).
+    _ho_class_spec = None
+    # the schema of the tenant of a class of the template schema (see Model.tenant).
+    _ho_schema = None
 
     def __init__(self, **kwargs):
         _fqrn = ""
         """The names of the arguments must correspond to the names of the columns in the relation.
         """
+        spec = self.__spec()
+        # the fields and the foreign keys are created on first access (see __getattr__).
+        self.__dict__.update(
+            _ho_fk_loop=set(),
+            _ho_fields=_Fields(self, spec.fields),
+            _ho_fkeys=_FKeys(self, spec.fkeys),
+            _ho_fkeys_attr=spec.fkeys_attr,
+            _ho_join_to={},
+            _ho_is_singleton=False,
+            _ho_only=False,
+            _ho_neg=False,
+            _ho_query="",
+            _ho_query_type=None,
+            _ho_sql_query=[],
+            _ho_sql_values=[],
+            _ho_set_operators=_SetOperators(self),
+            _ho_select_params={},
+            _ho_id_cast=None,
+            _ho_mogrify=False)
+        for name in spec.eager:
+            self.__dict__[name] = self.__lazy_attribute(name)
+        if kwargs:
+            self._ho_check_colums(*kwargs.keys())
+            for field_name, value in kwargs.items():
+                if value is not None:
+                    self._ho_fields[field_name].set(value)
+        self.__dict__['_ho_isfrozen'] = True
+
+    def __spec(self):
+        """Returns the spec of the class (see _Spec). It is computed on the first
+        instantiation and again when the metadata of the relation has been reloaded.
+        """
+        cls = self.__class__
+        relation_meta = self._ho_model._relation_metadata(self._t_fqrn)
+        spec = cls.__dict__.get('_ho_class_spec')
+        if spec is not None and spec.relation_meta is relation_meta:
+            return spec
         module = __import__(self.__module__, globals(), locals(), ['FKEYS_PROPERTIES', 'FKEYS'], 0)
         #TODO: remove in release 1.0.0
         if hasattr(module, 'FKEYS_PROPERTIES') or hasattr(module, 'FKEYS'):
@@ -260,30 +499,47 @@ class Relation:
             err += f'''\tUse the "{utils.Color.bold(self.__class__.__name__ + '.Fkeys')}"''' + \
                 ''' class attribute instead.\n'''
             raise DeprecationWarning(err)
-        self._ho_fk_loop = set()
-        self._ho_fields = {}
-        self._ho_pkey = {}
-        self._ho_ukeys = OrderedDict()
-        self._ho_fkeys = OrderedDict()
-        self._ho_fkeys_attr = set()
-        self._ho_join_to = {}
-        self._ho_is_singleton = False
-        self._ho_only = False
-        self._ho_neg = False
-        self._ho_set_fields()
-        self._ho_set_fkeys()
-        self._ho_query = ""
-        self._ho_query_type = None
-        self._ho_sql_query = []
-        self._ho_sql_values = []
-        self._ho_set_operators = _SetOperators(self)
-        self._ho_select_params = {}
-        self._ho_id_cast = None
-        self._ho_mogrify = False
-        self._ho_check_colums(*kwargs.keys())
-        _ = {self.__dict__[field_name].set(value)
-            for field_name, value in kwargs.items() if value is not None}
-        self._ho_isfrozen = True
+        spec = _Spec(cls, relation_meta)
+        for value in spec.fkeys_attr.values():
+            if value not in spec.fkeys:
+                self.__dict__['_ho_fkeys'] = _FKeys(self, spec.fkeys)
+                raise relation_errors.WrongFkeyError(self, value)
+        cls._ho_class_spec = spec
+        return spec
+
+    def __lazy_attribute(self, name):
+        """Returns the field or the foreign key (Fkeys alias) **name**.
+
+        Raises:
+            KeyError: if **name** is neither a field nor an alias.
+        """
+        if name in self._ho_fields:
+            return self._ho_fields[name]
+        return self._ho_fkeys[self._ho_fkeys_attr[name]]
+
+    def __getattr__(self, name):
+        """Creates the field or the foreign key (Fkeys alias) **name** on its first
+        access as an attribute.
+        """
+        if name.startswith(('_ho_', '__')) or '_ho_fields' not in self.__dict__:
+            raise AttributeError(
+                f"'{self.__class__.__name__}' object has no attribute '{name}'")
+        try:
+            value = self.__dict__[name] = self.__lazy_attribute(name)
+        except KeyError:
+            raise AttributeError(
+                f"'{self.__class__.__name__}' object has no attribute '{name}'") from None
+        return value
+
+    @property
+    def _ho_pkey(self):
+        "The fields of the primary key."
+        return {name: self._ho_fields[name] for name in self.__spec().pkey}
+
+    @property
+    def _ho_ukeys(self):
+        "The unique fields."
+        return {name: self._ho_fields[name] for name in self.__spec().ukeys}
 
     def __call__(self, **kwargs):
         return self.__class__(**kwargs)
@@ -295,6 +551,26 @@ class Relation:
             diff = columns.difference(self._ho_fields.keys())
             raise relation_errors.UnknownAttributeError(', '.join([elt for elt in args if elt in diff]))
 
+    #@utils.trace
+    def _ho_prep_insert(self, *args, fkeys_values=None):
+        """Returns the query and the values of the insert. **fkeys_values** are the
+        values of the foreign keys set on self (see __what).
+        """
+        _ = args and args != ('*',) and self._ho_check_colums(*args)
+        query_template = "insert into {} ({}) values ({})"
+        self._ho_query_type = 'insert'
+        fields_names, values, fk_fields, fk_query, fk_values = self.__what(fkeys_values)
+        what_to_insert = ["%s" for _ in range(len(values))]
+        if fk_fields:
+            fields_names += fk_fields
+            what_to_insert += fk_query
+            values += fk_values
+        query = query_template.format(self._ho_qrn, ", ".join(fields_names), ", ".join(what_to_insert))
+        returning = args or ['*']
+        if returning:
+            query = self._ho_add_returning(query, *returning)
+        return query, tuple(values)
+
     #@utils.trace
     def ho_insert(self, *args) -> '[dict]':
         """Insert a new tuple into the Relation.
@@ -310,31 +586,23 @@ class Relation:
         Note:
             It is not possible to insert more than one row with the insert method
         """
-        _ = args and args != ('*',) and self._ho_check_colums(*args)
-        query_template = "insert into {} ({}) values ({})"
-        self._ho_query_type = 'insert'
-        fields_names, values, fk_fields, fk_query, fk_values = self.__what()
-        what_to_insert = ["%s" for _ in range(len(values))]
-        if fk_fields:
-            fields_names += fk_fields
-            what_to_insert += fk_query
-            values += fk_values
-        query = query_template.format(self._qrn, ", ".join(fields_names), ", ".join(what_to_insert))
-        returning = args or ['*']
-        if returning:
-            query = self._ho_add_returning(query, *returning)
-        with self.__execute(query, tuple(values)) as cursor:
+        query, values = self._ho_prep_insert(*args)
+        with self.__execute(query, values) as cursor:
             res = [dict(elt) for elt in cursor.fetchall()] or [{}]
             return res[0]
 
     #@utils.trace
-    def ho_select(self, *args):
+    def ho_select(self, *args, stream=False, itersize=2000):
         """Gets the set of values correponding to the constraint attached to the object.
         This method is a generator.
 
         Arguments:
             *args: the fields names of the returned attributes. If omitted,
                 all the fields are returned.
+            stream (bool): if True, the rows are fetched from a server side cursor,
+                **itersize** rows at a time, instead of being loaded in memory
+                before the first one is yielded. Use it for large results.
+            itersize (int): the number of rows fetched at a time in stream mode.
 
         Yields:
             the result of the query as a dictionary.
@@ -344,12 +612,242 @@ class Relation:
             >>>     print(person)
             {'id': 1772}
         """
+        if stream:
+            for rows in self.ho_select_batches(itersize, *args):
+                yield from rows
+            return
         self._ho_check_colums(*args)
         query, values = self._ho_prep_select(*args)
-        with self.__execute(query, values) as cursor:
+        with self.__execute(query, values, read=True) as cursor:
             for elt in cursor:
                 yield dict(elt)
 
+    def ho_stream(self, *args, itersize=2000):
+        """Same as `ho_select(*args, stream=True) <#half_orm.relation.Relation.ho_select>`_."""
+        return self.ho_select(*args, stream=True, itersize=itersize)
+
+    def ho_select_batches(self, size, *args):
+        """Same as `ho_select <#half_orm.relation.Relation.ho_select>`_ in stream mode but
+        yields the rows by lists of at most **size** rows.
+
+        Outside of a transaction, the rows are fetched on a dedicated connection,
+        opened outside of the pool and closed when the generator is exhausted or
+        closed. The queries run while iterating don't wait for it.
+
+        Example:
+            >>> for persons in Person().ho_select_batches(1000, 'id'):
+            >>>     process(persons)
+        """
+        self._ho_check_colums(*args)
+        query, values = self._ho_prep_select(*args)
+        for rows in self._ho_model._execute_batches(
+                query, values, size, self._ho_mogrify, read=True):
+            yield [dict(elt) for elt in rows]
+
+    def ho_paginate(self, page_size, *args, order=None, cursor=None, prefetch=False):
+        """Yields the rows of the relation by pages (lists) of at most **page_size**
+        rows, ordered by a key of the relation. Each page is selected after the last
+        row of the previous one (WHERE (k1, k2) > (%s, %s) ORDER BY k1, k2 LIMIT n)
+        instead of skipping the rows with an offset: the time to get a page doesn't
+        depend on its position and the rows inserted meanwhile don't shift the pages.
+
+        Arguments:
+            page_size (int): the maximum number of rows of a page.
+            *args: the fields names of the returned attributes. If omitted,
+                all the fields are returned. The fields of the key are always returned.
+            order (str|list): the fields of the key ordering the pages: the primary
+                key or a unique key whose fields are not null. Defaults to the primary
+                key (or the first unique key if the relation has none).
+            cursor (str): the cursor of a page (Page.cursor). The pagination resumes
+                with the page following it.
+            prefetch (bool): if True, the next page is selected in a thread while the
+                current page is processed. Ignored in a transaction.
+
+        Yields:
+            Page: the rows of the page. Its cursor attribute is the token of the next
+            page (None for the last page).
+
+        Raises:
+            ValueError: if order is not a key of the relation, the cursor is invalid or
+                the type of a field of the key is not supported in a cursor (bool,
+                int, float, numeric, text, uuid, bytea, date, time and timestamp are).
+
+        Example:
+            >>> for page in Person().ho_paginate(1000, 'id', 'last_name'):
+            >>>     export(page)
+            >>>     save(page.cursor)
+        """
+        if int(page_size) <= 0:
+            raise ValueError('page_size must be a positive integer!')
+        self._ho_check_colums(*args)
+        key = self.__page_key(order)
+        if args:
+            args = args + tuple(name for name in key if name not in args)
+        after = None if cursor is None else _decode_cursor(key, cursor)
+        executor = fetch = None
+        if prefetch and self._ho_model._connection is None:
+            executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            query, values = self.__prep_page(args, key, int(page_size), after)
+            if executor:
+                fetch = executor.submit(contextvars.copy_context().run, self.__fetch_page, query, values)
+            while True:
+                rows = fetch.result() if executor else self.__fetch_page(query, values)
+                # one more row is selected to know if the page is the last one.
+                page = Page(rows[:int(page_size)])
+                if len(rows) > int(page_size):
+                    after = [page[-1][name] for name in key]
+                    page.cursor = _encode_cursor(key, after)
+                    query, values = self.__prep_page(args, key, int(page_size), after)
+                    if executor:
+                        fetch = executor.submit(
+                            contextvars.copy_context().run, self.__fetch_page, query, values)
+                if page:
+                    yield page
+                if page.cursor is None:
+                    return
+        finally:
+            if executor:
+                fetch.cancel()
+                executor.shutdown(wait=True)
+
+    def ho_page(self, limit, *args, offset=0, estimate=False):
+        """Returns the page of at most **limit** rows following the first **offset**
+        rows (in the order set by ho_order_by) with the total number of rows of the
+        relation. The rows and the total are selected in a single query (the count
+        is a CTE), even if the page is empty.
+
+        Arguments:
+            limit (int): the maximum number of rows of the page.
+            *args: the fields names of the returned attributes. If omitted,
+                all the fields are returned.
+            offset (int): the number of rows to skip.
+            estimate (bool): if True, the total is the estimate of
+                `ho_count(estimate=True) <#half_orm.relation.Relation.ho_count>`_
+                and the rows are selected without counting them.
+
+        Returns:
+            Page: the rows of the page. Its total attribute is the number of rows of
+            the relation.
+
+        Raises:
+            ValueError: if the relation is limited or has an offset (see ho_limit and
+                ho_offset): the limit and the offset are the ones of the page.
+
+        Example:
+            >>> page = Person(last_name=('like', 'La%')).ho_order_by('id').ho_page(10, 'id', offset=20)
+            >>> page.total
+            42
+        """
+        self._ho_check_colums(*args)
+        if estimate:
+            query, values = self._ho_prep_page(limit, offset, *args, total=False)
+            rows = [dict(elt) for elt in self.__execute(query, values, read=True).fetchall()]
+            return Page(rows, total=self.ho_count(*args, estimate=True))
+        query, values = self._ho_prep_page(limit, offset, *args)
+        rows = [dict(elt) for elt in self.__execute(query, values, read=True).fetchall()]
+        return self.__page_total(rows)
+
+    def _ho_prep_page(self, limit, offset, *args, total=True):
+        """Returns the query and the values of a page (see ho_page). If **total** is
+        True, the rows of the page are left joined to the count of the relation: the
+        count is in the ho_total column and the rows of the page have a true ho_row
+        column. An empty page is a single row with a null ho_row.
+        """
+        if 'limit' in self._ho_select_params or 'offset' in self._ho_select_params:
+            raise ValueError('ho_page is not compatible with ho_limit and ho_offset!')
+        self._ho_query = "select"
+        query, values = self.__prep_cached(
+            ('offset_page', total), args, lambda: self.__build_offset_page(*args, total=total))
+        values += (int(limit), int(offset))
+        if not total:
+            return query, values
+        count_query, count_values = self._ho_prep_count(*args)
+        query = (
+            f'with ho_total as (\n{count_query})\n'
+            'select ho_page.*, ho_total.count as ho_total\n'
+            f'from ho_total left join (\n{query}) as ho_page on true')
+        return query, count_values + values
+
+    def __build_offset_page(self, *args, total):
+        distinct = self._ho_select_params.get('distinct', '')
+        row = ', true as ho_row' if total else ''
+        query, values = self.__prep_query(
+            f"select\n {distinct} {{}}{row}\nfrom\n  {{}} {{}}\n  {{}}", *args)
+        if 'order_by' in self._ho_select_params:
+            query = f"{query} order by {self._ho_select_params['order_by']}"
+        return f"{query} limit %s offset %s", tuple(self._ho_sql_values + values)
+
+    @staticmethod
+    def __page_total(rows):
+        "Returns the Page of the rows, removing the ho_total and ho_row columns."
+        total = rows[0]['ho_total']
+        rows = [row for row in rows if row.pop('ho_row')]
+        for row in rows:
+            row.pop('ho_total')
+        return Page(rows, total=total)
+
+    def __page_key(self, order):
+        "Returns the names of the fields of the key ordering the pages (see ho_paginate)."
+        notnull = {name: metadata['notnull'] for name, metadata in self.__spec().fields.values()}
+        keys = [tuple(self._ho_model._pkey_constraint(self._t_fqrn))] + [
+            tuple(unique) for unique in self._ho_model._unique_constraints_list(self._t_fqrn)]
+        keys = [key for key in keys if key and all(notnull[name] for name in key)]
+        if order is None:
+            if not keys:
+                raise ValueError(f'{self._fqrn} has no primary key or not null unique key!')
+            return keys[0]
+        if isinstance(order, str):
+            order = [name.strip() for name in order.split(',')]
+        order = tuple(order)
+        if not any(set(order) == set(key) and len(order) == len(key) for key in keys):
+            raise ValueError(
+                f'({", ".join(order)}) is not the primary key or a not null unique key of {self._fqrn}!')
+        return order
+
+    def __prep_page(self, args, key, page_size, after):
+        "Returns the query and the values of the page following the key values **after**."
+        query, values = self.__prep_cached(
+            'page', (args, key, after is not None), lambda: self.__build_page(args, key, after is not None))
+        return query, values + tuple(after or ()) + (page_size + 1,)
+
+    def __build_page(self, args, key, seek):
+        rel_id_ = self.ho_id
+        columns = ', '.join(f'r{rel_id_}."{name}"' for name in key)
+        after = ''
+        if seek:
+            # no cast: the values of a cursor are decoded with the types of the key.
+            placeholders = ', '.join('%s' for _ in key)
+            after = f' and\n    ({columns}) > ({placeholders})'
+        query, values = self.__prep_query(
+            f"select\n  {{}}\nfrom\n  {{}} {{}}\n  {{}}{after}\norder by {columns}\nlimit %s", *args)
+        return query, tuple(self._ho_sql_values + values)
+
+    def __fetch_page(self, query, values):
+        "Returns the rows of a page."
+        return [dict(elt) for elt in self.__execute(query, values, read=True).fetchall()]
+
+    @classmethod
+    def ho_template(cls, *args, **kwargs):
+        """Returns a `QueryTemplate <#half_orm.template.QueryTemplate>`_: a select
+        query whose SQL is built once and prepared on the server the first time it is
+        executed on a connection. The fields set to a
+        `Param <#half_orm.template.Param>`_ are the parameters of the query.
+
+        Arguments:
+            *args: the fields names of the returned attributes. If omitted,
+                all the fields are returned.
+            **kwargs: the constraint, as for the constructor of the class.
+
+        Example:
+            >>> from half_orm.template import Param
+            >>> by_name = Person.ho_template(
+            ...     'id', last_name=Param('ln'), birth_date=('>', Param('d')))
+            >>> by_name.execute(ln='La', d='1950-01-01')
+            [{'id': 1772}]
+        """
+        return QueryTemplate(cls(**kwargs), *args)
+
     #@utils.trace
     def ho_get(self, *args: List[str]) -> 'Relation':
         """The get method allows you to fetch a singleton from the database.
@@ -379,18 +877,28 @@ class Relation:
             1772
         """
         self._ho_check_colums(*args)
+        # at most 2 rows are fetched, in a single query, to tell 0, 1 or more.
         self.ho_limit(2)
-        _count = self.ho_count()
-        if _count != 1:
-            raise relation_errors.ExpectedOneError(self, _count)
+        query, values = self._ho_prep_select(*args)
+        rows = self.__execute(query, values, read=True).fetchall()
+        return self.__singleton(rows)
+
+    def __singleton(self, rows):
+        """Returns the relation object of the row if **rows** holds exactly one row.
+
+        Raises:
+            ExpectedOneError: if **rows** is empty or holds more than one row.
+        """
+        if len(rows) != 1:
+            raise relation_errors.ExpectedOneError(self, len(rows))
         self._ho_is_singleton = True
-        ret = self(**(next(self.ho_select(*args))))
+        ret = self(**rows[0])
         ret._ho_is_singleton = True
         return ret
 
     #@utils.trace
-    def __fkey_where(self, where, values):
-        _, _, fk_fields, fk_query, fk_values = self.__what()
+    def __fkey_where(self, where, values, fkeys_values=None):
+        _, _, fk_fields, fk_query, fk_values = self.__what(fkeys_values)
         if fk_fields:
             fk_where = " and ".join([f"({a}) in ({b})" for a, b in zip(fk_fields, fk_query)])
             if fk_where:
@@ -399,11 +907,10 @@ class Relation:
         return where, values
 
     #@utils.trace
-    def ho_update(self, *args, update_all=False, **kwargs):
-        """
-        kwargs represents the values to be updated {[field name:value]}
-        The object self must be set unless update_all is True.
-        The constraints of self are updated with kwargs.
+    def _ho_prep_update(self, *args, update_all=False, fkeys_values=None, **kwargs):
+        """Returns the query, the values and the new values of the update.
+
+        The query is None if there is nothing to update.
         """
         if not (self.ho_is_set() or update_all):
             raise RuntimeError(
@@ -414,15 +921,38 @@ class Relation:
         self._ho_check_colums(*(kwargs.keys()))
         update_args = {key: value for key, value in kwargs.items() if value is not None}
         if not update_args:
-            return None # no new value update. Should we raise an error here?
-
+            return None, None, update_args # no new value update. Should we raise an error here?
+
+        if SQL_CACHE.maxsize <= 0 or self.__fkeys_are_set():
+            return (*self.__build_update(args, update_args, fkeys_values), update_args)
+        key = ['update', self._ho_model._tenant(), self.__class__, tuple(update_args), args]
+        where_values = []
+        self.__shape_where(None, key, where_values)
+        values = list(update_args.values()) + where_values
+        query = self.__cached_query(
+            tuple(key), values, {}, lambda: self.__build_update(args, update_args))
+        return query, tuple(values), update_args
+
+    def __build_update(self, args, update_args, fkeys_values=None):
         query_template = "update {} set {} {}"
         what, where, values = self.__update_args(**update_args)
-        where, values = self.__fkey_where(where, values)
-        query = query_template.format(self._qrn, what, where)
+        where, values = self.__fkey_where(where, values, fkeys_values)
+        query = query_template.format(self._ho_qrn, what, where)
         if args:
             query = self._ho_add_returning(query, *args)
-        with self.__execute(query, tuple(values)) as cursor:
+        return query, tuple(values)
+
+    #@utils.trace
+    def ho_update(self, *args, update_all=False, **kwargs):
+        """
+        kwargs represents the values to be updated {[field name:value]}
+        The object self must be set unless update_all is True.
+        The constraints of self are updated with kwargs.
+        """
+        query, values, update_args = self._ho_prep_update(*args, update_all=update_all, **kwargs)
+        if query is None:
+            return None
+        with self.__execute(query, values) as cursor:
             for field_name, value in update_args.items():
                 self._ho_fields[field_name].set(value)
             if args:
@@ -430,26 +960,42 @@ class Relation:
         return None
 
     #@utils.trace
-    def ho_delete(self, *args, delete_all=False):
-        """Removes a set of tuples from the relation.
-        To empty the relation, delete_all must be set to True.
-        """
+    def _ho_prep_delete(self, *args, delete_all=False, fkeys_values=None):
+        "Returns the query and the values of the delete."
         _ = args and args != ('*',) and self._ho_check_colums(*args)
         if not (self.ho_is_set() or delete_all):
             raise RuntimeError(
                 f'Attempt to delete all rows from {self.__class__.__name__}'
                 ' without delete_all being set to True!')
+        if SQL_CACHE.maxsize <= 0 or self.__fkeys_are_set():
+            return self.__build_delete(args, fkeys_values)
+        self.__check_fkeys()
+        key = ['delete', self._ho_model._tenant(), self.__class__, args]
+        values = []
+        self.__shape_where(None, key, values)
+        return self.__cached_query(
+            tuple(key), values, {}, lambda: self.__build_delete(args)), tuple(values)
+
+    def __build_delete(self, args, fkeys_values=None):
         query_template = "delete from {} {}"
         _, values = self.__prep_query(query_template)
         self._ho_query_type = 'delete'
         _, where, _ = self.__where_args()
-        where, values = self.__fkey_where(where, values)
+        where, values = self.__fkey_where(where, values, fkeys_values)
         if where:
             where = f" where {where}"
-        query = f"delete from {self._qrn} {where}"
+        query = f"delete from {self._ho_qrn} {where}"
         if args:
             query = self._ho_add_returning(query, *args)
-        with self.__execute(query, tuple(values)) as cursor:
+        return query, tuple(values)
+
+    #@utils.trace
+    def ho_delete(self, *args, delete_all=False):
+        """Removes a set of tuples from the relation.
+        To empty the relation, delete_all must be set to True.
+        """
+        query, values = self._ho_prep_delete(*args, delete_all=delete_all)
+        with self.__execute(query, values) as cursor:
             if args:
                 return [dict(elt) for elt in cursor.fetchall()]
         return None
@@ -480,15 +1026,31 @@ class Relation:
             object.__setattr__(self, '_ho_isfrozen', False)
         if self._ho_isfrozen and not hasattr(self, key):
             raise relation_errors.IsFrozenError(self.__class__, key)
-        if self.__dict__.get(key) and isinstance(self.__dict__[key], Field):
-            self.__dict__[key].set(value)
+        if key in self.__dict__.get('_ho_fields', ()):
+            self._ho_fields[key].set(value)
             return
         object.__setattr__(self, key, value)
 
     #@utils.trace
-    def __execute(self, query, values):
+    def __execute(self, query, values, read=False):
+        if read:
+            return self._ho_model._execute_read(query, values, self._ho_mogrify)
         return self._ho_model.execute_query(query, values, self._ho_mogrify)
 
+    async def __aexecute(self, query, values):
+        """Executes the query with the AsyncModel the relation is bound to.
+
+        Returns:
+            List[dict] | None: the rows returned by the query.
+        """
+        try:
+            aexecute_query = self._ho_model.aexecute_query
+        except AttributeError as exc:
+            raise RuntimeError(
+                f'{self.__class__.__name__} is not bound to an AsyncModel. '
+                'Use AsyncModel.get_relation_class to use the async methods.') from exc
+        return await aexecute_query(query, values, self._ho_mogrify)
+
     @property
     def ho_id(self):
         """Return the _ho_id_cast or the id of the relation.
@@ -508,46 +1070,15 @@ class Relation:
             raise ValueError(f'{value} is not a bool!')
         self._ho_only = value
 
-    def __py_field_name(self, name, field_num):
-        py_name = self._ho_fields_aliases.get(name, name)
+    @classmethod
+    def __py_field_name(cls, name, field_num):
+        py_name = cls._ho_fields_aliases.get(name, name)
         error = utils.check_attribute_name(py_name)
         if error is not None:
             utils.warning(f"{error}\n", 'HALFORM')
             return f'column{field_num}'
         return py_name
 
-    def _ho_set_fields(self):
-        """Initialise the fields of the relation."""
-        _fields_metadata = self._ho_model._fields_metadata(self._t_fqrn)
-
-        for field_name, f_metadata in _fields_metadata.items():
-            field = Field(field_name, self, f_metadata)
-            field_name = self.__py_field_name(field_name, f_metadata['fieldnum'])
-            self._ho_fields[field_name] = field
-            setattr(self, field_name, field)
-            if field._is_part_of_pk():
-                self._ho_pkey[field_name] = field
-            if field._is_unique():
-                self._ho_ukeys[field_name] = field
-
-    def _ho_set_fkeys(self):
-        """Initialisation of the foreign keys of the relation"""
-        #pylint: disable=import-outside-toplevel
-        from half_orm.fkey import FKey
-
-        _fkeys_metadata = self._ho_model._fkeys_metadata(self._t_fqrn)
-        for fkeyname, f_metadata in _fkeys_metadata.items():
-            self._ho_fkeys[fkeyname] = FKey(fkeyname, self, *f_metadata)
-        if hasattr(self.__class__, 'Fkeys') and not self._ho_fkeys_properties:
-            for key, value in self.Fkeys.items():
-                try:
-                    if key != '': # we skip empty keys
-                        setattr(self, key, self._ho_fkeys[value])
-                        self._ho_fkeys_attr.add(key)
-                except KeyError as exp:
-                    raise relation_errors.WrongFkeyError(self, value) from exp
-        self._ho_fkeys_properties = True
-
     @classmethod
     def _ho_dataclass_name(cls):
         database, schema, relation = cls._t_fqrn
@@ -558,7 +1089,7 @@ class Relation:
     def ho_dict(self):
         """Returns a dictionary containing only the values of the fields
         that are set."""
-        return {key:field.value for key, field in self._ho_fields.items() if field.is_set()}
+        return {key:field.value for key, field in self._ho_fields.created().items() if field.is_set()}
 
     def keys(self):
         return self._ho_fields.keys()
@@ -574,7 +1105,7 @@ class Relation:
         """Returns a dictionary containing the values and comparators of the fields
         that are set."""
         return {key:(field._comp(), field.value) for key, field in
-                self._ho_fields.items() if field.is_set()}
+                self._ho_fields.created().items() if field.is_set()}
 
     def __repr__(self):
 
@@ -641,11 +1172,11 @@ Fkeys = {"""
             joined_to |= jt_.ho_is_set()
         self._ho_fk_loop = set()
         return (joined_to or bool(self._ho_set_operators.operator) or bool(self._ho_neg) or
-                bool({field for field in self._ho_fields.values() if field.is_set()}))
+                any(field.is_set() for field in self._ho_fields.created().values()))
 
     def __get_set_fields(self):
         """Returns a list containing only the fields that are set."""
-        return [field for field in self._ho_fields.values() if field.is_set()]
+        return [field for field in self._ho_fields.created().values() if field.is_set()]
 
     #@utils.trace
     def __walk_op(self, rel_id_, out=None, _fields_=None):
@@ -675,9 +1206,19 @@ Fkeys = {"""
             _fields_ += self.__get_set_fields()
         return out, _fields_
 
+    @property
+    def _ho_qrn(self):
+        """The qualified name of the relation in the queries. For a relation of the
+        template schema, the schema of the tenant replaces the template schema.
+        """
+        schema = self._ho_schema or self._ho_model._tenant_schema(self._schemaname)
+        if schema is None:
+            return self._qrn
+        return f'"{schema}"."{self._relationname}"'
+
     def _ho_sql_id(self):
         """Returns the FQRN as alias for the sql query."""
-        return f"{self._qrn} as r{self.ho_id}"
+        return f"{self._ho_qrn} as r{self.ho_id}"
 
     #@utils.trace
     def __get_from(self, orig_rel=None, deja_vu=None):
@@ -725,10 +1266,70 @@ Fkeys = {"""
         s_where = ''.join(s_where)
         return what, s_where, set_fields
 
+    def __shape_where(self, alias, key, values):
+        """Mirrors __walk_op: appends the shape of the where clause to key and
+        the set fields to values, in the order of the query.
+        """
+        if self._ho_set_operators.operator:
+            key.append((self._ho_neg, self._ho_set_operators.operator))
+            self._ho_set_operators.left.__shape_where(alias, key, values)
+            if self._ho_set_operators.right is not None:
+                self._ho_set_operators.right.__shape_where(alias, key, values)
+            key.append(None)
+        else:
+            set_fields = self.__get_set_fields()
+            key.append((
+                self.__class__, self._ho_schema, self._ho_neg, tuple(field._shape() for field in set_fields)))
+            values += set_fields
+
+    def __shape_from(self, alias, key, values):
+        "Mirrors __get_from: appends the shape of the joins to key and their fields to values."
+        for fkey, fk_rel in self._ho_join_to.items():
+            fk_rel.__shape_from(alias, key, values)
+            key.append((fk_rel.__class__, fk_rel._ho_schema, alias(fk_rel), fkey._join_shape(self, alias)))
+            fk_rel.__shape_where(alias, key, values)
+
+    def __cached_query(self, key, values, ids, build):
+        """Returns the query for key from the SQL cache. On a miss, the query is
+        built with build() and stored with canonical aliases (r0, r1...).
+
+        values are the fields collected while computing the key. The query is not
+        stored if they differ from the ones returned by build().
+        """
+        query = SQL_CACHE.get(key)
+        if query is not None:
+            return query
+        query, built_values = build()
+        if len(built_values) == len(values) and all(
+                built is value for built, value in zip(built_values, values)):
+            canonical_query = _canonical_aliases(query, ids)
+            if canonical_query is not None:
+                SQL_CACHE.set(key, canonical_query)
+                return canonical_query
+        return query
+
+    def __fkeys_are_set(self):
+        """Returns True if a foreign key of self is set. The values of the foreign keys
+        are then fetched to build the update and delete queries (see __fkey_where).
+        """
+        return any(fkey.is_set() for fkey in self._ho_fkeys.created().values())
+
+    def __check_fkeys(self):
+        "Checks that the foreign keys attributes are still FKey objects."
+        for fkey_name in self._ho_fkeys_attr:
+            if fkey_name not in self.__dict__:
+                continue
+            fkey_cls = self.__dict__[fkey_name].__class__
+            if fkey_cls != FKey:
+                raise RuntimeError(
+                    f'self.{fkey_name} is not a FKey (got a {fkey_cls.__name__} object instead).\n'
+                    f'- use: self.{fkey_name}.set({fkey_cls.__name__}(...))\n'
+                    f'- not: self.{fkey_name} = {fkey_cls.__name__}(...)'
+                    )
+
     #@utils.trace
     def __prep_query(self, query_template, *args):
         """Prepare the SQL query to be executed."""
-        from half_orm.fkey import FKey
         self._ho_sql_values = []
         self._ho_query_type = 'select'
         what, where, values = self.__where_args(*args)
@@ -738,15 +1339,7 @@ Fkeys = {"""
         for idx, elt in reversed(list(enumerate(self._ho_sql_query))):
             if elt.find('\n  join ') == 0 and self._ho_sql_query.count(elt) > 1:
                 self._ho_sql_query[idx] = '  and\n'
-        # check that fkeys are fkeys
-        for fkey_name in self._ho_fkeys_attr:
-            fkey_cls = self.__dict__[fkey_name].__class__
-            if fkey_cls != FKey:
-                raise RuntimeError(
-                    f'self.{fkey_name} is not a FKey (got a {fkey_cls.__name__} object instead).\n'
-                    f'- use: self.{fkey_name}.set({fkey_cls.__name__}(...))\n'
-                    f'- not: self.{fkey_name} = {fkey_cls.__name__}(...)'
-                    )
+        self.__check_fkeys()
         return (
             query_template.format(
                 what,
@@ -756,6 +1349,34 @@ Fkeys = {"""
 
     #@utils.trace
     def _ho_prep_select(self, *args):
+        """Returns the query and the values of the select.
+
+        The query is taken from the SQL cache if a relation with the same shape
+        has already been selected (see the `sql_cache <#module-half_orm.sql_cache>`_ module).
+        """
+        return self.__prep_cached('select', args, lambda: self.__build_select(*args))
+
+    def __prep_cached(self, query_type, args, build):
+        """Returns the query and the values built by build(), taking the query
+        from the SQL cache if possible.
+        """
+        if SQL_CACHE.maxsize <= 0:
+            return build()
+        self.__check_fkeys()
+        ids = {}
+        def alias(relation):
+            return ids.setdefault(relation.ho_id, len(ids))
+        key = [
+            query_type, self._ho_model._tenant(), alias(self), self._ho_only, args,
+            tuple(self._ho_select_params.items())]
+        where_values = []
+        self.__shape_where(alias, key, where_values)
+        join_values = []
+        self.__shape_from(alias, key, join_values)
+        values = join_values + where_values
+        return self.__cached_query(tuple(key), values, ids, build), tuple(values)
+
+    def __build_select(self, *args):
         distinct = self._ho_select_params.get('distinct', '')
         query_template = f"select\n {distinct} {{}}\nfrom\n  {{}} {{}}\n  {{}}"
         query, values = self.__prep_query(query_template, *args)
@@ -781,9 +1402,10 @@ Fkeys = {"""
     def ho_unaccent(self, *fields_names):
         "Sets unaccent for each field listed in fields_names"
         for field_name in fields_names:
-            if not isinstance(self.__dict__[field_name], Field):
+            field = getattr(self, field_name, None)
+            if not isinstance(field, Field):
                 raise ValueError(f'{field_name} is not a Field!')
-            self.__dict__[field_name].unaccent = True
+            field.unaccent = True
         return self
 
     def ho_order_by(self, _order_):
@@ -813,20 +1435,110 @@ Fkeys = {"""
         self._ho_mogrify = True
         return self
 
-    # @utils.trace
-    def ho_count(self, *args):
-        """Returns the number of tuples matching the intention in the relation.
+    def __is_windowed(self):
+        "Returns True if the select is distinct, limited or has an offset."
+        params = self._ho_select_params
+        return bool(params.get('distinct') or 'limit' in params or 'offset' in params)
+
+    def _ho_prep_count(self, *args, max=None):
+        """Returns the query and the values of the count.
+
+        The select is only wrapped in a subquery if it is distinct, limited or has
+        an offset, or if the count is bounded by **max**.
         """
         self._ho_query = "select"
+        if max is None and not self.__is_windowed():
+            return self.__prep_cached('count', (), self.__build_count)
         query, values = self._ho_prep_select(*args)
+        if max is not None:
+            query = f'select 1 from ({query}) as ho_max limit {int(max)}'
         query = f'select\n  count(*) from ({query}) as ho_count'
-        return self.__execute(query, values).fetchone()['count']
+        return query, values
+
+    def __build_count(self):
+        query, values = self.__prep_query("select\n  count(*)\nfrom\n  {1} {2}\n  {3}")
+        return query, tuple(self._ho_sql_values + values)
+
+    def _ho_prep_estimate(self):
+        """Returns the query and the values of the number of rows of the relation
+        (and of the tables inheriting from it) according to pg_class.reltuples, or
+        None if self is constrained. The count is null if a table has never been
+        analyzed.
+        """
+        if self._ho_join_to or self.ho_is_set() or self.__is_windowed():
+            return None
+        inherits = ''
+        if not self._ho_only:
+            inherits = (
+                '\n    union all'
+                '\n    select inhrelid from pg_inherits join relations on inhparent = relations.oid')
+        query = (
+            f'with recursive relations as (\n    select %s::regclass::oid as oid{inherits})\n'
+            'select\n  case when bool_and(reltuples >= 0) then sum(reltuples)::bigint end as count\n'
+            "from pg_class where oid in (select oid from relations) and relkind <> 'p'")
+        return query, (self._ho_qrn,)
+
+    def _ho_prep_explain(self, *args):
+        "Returns the query and the values of the plan of the select (JSON format)."
+        query, values = self._ho_prep_select(*args)
+        return f'explain (format json) {query}', values
+
+    @staticmethod
+    def _ho_plan_rows(plan):
+        "Returns the number of rows estimated by the planner in the plan."
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    # @utils.trace
+    def ho_count(self, *args, estimate=False, max=None):
+        """Returns the number of tuples matching the intention in the relation.
+
+        Args:
+            *args: the fields of the select (relevant with ho_distinct).
+            estimate (bool): if True, returns the estimate of the planner instead of
+                counting the rows. For a relation that is not constrained, the
+                estimate is the number of rows in the statistics (pg_class.reltuples).
+            max (int): if set, counts the rows up to **max**. The scan of the
+                relation stops as soon as **max** rows are found.
+
+        Example:
+            >>> Post().ho_count(max=10000)
+            10000
+            >>> Post().ho_count(estimate=True)
+            1253912
+        """
+        if estimate:
+            count = None
+            reltuples = self._ho_prep_estimate()
+            if reltuples is not None:
+                count = self.__execute(*reltuples, read=True).fetchone()['count']
+            if count is None:
+                query, values = self._ho_prep_explain(*args)
+                count = self._ho_plan_rows(
+                    self.__execute(query, values, read=True).fetchone()['QUERY PLAN'])
+            return count if max is None else min(count, max)
+        query, values = self._ho_prep_count(*args, max=max)
+        return self.__execute(query, values, read=True).fetchone()['count']
+
+    def _ho_prep_exists(self, *relations):
+        """Returns the query and the values of a select returning True if none of the
+        **relations** has a row (an "empty" boolean column). The query stops at the
+        first row found (NOT EXISTS).
+        """
+        queries = []
+        values = ()
+        for relation in relations:
+            query, query_values = relation._ho_prep_select()
+            queries.append(f'not exists ({query})')
+            values += query_values
+        return f'select {" and ".join(queries)} as empty', values
 
     def ho_is_empty(self):
         """Returns True if the relation is empty, False otherwise.
         """
-        self.ho_limit(1)
-        return self.ho_count() == 0
+        query, values = self._ho_prep_exists(self)
+        return self.__execute(query, values, read=True).fetchone()['empty']
 
     #@utils.trace
     def __update_args(self, **kwargs):
@@ -843,19 +1555,25 @@ Fkeys = {"""
         return what, where, new_values + values
 
     #@utils.trace
-    def __what(self):
+    def __what(self, fkeys_values=None):
         """Returns the constrained fields and foreign keys.
+
+        The values of the foreign keys set on self are fetched with FKey.values unless
+        they are given in **fkeys_values** ({fkey: values}, see __afkeys_values).
         """
         set_fields = self.__get_set_fields()
         fields_names = [
-            f'"{field.name}"' for field in self._ho_fields.values() if field.is_set()]
+            f'"{field.name}"' for field in set_fields]
         fk_fields = []
         fk_queries = ''
         fk_values = []
-        for fkey in self._ho_fkeys.values():
+        for fkey in self._ho_fkeys.created().values():
             fk_prep_select = fkey._fkey_prep_select()
             if fk_prep_select is not None:
-                fk_values += list(fkey.values()[0])
+                if fkeys_values is None:
+                    fk_values += list(fkey.values()[0])
+                else:
+                    fk_values += fkeys_values[fkey]
                 fk_fields += fk_prep_select[0]
                 fk_queries = ["%s" for _ in range(len(fk_values))]
 
@@ -935,12 +1653,14 @@ Fkeys = {"""
         return self
 
     def __contains__(self, right):
-        return (right - self).ho_count() == 0
+        return (right - self).ho_is_empty()
 
     def __eq__(self, right):
         if id(self) == id(right):
             return True
-        return self in right and right in self
+        # self in right and right in self, in a single query.
+        query, values = self._ho_prep_exists(self - right, right - self)
+        return self.__execute(query, values, read=True).fetchone()['empty']
 
     def __enter__(self):
         """Context management entry
@@ -969,12 +1689,107 @@ Fkeys = {"""
 
     def __iter__(self):
         query, values = self._ho_prep_select()
-        for elt in self.__execute(query, values):
+        for elt in self.__execute(query, values, read=True):
             yield dict(elt)
 
     def __next__(self):
         return next(self.ho_select())
 
+    # async counterparts. The relation must be bound to an AsyncModel.
+
+    async def ho_ainsert(self, *args) -> '[dict]':
+        """Async version of `ho_insert <#half_orm.relation.Relation.ho_insert>`_.
+
+        """
+        query, values = self._ho_prep_insert(*args, fkeys_values=await self.__afkeys_values())
+        res = await self.__aexecute(query, values) or [{}]
+        return res[0]
+
+    async def ho_aselect(self, *args):
+        """Async version of `ho_select <#half_orm.relation.Relation.ho_select>`_.
+        This method is an async generator.
+
+        Example:
+            >>> async for person in Person(last_name=('like', 'La%')).ho_aselect('id'):
+            >>>     print(person)
+            {'id': 1772}
+        """
+        self._ho_check_colums(*args)
+        query, values = self._ho_prep_select(*args)
+        for elt in await self.__aexecute(query, values):
+            yield elt
+
+    async def ho_aget(self, *args: List[str]) -> 'Relation':
+        """Async version of `ho_get <#half_orm.relation.Relation.ho_get>`_."""
+        self._ho_check_colums(*args)
+        self.ho_limit(2)
+        query, values = self._ho_prep_select(*args)
+        return self.__singleton(await self.__aexecute(query, values))
+
+    async def ho_aupdate(self, *args, update_all=False, **kwargs):
+        """Async version of `ho_update <#half_orm.relation.Relation.ho_update>`_."""
+        query, values, update_args = self._ho_prep_update(
+            *args, update_all=update_all, fkeys_values=await self.__afkeys_values(), **kwargs)
+        if query is None:
+            return None
+        res = await self.__aexecute(query, values)
+        for field_name, value in update_args.items():
+            self._ho_fields[field_name].set(value)
+        if args:
+            return res
+        return None
+
+    async def ho_adelete(self, *args, delete_all=False):
+        """Async version of `ho_delete <#half_orm.relation.Relation.ho_delete>`_."""
+        query, values = self._ho_prep_delete(
+            *args, delete_all=delete_all, fkeys_values=await self.__afkeys_values())
+        res = await self.__aexecute(query, values)
+        if args:
+            return res
+        return None
+
+    async def __afkeys_values(self):
+        """Async version of FKey.values for the foreign keys set on self. Returns
+        {fkey: the values of the first row of the foreign relation}.
+        """
+        fkeys_values = {}
+        for fkey in self._ho_fkeys.created().values():
+            fk_prep_select = fkey._fkey_prep_select()
+            if fk_prep_select is not None:
+                rows = await self.__aexecute(*fk_prep_select[1])
+                fkeys_values[fkey] = list(rows[0].values())
+        return fkeys_values
+
+    async def ho_apage(self, limit, *args, offset=0, estimate=False):
+        """Async version of `ho_page <#half_orm.relation.Relation.ho_page>`_."""
+        self._ho_check_colums(*args)
+        if estimate:
+            query, values = self._ho_prep_page(limit, offset, *args, total=False)
+            rows = await self.__aexecute(query, values)
+            return Page(rows, total=await self.ho_acount(*args, estimate=True))
+        query, values = self._ho_prep_page(limit, offset, *args)
+        rows = await self.__aexecute(query, values)
+        return self.__page_total(rows)
+
+    async def ho_acount(self, *args, estimate=False, max=None):
+        """Async version of `ho_count <#half_orm.relation.Relation.ho_count>`_."""
+        if estimate:
+            count = None
+            reltuples = self._ho_prep_estimate()
+            if reltuples is not None:
+                count = (await self.__aexecute(*reltuples))[0]['count']
+            if count is None:
+                query, values = self._ho_prep_explain(*args)
+                count = self._ho_plan_rows((await self.__aexecute(query, values))[0]['QUERY PLAN'])
+            return count if max is None else min(count, max)
+        query, values = self._ho_prep_count(*args, max=max)
+        return (await self.__aexecute(query, values))[0]['count']
+
+    async def ho_ais_empty(self):
+        """Async version of `ho_is_empty <#half_orm.relation.Relation.ho_is_empty>`_."""
+        query, values = self._ho_prep_exists(self)
+        return (await self.__aexecute(query, values))[0]['empty']
+
     # deprecated. To remove with release 1.0.0
 
     @utils._ho_deprecated
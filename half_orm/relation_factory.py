@@ -1,6 +1,7 @@
 "This module provides the factory function"
 
 import sys
+import threading
 from functools import wraps
 
 from half_orm import pg_meta
@@ -8,6 +9,13 @@ from half_orm import model_errors
 from half_orm import utils
 from half_orm.relation import Relation
 
+# Guards the class registries (Model._classes_, Relation._rels_ids) shared by the threads.
+_LOCK = threading.RLock()
+
+# (structure fingerprint, schema, relation) -> the class shared by the databases whose
+# metadata is shared (see PgMeta). The class of a database inherits from it.
+_SHARED_CLASSES = {}
+
 def register_class(relation_class):
     try:
         rel_id = id(relation_class)
@@ -17,8 +25,9 @@ def register_class(relation_class):
         dbname = model._dbname
         schemaname, relationname = relation_class._qrn.replace('"', '').split('.')
         key = (dbname, schemaname, relationname)
-        model._classes_[dbname][key] = relation_class
-        relation_class._rels_ids[rel_id] = key
+        with _LOCK:
+            model._classes_[dbname][key] = relation_class
+            relation_class._rels_ids[rel_id] = key
         return relation_class
     except AttributeError as exc:
         raise ValueError(f"Invalid relation class: {exc}")
@@ -40,15 +49,40 @@ def factory(dct):
     Raises:
         UnknownRelationError: if the specified relation does not exist in the database.
     """
-    def _gen_class_name(rel_kind, sfqrn):
-        """Generates class name from relation kind and FQRN tuple"""
-        class_name = "".join([elt.capitalize() for elt in
-                            [elt.replace('.', '') for elt in sfqrn]])
-        return f"{rel_kind}_{class_name}"
+    with _LOCK:
+        return _factory(dct)
+
+def _gen_class_name(rel_kind, sfqrn):
+    """Generates class name from relation kind and FQRN tuple"""
+    class_name = "".join([elt.capitalize() for elt in
+                        [elt.replace('.', '') for elt in sfqrn]])
+    return f"{rel_kind}_{class_name}"
+
+def _shared_class(model, fqrn, metadata, fingerprint):
+    """Returns the class of the relation **fqrn** shared by the databases with the same
+    structure **fingerprint**. It holds everything but the model: the attributes bound
+    to a database are set by the class of each database inheriting from it.
+    Called with _LOCK held.
+    """
+    key = (fingerprint,) + tuple(fqrn[1:])
+    shared_class = _SHARED_CLASSES.get(key)
+    if shared_class is None:
+        bases = [
+            _shared_class(model, parent, model._relation_metadata(parent), fingerprint)
+            for parent in sorted(metadata['inherits'])] or [Relation]
+        rel_kind = pg_meta.REL_CLASS_NAMES[metadata['tablekind']]
+        shared_class = _SHARED_CLASSES[key] = type(_gen_class_name(rel_kind, fqrn[1:]), tuple(bases), {
+            '_qrn': pg_meta.normalize_qrn(fqrn),
+            '_schemaname': fqrn[1],
+            '_relationname': fqrn[2],
+            '_ho_metadata': metadata,
+            '_ho_kind': rel_kind})
+    return shared_class
 
+def _factory(dct):
+    "Generates the class. Called by factory with _LOCK held."
     bases = [Relation,]
     tbl_attr = {}
-    tbl_attr['_ho_fkeys_properties'] = False
     tbl_attr['_qrn'] = pg_meta.normalize_qrn(dct['fqrn'])
 
     tbl_attr.update(dict(zip(['_dbname', '_schemaname', '_relationname'], dct['fqrn'])))
@@ -65,6 +99,19 @@ def factory(dct):
             metadata = model._relation_metadata(dct['fqrn'])
         except KeyError as exc:
             raise model_errors.UnknownRelation(dct['fqrn']) from exc
+        fingerprint = model._shared_metadata()
+        if fingerprint is not None:
+            # only the attributes bound to the database, the others are shared.
+            db_attr = {key: tbl_attr[key] for key in
+                       ('_dbname', '_ho_model', '_ho_fields_aliases')}
+            db_attr['_ho_metadata'] = metadata
+            db_attr['_t_fqrn'] = dct['fqrn']
+            db_attr['_fqrn'] = pg_meta.normalize_fqrn(dct['fqrn'])
+            rel_class = type(
+                _gen_class_name(pg_meta.REL_CLASS_NAMES[metadata['tablekind']], dct['fqrn']),
+                (_shared_class(model, dct['fqrn'], metadata, fingerprint),), db_attr)
+            model._classes_[dbname][dct['fqrn']] = rel_class
+            return rel_class
         if metadata['inherits']:
             metadata['inherits'].sort()
             bases = []
@@ -78,3 +125,52 @@ def factory(dct):
         rel_class = type(class_name, tuple(bases), tbl_attr)
         model._classes_[tbl_attr['_dbname']][dct['fqrn']] = rel_class
     return rel_class
+
+def tenant_factory(dct, schema):
+    """Returns the class of the relation **dct['fqrn']** of the template schema bound to
+    the tenant **schema**: a subclass of the class of the template relation (see the
+    ``[tenants]`` section of the config file of the `Model <#half_orm.model.Model>`_).
+    The metadata and the fields of the template relation are used.
+    """
+    with _LOCK:
+        template_class = _factory(dct)
+        dbname, _, relation = dct['fqrn']
+        fqrn = (dbname, schema, relation)
+        classes = dct['model']._classes_[dbname]
+        rel_class = classes.get(fqrn)
+        if rel_class is None or rel_class.__bases__ != (template_class,):
+            rel_class = classes[fqrn] = type(template_class.__name__, (template_class,), {
+                '_ho_schema': schema,
+                '_fqrn': pg_meta.normalize_fqrn(fqrn)})
+        return rel_class
+
+def refresh(model, fqrns):
+    """Regenerates the classes of the relations **fqrns** after a reload of their metadata
+    (see `Model._reload_relations <#half_orm.model.Model._reload_relations>`_), and the
+    classes inheriting from them. The classes of the relations that no longer exist are
+    removed.
+
+    The classes registered with `register_class` are kept: only their metadata is updated.
+
+    Returns:
+        list: the fqrn of the classes regenerated or removed.
+    """
+    with _LOCK:
+        classes = model._classes_.get(model._dbname, {})
+        stale = {
+            fqrn: rel_class for fqrn, rel_class in classes.items()
+            if any(getattr(base, '_t_fqrn', None) in fqrns for base in rel_class.__mro__)}
+        for fqrn, rel_class in stale.items():
+            if '_ho_metadata' in vars(rel_class):
+                del classes[fqrn]
+        for fqrn, rel_class in stale.items():
+            try:
+                if '_ho_metadata' not in vars(rel_class):
+                    rel_class._ho_metadata = model._relation_metadata(fqrn)
+                elif fqrn not in classes:
+                    _factory({
+                        'fqrn': fqrn, 'model': model,
+                        'fields_aliases': rel_class._ho_fields_aliases})
+            except (KeyError, model_errors.UnknownRelation):
+                classes.pop(fqrn, None)
+        return list(stale)
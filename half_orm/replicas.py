@@ -0,0 +1,233 @@
+#-*- coding: utf-8 -*-
+
+"""This module provides the ReplicaSet class used by the `Model <#half_orm.model.Model>`_
+class to route the read queries to the read replicas of the database.
+
+The replicas are declared in the ``[replicas]`` section of the config file::
+
+    [replicas]
+    hosts = replica1, replica2:5433
+    weights = 3, 1
+    read_your_writes = 1
+    max_lag = 10
+    retry_after = 30
+    check_interval = 5
+
+* hosts: the replicas (``host[:port]``). The port defaults to the port of the primary;
+* weights: the share of the read queries sent to each replica (1 by default);
+* read_your_writes: after a write, the reads of the same thread/task go to the
+  primary for this number of seconds (1 by default);
+* max_lag: a replica more than *max_lag* seconds behind the primary is not used
+  (no limit by default). The lag is checked at most every *check_interval* seconds;
+* retry_after: a replica that can't be reached is not used for *retry_after* seconds.
+
+The read queries go to the primary when no replica is available.
+
+Each replica has its own `ConnectionPool <#half_orm.pool.ConnectionPool>`_ configured
+as the pool of the primary, except that no connection is opened at startup.
+"""
+
+import random
+import threading
+import time
+
+from half_orm.pool import ConnectionPool
+
+LAG_QUERY = """
+select
+  case
+    when pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() then 0
+    else coalesce(extract(epoch from now() - pg_last_xact_replay_timestamp()), 0)
+  end as lag
+"""
+
+class Replica:
+    """A read replica and its pool of connections.
+
+    Attributes:
+        host (str), port (str): the address of the replica.
+        weight (float): the share of the read queries sent to the replica.
+        pool (ConnectionPool): the connections to the replica.
+        down_until (float): the replica is not used until this time (time.monotonic).
+        lag (float): the replication lag measured at the last check (seconds).
+    """
+    def __init__(self, host, port, weight, pool):
+        self.host = host
+        self.port = port
+        self.weight = weight
+        self.pool = pool
+        self.down_until = 0.
+        self.lag = 0.
+        self.checked_at = None
+
+    def __repr__(self):
+        return f"Replica({self.host}:{self.port}, weight={self.weight})"
+
+class ReplicaSet:
+    """The read replicas of a database.
+
+    Parameters:
+        dbinfo (dict): the connection parameters of the primary. The host and the port
+            are replaced by the ones of each replica.
+        hosts (list): the replicas as a list of (host, port) tuples.
+        weights (Optional[list]): the weights of the replicas.
+        max_lag (Optional[float]): the maximum replication lag in seconds.
+        check_interval (float): the minimum number of seconds between two lag checks.
+        retry_after (float): the number of seconds a replica that can't be reached is
+            put aside.
+        pool_config (dict): the parameters of the pools (see ConnectionPool).
+        driver (Driver): the driver used to connect to the replicas.
+    """
+    def __init__(self, dbinfo, hosts, weights=None, max_lag=None, check_interval=5.,
+                 retry_after=30., pool_config=None, driver=None):
+        weights = weights or [1.] * len(hosts)
+        if len(weights) != len(hosts):
+            raise ValueError("There must be one weight per replica!")
+        pool_config = dict(pool_config or {}, minconn=0)
+        self.__driver = driver
+        self.__max_lag = max_lag
+        self.__check_interval = check_interval
+        self.__retry_after = retry_after
+        self.__lock = threading.Lock()
+        self.__used = {}
+        self.__replicas = [
+            Replica(host, port, weight, ConnectionPool(
+                dict(dbinfo, host=host, port=port), **pool_config, driver=driver))
+            for (host, port), weight in zip(hosts, weights)]
+
+    @property
+    def replicas(self):
+        "Returns the list of the replicas."
+        return list(self.__replicas)
+
+    def __choose(self, exclude):
+        """Returns a replica drawn at random according to the weights among the
+        available replicas, or None.
+        """
+        now = time.monotonic()
+        candidates = [
+            replica for replica in self.__replicas
+            if replica not in exclude and replica.down_until <= now and replica.weight > 0]
+        if not candidates:
+            return None
+        return random.choices(candidates, [replica.weight for replica in candidates])[0]
+
+    def __lagging(self, replica, conn):
+        "Checks the lag of the replica every check_interval seconds."
+        now = time.monotonic()
+        if self.__max_lag is None or (
+                replica.checked_at is not None and now - replica.checked_at < self.__check_interval):
+            return False
+        cursor = conn.cursor()
+        cursor.execute(LAG_QUERY)
+        replica.lag = float(cursor.fetchone()['lag'])
+        replica.checked_at = now
+        if replica.lag > self.__max_lag:
+            replica.down_until = now + self.__check_interval
+            return True
+        return False
+
+    def mark_down(self, replica):
+        "Puts the replica aside for retry_after seconds."
+        replica.down_until = time.monotonic() + self.__retry_after
+
+    def getconn(self):
+        """Checks out a connection from an available replica.
+
+        The replicas that can't be reached or are lagging are put aside and another
+        one is tried.
+
+        Returns:
+            connection | None: None if no replica is available.
+        """
+        tried = set()
+        while True:
+            with self.__lock:
+                replica = self.__choose(tried)
+            if replica is None:
+                return None
+            tried.add(replica)
+            try:
+                conn = replica.pool.getconn()
+            except self.__driver.connection_errors:
+                self.mark_down(replica)
+                continue
+            try:
+                lagging = self.__lagging(replica, conn)
+            except self.__driver.connection_errors:
+                replica.pool.putconn(conn, True)
+                self.mark_down(replica)
+                continue
+            if lagging:
+                replica.pool.putconn(conn)
+                continue
+            with self.__lock:
+                self.__used[id(conn)] = replica
+            return conn
+
+    def connect(self):
+        """Opens a connection to an available replica outside of its pool (see
+        ConnectionPool.connect). The caller must close it.
+
+        Returns:
+            connection | None: None if no replica is available.
+        """
+        tried = set()
+        while True:
+            with self.__lock:
+                replica = self.__choose(tried)
+            if replica is None:
+                return None
+            tried.add(replica)
+            try:
+                conn = replica.pool.connect()
+                lagging = self.__lagging(replica, conn)
+            except self.__driver.connection_errors:
+                self.mark_down(replica)
+                continue
+            if lagging:
+                conn.close()
+                continue
+            return conn
+
+    def putconn(self, conn, discard=False):
+        """Gives a connection back to the pool of its replica. The replica is put
+        aside if the connection is discarded (broken).
+        """
+        with self.__lock:
+            replica = self.__used.pop(id(conn), None)
+        if replica is None:
+            return
+        if discard:
+            self.mark_down(replica)
+        replica.pool.putconn(conn, discard)
+
+    def clear(self):
+        "Closes the idle connections of the replicas (see ConnectionPool.clear)."
+        for replica in self.__replicas:
+            replica.pool.clear()
+
+    def close(self):
+        "Closes the connections to all the replicas."
+        for replica in self.__replicas:
+            replica.pool.close()
+
+    @property
+    def closed(self):
+        "Returns True if the replica set has been closed."
+        return all(replica.pool.closed for replica in self.__replicas)
+
+    def stats(self):
+        """Returns the state of each replica.
+
+        Returns:
+            list[dict]: host, port, weight, available, lag and the stats of the pool.
+        """
+        now = time.monotonic()
+        return [{
+            'host': replica.host,
+            'port': replica.port,
+            'weight': replica.weight,
+            'available': replica.down_until <= now,
+            'lag': replica.lag,
+            'pool': replica.pool.stats()} for replica in self.__replicas]
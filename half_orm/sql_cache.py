@@ -0,0 +1,76 @@
+#-*- coding: utf-8 -*-
+
+"""This module provides the SqlCache class and the SQL_CACHE instance used by the
+`Relation <#half_orm.relation.Relation>`_ class.
+
+The SQL text of a query only depends on the *shape* of the relation object: its
+class, the fields that are set with their comparators and unaccent flags, the set
+operators, the joins, the select parameters and the returned columns. The values
+are passed separately to the driver. The shapes already seen are kept in a bounded
+LRU cache, so the SQL of a query run many times with different values is built once.
+
+Example:
+    >>> from half_orm.sql_cache import SQL_CACHE
+    >>> SQL_CACHE.info()
+    {'hits': 12, 'misses': 3, 'maxsize': 1024, 'currsize': 3}
+    >>> SQL_CACHE.maxsize = 0 # disables the cache
+"""
+
+import threading
+from collections import OrderedDict
+
+class SqlCache:
+    """A thread-safe LRU cache of compiled SQL queries.
+
+    Parameters:
+        maxsize (int): the maximum number of queries kept. The cache is disabled if 0.
+    """
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.__lock = threading.Lock()
+        self.__queries = OrderedDict()
+        self.__hits = 0
+        self.__misses = 0
+
+    def get(self, key):
+        """Returns the SQL stored for **key** or None. Counts the hits and misses."""
+        with self.__lock:
+            query = self.__queries.get(key)
+            if query is None:
+                self.__misses += 1
+                return None
+            self.__hits += 1
+            self.__queries.move_to_end(key)
+            return query
+
+    def set(self, key, query):
+        """Stores the **query** for **key**, evicting the least recently used query."""
+        with self.__lock:
+            if self.maxsize <= 0:
+                return
+            self.__queries[key] = query
+            self.__queries.move_to_end(key)
+            while len(self.__queries) > self.maxsize:
+                self.__queries.popitem(last=False)
+
+    def info(self):
+        """Returns the statistics of the cache.
+
+        Returns:
+            dict: hits, misses, maxsize and currsize (the number of queries stored).
+        """
+        with self.__lock:
+            return {
+                'hits': self.__hits,
+                'misses': self.__misses,
+                'maxsize': self.maxsize,
+                'currsize': len(self.__queries)}
+
+    def clear(self):
+        """Empties the cache and resets the statistics."""
+        with self.__lock:
+            self.__queries.clear()
+            self.__hits = 0
+            self.__misses = 0
+
+SQL_CACHE = SqlCache()
@@ -0,0 +1,93 @@
+#-*- coding: utf-8 -*-
+# pylint: disable=protected-access
+
+"""This module provides the Param and QueryTemplate classes used by the
+`Relation.ho_template <#half_orm.relation.Relation.ho_template>`_ method.
+
+A template is a select query declared once with named parameters. Its SQL is
+built once and prepared on the server (``PREPARE``) the first time it is executed
+on a connection. The following executions only send the values of the parameters
+(``EXECUTE``): the query is neither built nor planned again.
+
+Example:
+    >>> from half_orm.template import Param
+    >>> by_name = Person.ho_template(
+    ...     'id', 'first_name', last_name=Param('ln'), birth_date=('>', Param('d')))
+    >>> by_name.execute(ln='Lagaffe', d='1950-01-01')
+    [{'id': 1772, 'first_name': 'Gaston'}]
+"""
+
+import hashlib
+import re
+
+from half_orm.field import Field
+
+_PLACEHOLDER = re.compile(r'%(s|%)')
+
+class Param:
+    """A named parameter of a template. Use it as the value of a field.
+
+    A parameter stands for a single value: it can't be used with the ``in`` operator
+    (a list of values) or for NULL (use ``is`` with the NULL object in the template).
+    """
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return f"Param({self.name!r})"
+
+class QueryTemplate:
+    """A select query prepared on the server. Returned by
+    `Relation.ho_template <#half_orm.relation.Relation.ho_template>`_.
+
+    The fields set to a `Param <#half_orm.template.Param>`_ are replaced by the
+    positional parameters $1, $2... of the prepared statement, the other values are
+    rendered in the SQL. The same parameter can be used several times.
+
+    Attributes:
+        params (list): the names of the parameters, in the order of the statement.
+        name (str): the name of the prepared statement.
+        query (str): the query prepared on the server.
+    """
+    def __init__(self, relation, *args):
+        relation._ho_check_colums(*args)
+        self.__model = relation._ho_model
+        query, values = relation._ho_prep_select(*args)
+        self.params = []
+        constants = []
+        values = iter(values)
+        def placeholder(match):
+            if match.group(1) == '%':
+                return '%%'
+            value = next(values)
+            param = value.value if isinstance(value, Field) else value
+            if not isinstance(param, Param):
+                constants.append(value)
+                return '%s'
+            if param.name not in self.params:
+                self.params.append(param.name)
+            return f'${self.params.index(param.name) + 1}'
+        query = _PLACEHOLDER.sub(placeholder, query)
+        # renders the constants and the %% escapes.
+        self.query = self.__model._mogrify(query, tuple(constants))
+        self.name = f'half_orm_{hashlib.md5(self.query.encode("utf-8")).hexdigest()}'
+
+    def execute(self, **kwargs):
+        """Executes the prepared query with the values of the parameters.
+
+        Returns:
+            List[dict]: the rows.
+
+        Raises:
+            TypeError: if a parameter is missing or unknown.
+        """
+        missing = [name for name in self.params if name not in kwargs]
+        unknown = [name for name in kwargs if name not in self.params]
+        if missing or unknown:
+            raise TypeError(
+                f"Wrong parameters for the template! Missing: {missing}, unknown: {unknown}")
+        values = tuple(kwargs[name] for name in self.params)
+        return [dict(elt) for elt in self.__model._execute_prepared(self.name, self.query, values)]
+
+    def __repr__(self):
+        return f"QueryTemplate({self.name}, {self.params})\n{self.query}"
@@ -1,45 +1,43 @@
 #-*- coding: utf-8 -*-
 # pylint: disable=too-few-public-methods, protected-access
 
-"""This module provides the Transaction class."""
+"""This module provides the Transaction class.
 
-import sys
+The transaction state (level and connection) is kept by the model for the
+current thread or asyncio task. Two threads using the same model run their
+transactions on different connections.
+
+Example:
+    >>> with Transaction(model):
+    ...     Person(last_name='Lagaffe', first_name='Gaston').ho_insert()
+    ...     with Transaction(model):
+    ...         Transaction(model).level
+    2
+"""
 
 class Transaction:
-    """
+    """Context manager for a (nested) transaction on a model.
+
+    Only the outermost transaction commits.
     """
 
-    __transactions = {}
     def __call__(self, model):
-        self.__id = id(model)
-        self.__transaction = None
-        if self.__id not in self.__class__.__transactions:
-            self.__class__.__transactions[self.__id] = {}
-            self.__transaction = self.__class__.__transactions[self.__id]
-            self.__transaction['level'] = 0
-            self.__transaction['model'] = model
-        else:
-            self.__transaction = self.__transactions[self.__id]
+        self.__model = model
+        self.__tokens = []
 
     __init__ = __call__
 
     def __enter__(self):
-        if self.__transaction['model']._connection.autocommit:
-            self.__transaction['model']._connection.autocommit = False
-        self.__transaction['level'] += 1
+        self.__tokens.append(self.__model._tx_enter())
 
     def __exit__(self, *_):
-        self.__transaction['level'] -= 1
-        if self.__transaction['level'] == 0:
-            try:
-                self.__transaction['model']._connection.commit()
-                self.__transaction['model']._connection.autocommit = True
-            except Exception as exc:
-                self.__transaction['model']._connection.rollback()
+        self.__model._tx_exit(self.__tokens.pop())
 
     @property
     def level(self):
-        return self.__transaction.get('level')
+        "Returns the transaction level of the current thread/task."
+        return self.__model._tx_level
 
     def is_set(self):
-        return self.__transaction.get('level', 0) > 0
+        "Returns True if the current thread/task is in a transaction."
+        return self.level > 0
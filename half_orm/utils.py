@@ -4,6 +4,8 @@ import inspect
 import os
 import re
 import sys
+import weakref
+from contextvars import ContextVar
 from functools import wraps
 from keyword import iskeyword
 
@@ -55,6 +57,49 @@ def warning(msg: str, context="half-orm"):
     "Write warning message on stderr"
     sys.stderr.write(f'{Color.bold(context + " WARNING")}: {msg}')
 
+class ModelVar:
+    """A context variable holding a value per model (thread/task local state).
+
+    The values are stored in a module level ContextVar as a {model: value} mapping
+    with weak keys: the models are not kept alive by the contexts. The mapping is
+    copied on each change, so the values of the other contexts are untouched.
+    """
+    __unset = object()
+
+    def __init__(self, name, default=None):
+        self.__var = ContextVar(name, default=None)
+        self.__default = default
+
+    def get(self, model):
+        "Returns the value of **model** in the current context."
+        values = self.__var.get()
+        if values is None:
+            return self.__default
+        return values.get(model, self.__default)
+
+    def set(self, model, value):
+        """Sets the value of **model** in the current context.
+
+        Returns:
+            the token to pass to reset to restore the previous value.
+        """
+        values = self.__var.get()
+        token = self.__unset if values is None else values.get(model, self.__unset)
+        self.__update(model, value)
+        return token
+
+    def reset(self, model, token):
+        "Restores the value of **model** returned by set."
+        self.__update(model, token)
+
+    def __update(self, model, value):
+        values = weakref.WeakKeyDictionary(self.__var.get() or {})
+        if value is self.__unset:
+            values.pop(model, None)
+        else:
+            values[model] = value
+        self.__var.set(values)
+
 class TraceDepth: #pragma: no coverage
     "Trace dept class"
     __depth = 0
@@ -38,6 +38,10 @@ setup(
         'click',
         "importlib-metadata; python_version<'3.8'"
     ],
+    extras_require={
+        'async': ['psycopg[binary]>=3.2', 'psycopg-pool'],
+        'psycopg3': ['psycopg[binary]>=3.2'],
+    },
     package_data={'half_orm': ['version.txt']},
     classifiers=[
         # How mature is this project? Common values are
@@ -129,3 +129,10 @@ class Test(TestCase):
 
     def test_py_type(self):
         self.assertEqual(str(self.comment.tags.py_type), 'typing.List[str]')
+
+    def test_slots(self):
+        "it should not have a __dict__ (Field and FKey are slotted)"
+        self.assertFalse(hasattr(self.pers.first_name, '__dict__'))
+        self.assertFalse(hasattr(self.post._ho_fkeys['author'], '__dict__'))
+        with self.assertRaises(AttributeError):
+            self.pers.first_name.foo = 1
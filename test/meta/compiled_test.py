@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding:  utf-8 -*-
+
+import importlib
+import os
+import shutil
+import sys
+import tempfile
+from unittest import TestCase, mock
+
+from click.testing import CliRunner
+
+from half_orm.cli import main
+from half_orm.model import Model
+from half_orm.model_errors import MalformedConfigFile
+from half_orm.pg_meta import PgMeta
+
+from ..init import model
+
+class Test(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.expected = PgMeta.meta['halftest']
+        runner = CliRunner()
+        for name, relations in (('compiled_all', []), ('compiled_some', ['actor.person', 'blog.post'])):
+            result = runner.invoke(main, [
+                'metadata', 'compile', 'halftest', '-o', os.path.join(self.directory, f'{name}.py'),
+                *relations])
+            self.assertEqual(result.exit_code, 0, result.output)
+        sys.path.insert(0, self.directory)
+        importlib.invalidate_caches()
+        self.compiled_all = importlib.import_module('compiled_all')
+        self.compiled_some = importlib.import_module('compiled_some')
+
+    def tearDown(self):
+        sys.path.remove(self.directory)
+        sys.modules.pop('compiled_all')
+        sys.modules.pop('compiled_some')
+        shutil.rmtree(self.directory)
+        with model._checkout() as conn:
+            PgMeta(conn, reload=True)
+
+    def load(self, compiled, lazy=False, relations=()):
+        """Reloads the metadata with the **compiled** module and gets the metadata of
+        the **relations**. Returns the number of catalog queries."""
+        assemble_ = PgMeta._PgMeta__assemble
+        with mock.patch.object(PgMeta, '_PgMeta__assemble', autospec=True, side_effect=assemble_) as assemble:
+            if lazy:
+                pg_meta = PgMeta(reload=True, checkout=model._checkout, dbname='halftest', compiled=compiled)
+            else:
+                with model._checkout() as conn:
+                    pg_meta = PgMeta(conn, reload=True, compiled=compiled)
+            for relation in relations:
+                pg_meta.relation_meta('halftest', ('halftest',) + tuple(relation.split('.')))
+        return assemble.call_count
+
+    def test_complete(self):
+        "it should use the compiled metadata without querying the catalog"
+        self.assertEqual(self.load(self.compiled_all), 0)
+        self.assertEqual(PgMeta.meta['halftest'], self.expected)
+        self.assertEqual(self.load(self.compiled_all, lazy=True, relations=['blog.comment']), 0)
+        self.assertFalse(PgMeta.meta['halftest'].get('lazy'))
+
+    def test_partial(self):
+        "it should only use a partial module in lazy mode"
+        self.assertEqual(self.load(self.compiled_some), 1)
+        self.assertEqual(self.load(self.compiled_some, lazy=True, relations=['actor.person', 'blog.post']), 0)
+        self.assertEqual(self.load(self.compiled_some, lazy=True, relations=['blog.comment']), 1)
+        byname = PgMeta.meta['halftest']['byname']
+        for sfqrn in byname:
+            self.assertEqual(byname[sfqrn], self.expected['byname'][sfqrn])
+
+    def test_drift(self):
+        "it should load the metadata from the database if the schema has changed"
+        with mock.patch.object(self.compiled_all, 'FINGERPRINT', 'another fingerprint'):
+            self.assertEqual(self.load(self.compiled_all), 1)
+            self.assertEqual(self.load(self.compiled_all, lazy=True, relations=['blog.comment']), 1)
+        with mock.patch.object(self.compiled_all, 'VERSION', '0.0.0'):
+            self.assertEqual(self.load(self.compiled_all), 1)
+        with mock.patch.object(self.compiled_all, 'TENANTS', ('actor', 'blog%')):
+            self.assertEqual(self.load(self.compiled_all), 1)
+
+    def test_config(self):
+        "it should raise MalformedConfigFile if the module can't be imported"
+        config = os.path.join(self.directory, 'halftest_compiled')
+        with open(config, 'w') as config_file:
+            config_file.write('[database]\nname = halftest\ncompiled_metadata = no_such_module\n')
+        with self.assertRaises(MalformedConfigFile):
+            Model(config, lazy=True)
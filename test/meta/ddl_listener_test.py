@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding:  utf-8 -*-
+
+import time
+from unittest import TestCase
+
+from half_orm import ddl_listener
+from half_orm.pg_meta import PgMeta
+
+from ..init import model
+
+def wait_for(predicate, timeout=10):
+    "Waits until predicate() is true. Returns the last value of predicate()."
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return predicate()
+
+def plain(metadata):
+    "Returns the metadata with dicts instead of OrderedDicts and without the relations list order."
+    if isinstance(metadata, dict):
+        return {key: plain(value) for key, value in metadata.items()}
+    if isinstance(metadata, list):
+        return [plain(elt) for elt in metadata]
+    return metadata
+
+class Test(TestCase):
+    def setUp(self):
+        self.pg_meta = model._Model__pg_meta
+
+    def tearDown(self):
+        model.stop_ddl_listener()
+        ddl_listener.uninstall(model)
+        model.execute_query('drop table if exists public.ddl_test')
+        model._reload()
+
+    def full_metadata(self):
+        "Returns the metadata loaded from scratch and restores the current one."
+        current = PgMeta.meta['halftest']
+        with model._checkout() as conn:
+            PgMeta(conn, reload=True)
+        metadata = plain(PgMeta.meta['halftest'])
+        PgMeta.meta.register('halftest', current)
+        return metadata
+
+    def test_reload_relations(self):
+        "it should reload the relation changed and the relations linked to it"
+        model.execute_query(
+            'create table public.ddl_test (id serial primary key, '
+            'author_id int references actor.person(id))')
+        oid = model.execute_query(
+            "select 'public.ddl_test'::regclass::oid as oid").fetchone()['oid']
+        Person = model.get_relation_class('actor.person')
+        Post = model.get_relation_class('blog.post')
+        affected = model._reload_relations([oid])
+        self.assertIn(('halftest', 'public', 'ddl_test'), PgMeta.meta['halftest']['byname'])
+        self.assertEqual(plain(PgMeta.meta['halftest']), self.full_metadata())
+        self.assertIn(('halftest', 'actor', 'person'), affected)
+        self.assertNotIn(('halftest', 'blog', 'post'), affected)
+        self.assertIsNot(model.get_relation_class('actor.person'), Person)
+        self.assertIs(model.get_relation_class('blog.post'), Post)
+        self.assertTrue(any(name.startswith('_reverse_fkey_halftest_public_ddl_test')
+                            for name in model.get_relation_class('actor.person')()._ho_fkeys))
+        model.execute_query('drop table public.ddl_test')
+        model._reload_relations([oid])
+        self.assertFalse(model.has_relation('public.ddl_test'))
+        self.assertEqual(plain(PgMeta.meta['halftest']), self.full_metadata())
+
+    def test_listener(self):
+        "it should reload the metadata of the relations changed by a DDL"
+        ddl_listener.install(model)
+        listener = model.listen_ddl(delay=0.1)
+        self.assertTrue(listener.wait_listening(10))
+        model.execute_query('create table public.ddl_test (a int)')
+        self.assertTrue(wait_for(lambda: model.has_relation('public.ddl_test')))
+        DdlTest = model.get_relation_class('public.ddl_test')
+        self.assertEqual(list(DdlTest()._ho_fields), ['a'])
+        model.execute_query('alter table public.ddl_test add column b text')
+        self.assertTrue(wait_for(lambda: 'b' in model._fields_metadata(('halftest', 'public', 'ddl_test'))))
+        self.assertIsNot(model.get_relation_class('public.ddl_test'), DdlTest)
+        self.assertEqual(list(model.get_relation_class('public.ddl_test')()._ho_fields), ['a', 'b'])
+        model.execute_query('drop table public.ddl_test')
+        self.assertTrue(wait_for(lambda: not model.has_relation('public.ddl_test')))
+        self.assertEqual(plain(PgMeta.meta['halftest']), self.full_metadata())
+        model.stop_ddl_listener()
+        self.assertFalse(listener.is_alive())
+
+    def test_parse(self):
+        "it should merge the payloads"
+        self.assertEqual(ddl_listener.parse(['{"oids": [1, 2]}', '{"oids": [2, 3]}']), {1, 2, 3})
+        self.assertIsNone(ddl_listener.parse(['{"oids": [1]}', '{"all": true}']))
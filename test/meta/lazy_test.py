@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding:  utf-8 -*-
+
+from unittest import TestCase
+
+from half_orm.model import Model
+from half_orm.pg_meta import FieldMeta, PgMeta, RelationMeta
+
+from ..init import halftest, model, HALFTEST_REL_LISTS
+
+LAZY = 'halftest_lazy'
+
+def rename(obj):
+    "Replaces the database name in the keys of the metadata."
+    if isinstance(obj, tuple):
+        return tuple(LAZY if elt == 'halftest' else rename(elt) for elt in obj)
+    if isinstance(obj, list):
+        return [rename(elt) for elt in obj]
+    if isinstance(obj, dict):
+        return {rename(key): rename(value) for key, value in obj.items()}
+    if isinstance(obj, (RelationMeta, FieldMeta)):
+        return obj.__class__(**{key: rename(value) for key, value in obj.items()})
+    if isinstance(obj, str):
+        return obj.replace('_reverse_fkey_halftest_', f'_reverse_fkey_{LAZY}_')
+    return obj
+
+class Test(TestCase):
+    def setUp(self):
+        self.pg_meta = model._Model__pg_meta
+        self.lazy = PgMeta(reload=True, checkout=model._checkout, dbname=LAZY)
+
+    def test_relation(self):
+        "it should load the same metadata relation by relation"
+        for _, sfqrn in HALFTEST_REL_LISTS:
+            lazy_sfqrn = rename(sfqrn)
+            self.assertEqual(self.lazy.relation_meta(LAZY, lazy_sfqrn), rename(self.pg_meta.relation_meta('halftest', sfqrn)))
+            self.assertEqual(
+                self.lazy._pkey_constraint(LAZY, lazy_sfqrn), self.pg_meta._pkey_constraint('halftest', sfqrn))
+        self.assertTrue(PgMeta.meta[LAZY]['lazy'])
+
+    def test_only_needed_relations(self):
+        "it should only register the relations used"
+        self.assertEqual(self.lazy.fields_meta(LAZY, (LAZY, 'blog', 'post')).keys(), halftest.post_cls()._ho_fields.keys())
+        self.assertEqual(list(PgMeta.meta[LAZY]['byname']), [(LAZY, 'blog', 'post')])
+        self.assertFalse(self.lazy.has_relation(LAZY, 'public', 'no_such_relation'))
+        self.assertEqual(list(PgMeta.meta[LAZY]['byname']), [(LAZY, 'blog', 'post')])
+
+    def test_full_load(self):
+        "it should load all the metadata when the list of the relations is needed"
+        self.assertEqual(self.lazy.relations_list(LAZY), rename(HALFTEST_REL_LISTS))
+        self.assertNotIn('lazy', PgMeta.meta[LAZY])
+
+    def test_lazy_connection(self):
+        "it should connect on the first query"
+        lazy_model = Model('halftest', lazy=True)
+        try:
+            self.assertEqual(lazy_model.pool_stats()['size'], 0)
+            self.assertEqual(lazy_model.execute_query('select 1 as one').fetchone()['one'], 1)
+            self.assertEqual(lazy_model.pool_stats()['size'], 1)
+        finally:
+            lazy_model.disconnect()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding:  utf-8 -*-
+
+import os
+import pickle
+import shutil
+import tempfile
+from unittest import TestCase, mock
+
+from click.testing import CliRunner
+
+from half_orm import meta_cache
+from half_orm.cli import main
+from half_orm.meta_cache import MetadataCache
+from half_orm.pg_meta import PgMeta
+
+from ..init import model
+
+class Test(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = MetadataCache(self.directory)
+        self.expected = PgMeta.meta['halftest']
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        with model._checkout() as conn:
+            PgMeta(conn, reload=True)
+
+    def load(self):
+        "Reloads the metadata with the cache. Returns the number of catalog queries."
+        assemble_ = PgMeta._PgMeta__assemble
+        with mock.patch.object(PgMeta, '_PgMeta__assemble', autospec=True, side_effect=assemble_) as assemble:
+            with model._checkout() as conn:
+                PgMeta(conn, reload=True, cache=self.cache)
+        return assemble.call_count
+
+    def test_reuse(self):
+        "it should store the metadata and reuse it while the fingerprint is the same"
+        self.assertEqual(self.load(), 1)
+        self.assertTrue(os.path.exists(self.cache.path('halftest')))
+        self.assertEqual(self.load(), 0)
+        self.assertEqual(PgMeta.meta['halftest'], self.expected)
+
+    def test_schema_change(self):
+        "it should rebuild the cache when the schema changes"
+        self.load()
+        model.execute_query('create table public.meta_cache_test (a int)')
+        try:
+            self.assertEqual(self.load(), 1)
+            self.assertIn(('halftest', 'public', 'meta_cache_test'), PgMeta.meta['halftest']['byname'])
+            model.execute_query("comment on column public.meta_cache_test.a is 'a column'")
+            self.assertEqual(self.load(), 1)
+        finally:
+            model.execute_query('drop table public.meta_cache_test')
+        self.assertEqual(self.load(), 1)
+        self.assertEqual(PgMeta.meta['halftest'], self.expected)
+
+    def test_invalid_file(self):
+        "it should ignore a corrupted file or a file written by another version"
+        self.load()
+        entry = self.cache.info('halftest')
+        entry['version'] = '0.0.0'
+        with open(self.cache.path('halftest'), 'wb') as cache_file:
+            pickle.dump(entry, cache_file)
+        self.assertEqual(self.load(), 1)
+        with open(self.cache.path('halftest'), 'wb') as cache_file:
+            cache_file.write(b'garbage')
+        self.assertIsNone(self.cache.info('halftest'))
+        self.assertEqual(self.load(), 1)
+        self.assertEqual(self.load(), 0)
+
+    def test_cli(self):
+        "it should build and inspect the cache with the half_orm metadata command"
+        runner = CliRunner()
+        result = runner.invoke(main, ['metadata', 'inspect', 'halftest', '--cache-dir', self.directory])
+        self.assertIn('No cache file', result.output)
+        result = runner.invoke(main, ['metadata', 'build', 'halftest', '--cache-dir', self.directory])
+        self.assertEqual(result.exit_code, 0, result.output)
+        with model._checkout() as conn:
+            fingerprint = meta_cache.fingerprint(conn)
+        self.assertEqual(self.cache.load('halftest', fingerprint), self.expected)
+        result = runner.invoke(main, ['metadata', 'inspect', 'halftest', '--cache-dir', self.directory])
+        self.assertIn(f'Fingerprint: {fingerprint}', result.output)
+        self.assertIn('up to date', result.output)
+        result = runner.invoke(main, ['metadata', 'inspect', 'halftest'])
+        self.assertNotEqual(result.exit_code, 0)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding:  utf-8 -*-
+
+from unittest import TestCase, mock
+
+from half_orm.model import Model
+from half_orm.pg_meta import PgMeta
+
+from ..init import model
+
+TENANTS = ['halftest_tenant_1', 'halftest_tenant_2']
+
+SCHEMA = """
+create schema tenant;
+create table tenant.account (id serial primary key, name text unique not null);
+comment on table tenant.account is 'an account';
+create table tenant.entry (
+    id serial primary key, account_id int references tenant.account(id), amount numeric);
+create table tenant.special_entry (note text) inherits (tenant.entry);
+"""
+
+class Test(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        for dbname in TENANTS:
+            model.execute_query(f'create database {dbname} owner halftest')
+        # the first models of the databases: the relation classes are bound to them.
+        cls.lazy_models = [Model(dbname, lazy=True) for dbname in TENANTS]
+        for tenant in cls.lazy_models:
+            tenant.execute_query(SCHEMA)
+        assemble_ = PgMeta._PgMeta__assemble
+        with mock.patch.object(PgMeta, '_PgMeta__assemble', autospec=True, side_effect=assemble_) as assemble:
+            cls.models = [Model(dbname) for dbname in TENANTS]
+        cls.assemble_count = assemble.call_count
+
+    @classmethod
+    def tearDownClass(cls):
+        for tenant in cls.models + cls.lazy_models:
+            tenant.disconnect()
+        for dbname in TENANTS:
+            model.execute_query(f'drop database {dbname} with (force)')
+
+    def test_metadata(self):
+        "it should load the metadata once for the databases with the same structure"
+        tenant_1, tenant_2 = self.models
+        self.assertEqual(self.assemble_count, 1)
+        self.assertIsNotNone(tenant_1._shared_metadata())
+        self.assertEqual(tenant_1._shared_metadata(), tenant_2._shared_metadata())
+        self.assertIs(PgMeta.meta[TENANTS[0]], PgMeta.meta[TENANTS[1]])
+        self.assertIsNone(model._shared_metadata())
+        self.assertEqual(
+            tenant_2.desc(),
+            [('r', ('halftest_tenant_2', 'tenant', 'account'), []),
+             ('r', ('halftest_tenant_2', 'tenant', 'entry'), []),
+             ('r', ('halftest_tenant_2', 'tenant', 'special_entry'),
+              [('halftest_tenant_2', 'tenant', 'entry')])])
+        self.assertTrue(tenant_2.has_relation('tenant.account'))
+
+    def test_classes(self):
+        "it should share the classes and bind them to the model of each database"
+        tenant_1, tenant_2 = self.models
+        account_1 = tenant_1.get_relation_class('tenant.account')
+        account_2 = tenant_2.get_relation_class('tenant.account')
+        self.assertIsNot(account_1, account_2)
+        self.assertEqual(account_1.__bases__, account_2.__bases__)
+        self.assertEqual(account_2._ho_model._dbname, 'halftest_tenant_2')
+        self.assertEqual(account_2._fqrn, '"halftest_tenant_2":"tenant"."account"')
+        self.assertEqual(account_2._ho_metadata['description'], 'an account')
+        special_1 = tenant_1.get_relation_class('tenant.special_entry')
+        special_2 = tenant_2.get_relation_class('tenant.special_entry')
+        self.assertEqual(special_1.__bases__, special_2.__bases__)
+        entry_2 = tenant_2.get_relation_class('tenant.entry')
+        self.assertTrue(issubclass(special_2, entry_2.__bases__[0]))
+
+        account_2(name='tenant 2').ho_insert()
+        try:
+            self.assertEqual(account_1().ho_count(), 0)
+            self.assertEqual(account_2().ho_count(), 1)
+            account = account_2(name='tenant 2')
+            self.assertIn('_reverse_fkey_halftest_tenant_2_tenant_entry_account_id', account._ho_fkeys)
+            entries = account._ho_fkeys['_reverse_fkey_halftest_tenant_2_tenant_entry_account_id']()
+            self.assertEqual(entries._ho_model._dbname, 'halftest_tenant_2')
+            self.assertEqual(entries.ho_count(), 0)
+            self.assertEqual(entry_2()._ho_fkeys['entry_account_id_fkey']()._ho_model._dbname, 'halftest_tenant_2')
+        finally:
+            account_2().ho_delete(delete_all=True)
+
+    def test_structure_change(self):
+        "it should stop sharing the metadata of a database whose structure changed"
+        tenant_1, tenant_2 = self.models
+        shared = tenant_1._shared_metadata()
+        tenant_2.execute_query('alter table tenant.account add column email text')
+        try:
+            tenant_2._reload()
+            self.assertIsNotNone(tenant_2._shared_metadata())
+            self.assertNotEqual(tenant_2._shared_metadata(), shared)
+            self.assertIn('email', tenant_2.get_relation_class('tenant.account')()._ho_fields)
+            self.assertNotIn('email', tenant_1.get_relation_class('tenant.account')()._ho_fields)
+        finally:
+            tenant_2.execute_query('alter table tenant.account drop column email')
+            tenant_2._reload()
+        self.assertEqual(tenant_2._shared_metadata(), shared)
+        self.assertIs(PgMeta.meta[TENANTS[0]], PgMeta.meta[TENANTS[1]])
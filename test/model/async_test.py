@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+#-*- coding:  utf-8 -*-
+
+import contextvars
+from unittest import IsolatedAsyncioTestCase, mock
+
+from psycopg.errors import UniqueViolation
+
+from half_orm.async_model import AsyncModel, AsyncTransaction
+from half_orm.null import NULL
+from half_orm.relation import Relation
+from half_orm.relation_errors import ExpectedOneError
+
+from ..init import halftest
+
+MODEL = AsyncModel('halftest')
+
+class Test(IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.model = MODEL
+        self.Person = self.model.get_relation_class('actor.person')
+
+    async def asyncTearDown(self):
+        await self.Person(last_name=('like', 'async%')).ho_adelete()
+        await self.model.aclose()
+
+    def test_classes_are_bound_to_the_async_model(self):
+        "it should bind the classes to the async model"
+        self.assertIs(self.Person._ho_model, self.model)
+        self.assertIsNot(self.Person, halftest.person_cls)
+        self.assertIs(self.Person()._ho_fkeys['_reverse_fkey_halftest_blog_comment_author_id']()._ho_model, self.model)
+
+    async def test_same_sql(self):
+        "it should produce the same SQL as the sync class"
+        sync_pers = halftest.person_cls(last_name=('like', 'a%'), first_name=['aa', 'ab'])
+        async_pers = self.Person(last_name=('like', 'a%'), first_name=['aa', 'ab'])
+        sync_query, sync_values = sync_pers._ho_prep_select()
+        async_query, async_values = async_pers._ho_prep_select()
+        self.assertEqual(
+            sync_query.replace(str(sync_pers.ho_id), ''),
+            async_query.replace(str(async_pers.ho_id), ''))
+        self.assertEqual([field.value for field in sync_values], [field.value for field in async_values])
+        self.assertEqual(
+            [elt['id'] for elt in sync_pers.ho_select('id')],
+            [elt['id'] async for elt in async_pers.ho_aselect('id')])
+
+    async def test_aselect_acount(self):
+        "it should select and count asynchronously"
+        pers = self.Person(last_name=('like', 'a%'))
+        self.assertEqual(await pers.ho_acount(), 10)
+        names = [elt['last_name'] async for elt in pers.ho_order_by('last_name').ho_aselect('last_name')]
+        self.assertEqual(names, [f'a{chr(ord("a") + i)}' for i in range(10)])
+        self.assertEqual(await self.Person(first_name=NULL).ho_acount(), 0)
+        self.assertEqual(await pers.ho_acount(max=3), 3)
+        self.assertIsInstance(await pers.ho_acount(estimate=True), int)
+        page = await pers.ho_order_by('last_name').ho_apage(3, 'last_name', offset=8)
+        self.assertEqual((page, page.total), ([{'last_name': 'ai'}, {'last_name': 'aj'}], 10))
+        page = await pers.ho_apage(3, 'last_name', offset=20)
+        self.assertEqual((page, page.total), ([], 10))
+        self.assertFalse(await self.Person().ho_ais_empty())
+        self.assertTrue(await self.Person(last_name='no one').ho_ais_empty())
+
+    async def test_dml(self):
+        "it should insert, update, get and delete asynchronously"
+        pers = await self.Person(
+            last_name='async1', first_name='async', birth_date='1970-01-01').ho_ainsert()
+        self.assertEqual(pers['last_name'], 'async1')
+        res = await self.Person(id=pers['id']).ho_aupdate('id', first_name='async2')
+        self.assertEqual(res, [{'id': pers['id']}])
+        gaston = await self.Person(last_name='async1').ho_aget()
+        self.assertIsInstance(gaston, self.Person)
+        self.assertEqual(gaston.first_name.value, 'async2')
+        with self.assertRaises(ExpectedOneError):
+            await self.Person(last_name=('like', 'a%')).ho_aget()
+        self.assertEqual(
+            await self.Person(last_name='async1').ho_adelete('last_name'), [{'last_name': 'async1'}])
+        self.assertEqual(await self.Person(last_name='async1').ho_acount(), 0)
+
+    async def test_dml_fkeys(self):
+        "it should fetch the values of the foreign keys asynchronously"
+        Post = self.model.get_relation_class('blog.post')
+        post = Post(title='async post', content='async')
+        post._ho_fkeys['author'].set(self.Person(last_name='aa'))
+        # the sync queries of the relations go through Relation.__execute
+        with mock.patch.object(Relation, '_Relation__execute') as execute:
+            res = await post.ho_ainsert('author_last_name')
+            self.assertEqual(res, {'author_last_name': 'aa'})
+            self.assertEqual(
+                await post.ho_aupdate('content', content='async2'), [{'content': 'async2'}])
+            self.assertEqual(
+                await post.ho_adelete('title'), [{'title': 'async post'}])
+        execute.assert_not_called()
+
+    async def test_broken_transaction_connection(self):
+        "it should give the connection back to the pool if it can't be reset"
+        apool = await self.model.aconnect()
+        async with AsyncTransaction(self.model):
+            conn = self.model._aconnection
+            conn.set_autocommit = mock.AsyncMock(side_effect=RuntimeError('broken'))
+        self.assertTrue(conn.closed)
+        # the single connection of the pool has been given back.
+        self.assertEqual(apool.max_size, 1)
+        self.assertEqual(await self.Person(last_name='aa').ho_acount(), 1)
+
+    async def test_async_transaction(self):
+        "it should rollback the async transaction on error"
+        with self.assertRaises(UniqueViolation):
+            async with AsyncTransaction(self.model):
+                self.assertEqual(AsyncTransaction(self.model).level, 1)
+                await self.Person(
+                    last_name='async1', first_name='async', birth_date='1970-01-01').ho_ainsert()
+                async with AsyncTransaction(self.model):
+                    self.assertEqual(AsyncTransaction(self.model).level, 2)
+                    await self.Person(
+                        last_name='async2', first_name='async', birth_date='1970-01-01').ho_ainsert()
+                await self.Person(
+                    last_name='aa', first_name='async', birth_date='1970-01-01').ho_ainsert()
+        self.assertEqual(AsyncTransaction(self.model).level, 0)
+        self.assertEqual(await self.Person(last_name=('like', 'async%')).ho_acount(), 0)
+
+    async def test_transactions_of_two_models(self):
+        "it should keep the async transaction state of each model apart"
+        other = AsyncModel('halftest')
+        try:
+            async with AsyncTransaction(self.model):
+                size = len(contextvars.copy_context())
+                async with AsyncTransaction(other):
+                    self.assertEqual(AsyncTransaction(other).level, 1)
+                    self.assertEqual(AsyncTransaction(self.model).level, 1)
+                    self.assertIsNot(other._aconnection, self.model._aconnection)
+                    # a single context variable holds the state of all the models.
+                    self.assertEqual(len(contextvars.copy_context()), size)
+                self.assertIsNone(other._aconnection)
+        finally:
+            await other.aclose()
+        self.assertEqual(AsyncTransaction(self.model).level, 0)
+
+    async def test_sync_relation(self):
+        "it should raise a RuntimeError if the class is bound to a sync model"
+        with self.assertRaises(RuntimeError):
+            await halftest.person_cls().ho_acount()
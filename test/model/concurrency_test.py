@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+#-*- coding:  utf-8 -*-
+
+import asyncio
+import contextvars
+import gc
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+
+from psycopg2.errors import UniqueViolation
+
+from half_orm.model import Model
+from half_orm.transaction import Transaction
+
+from ..init import model
+
+NB_TRANSACTIONS = 300
+
+class Test(TestCase):
+    def setUp(self):
+        model.execute_query('create table public.tx_stress (tag int, val int unique)')
+        self.model = Model('halftest_with_pool')
+
+    def tearDown(self):
+        self.model.disconnect()
+        model.execute_query('drop table public.tx_stress')
+
+    def __count(self, tag=None):
+        query = 'select count(*) from public.tx_stress'
+        if tag is not None:
+            return self.model.execute_query(f'{query} where tag = %s', (tag,)).fetchone()['count']
+        return self.model.execute_query(query).fetchone()['count']
+
+    def __transaction(self, tag):
+        "Inserts 3 rows. The transactions with an odd tag fail on the last insert."
+        insert = 'insert into public.tx_stress values (%s, %s)'
+        try:
+            with Transaction(self.model):
+                self.assertEqual(Transaction(self.model).level, 1)
+                self.model.execute_query(insert, (tag, tag * 10))
+                with Transaction(self.model):
+                    self.assertEqual(Transaction(self.model).level, 2)
+                    self.model.execute_query(insert, (tag, tag * 10 + 1))
+                # uncommitted rows are visible in the transaction only.
+                self.assertEqual(self.__count(tag), 2)
+                self.model.execute_query(insert, (tag, tag * 10 + (tag + 1) % 2 * 2))
+        except UniqueViolation:
+            self.assertEqual(tag % 2, 1)
+        self.assertEqual(Transaction(self.model).level, 0)
+        return tag
+
+    def test_concurrent_transactions(self):
+        "it should isolate the transactions of concurrent threads"
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            tags = list(executor.map(self.__transaction, range(NB_TRANSACTIONS)))
+        self.assertEqual(tags, list(range(NB_TRANSACTIONS)))
+        # only the transactions with an even tag have been committed.
+        self.assertEqual(self.__count(), NB_TRANSACTIONS // 2 * 3)
+        stats = self.model.pool_stats()
+        self.assertEqual(stats['in_use'], 0)
+        self.assertLessEqual(stats['size'], 16)
+
+    def test_transaction_is_thread_local(self):
+        "it should not see the transaction of another thread"
+        in_transaction = threading.Event()
+        done = threading.Event()
+        levels = []
+        def other_thread():
+            in_transaction.wait()
+            levels.append(Transaction(self.model).level)
+            levels.append(self.__count())
+            done.set()
+        thread = threading.Thread(target=other_thread)
+        thread.start()
+        with Transaction(self.model):
+            self.model.execute_query('insert into public.tx_stress values (1, 1)')
+            in_transaction.set()
+            done.wait()
+        thread.join()
+        self.assertEqual(levels, [0, 0])
+        self.assertEqual(self.__count(), 1)
+
+    def test_transaction_is_task_local(self):
+        "it should scope the transactions to the asyncio tasks"
+        async def task(tag):
+            with Transaction(self.model):
+                self.model.execute_query(
+                    'insert into public.tx_stress values (%s, %s)', (tag, tag))
+                await asyncio.sleep(0.01)
+                self.assertEqual(Transaction(self.model).level, 1)
+                self.assertEqual(self.__count(tag), 1)
+            return self.model._connection
+
+        async def main():
+            return await asyncio.gather(*[task(tag) for tag in range(10)])
+
+        self.assertEqual(asyncio.run(main()), [None] * 10)
+        self.assertEqual(self.__count(), 10)
+
+    def test_transactions_of_two_models(self):
+        "it should keep the transaction state of each model apart"
+        other = Model('halftest_with_pool')
+        try:
+            with Transaction(self.model):
+                with Transaction(other):
+                    self.assertEqual(Transaction(other).level, 1)
+                    self.assertIsNot(other._connection, self.model._connection)
+                self.assertEqual(Transaction(self.model).level, 1)
+                self.assertIsNone(other._connection)
+        finally:
+            other.disconnect()
+        self.assertEqual(Transaction(self.model).level, 0)
+
+    def test_no_context_variable_per_model(self):
+        "the transaction state of the models should be held by a single context variable"
+        others = [Model('halftest_with_pool') for _ in range(3)]
+        try:
+            with Transaction(self.model):
+                size = len(contextvars.copy_context())
+                with Transaction(others[0]), Transaction(others[1]), Transaction(others[2]):
+                    self.assertEqual(len(contextvars.copy_context()), size)
+        finally:
+            for other in others:
+                other.disconnect()
+        ref = weakref.ref(others[0])
+        del others, other
+        gc.collect()
+        self.assertIsNone(ref())
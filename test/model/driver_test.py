@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+#-*- coding:  utf-8 -*-
+
+import uuid
+from unittest import TestCase
+
+import psycopg
+from psycopg.errors import UniqueViolation
+
+from half_orm.driver import Driver, Psycopg2Driver, Psycopg3Driver, bind, get_driver
+from half_orm.model import Model
+from half_orm.null import NULL
+from half_orm.transaction import Transaction
+
+from ..init import halftest, model
+
+class Test(TestCase):
+    def setUp(self):
+        self.model = Model('halftest_psycopg3')
+
+    def tearDown(self):
+        self.model.execute_query("delete from actor.person where last_name like 'driver%%'")
+        self.model.disconnect()
+
+    def test_get_driver(self):
+        "it should return the psycopg2 driver by default"
+        self.assertIsInstance(get_driver(), Psycopg2Driver)
+        self.assertIsInstance(get_driver('psycopg3'), Psycopg3Driver)
+        self.assertIsInstance(model._driver, Psycopg2Driver)
+        self.assertIsInstance(self.model._driver, Psycopg3Driver)
+        with self.assertRaises(KeyError):
+            get_driver('unknown')
+
+    def test_abstract_driver(self):
+        "a driver missing a method should fail when it is instantiated"
+        class Incomplete(Driver):
+            def connect(self, dbinfo):
+                return None
+        with self.assertRaises(TypeError):
+            Incomplete()
+        with self.assertRaises(TypeError):
+            Driver()
+
+    def test_connection(self):
+        "it should connect with psycopg 3"
+        with self.model._checkout() as conn:
+            self.assertIsInstance(conn, psycopg.Connection)
+            self.assertTrue(conn.autocommit)
+        self.assertEqual(self.model.execute_query('select 1 as one').fetchone(), {'one': 1})
+        self.assertTrue(self.model.has_relation('actor.person'))
+
+    def test_same_sql(self):
+        "it should run the SQL generated by the relations"
+        pers = halftest.person_cls(last_name=('like', 'a%'), first_name=['aa', 'ab'])
+        pers = pers - halftest.person_cls(birth_date=NULL)
+        query, values = pers._ho_prep_select('last_name')
+        self.assertEqual(
+            [elt['last_name'] for elt in self.model.execute_query(query, values)],
+            [elt['last_name'] for elt in pers.ho_select('last_name')])
+        query, values = pers._ho_prep_count()
+        self.assertEqual(self.model.execute_query(query, values).fetchone()['count'], 10)
+
+    def test_adapters(self):
+        "it should render the values the way psycopg2 does"
+        query = 'select %s as null, %s as tuple, %s as json, %s as field'
+        values = (NULL, (1, 'a'), {'a': 1}, halftest.person_cls(last_name='a').last_name)
+        with self.model._checkout() as conn:
+            self.assertEqual(
+                self.model._driver.mogrify(conn.cursor(), query, values),
+                """select NULL as null, (1, 'a') as tuple, '{"a": 1}'::json as json, 'a' as field""")
+        uid = uuid.uuid4()
+        self.assertEqual(self.model.execute_query('select %s::uuid as uid', (uid,)).fetchone()['uid'], uid)
+
+    def test_bind(self):
+        "it should bind the values server side"
+        self.assertEqual(
+            bind('select %s, %%s where a in %s and b is %s and c = %s', (1, (2, 'a', NULL), None, 'x')),
+            ('select %s, %%s where a in (%s, %s, NULL) and b is NULL and c = %s', [1, 2, 'a', 'x']))
+        pers = halftest.person_cls(last_name=('like', 'a%'), first_name=['aa', 'ab'])
+        query, values = pers._ho_prep_select('last_name')
+        with Transaction(self.model):
+            for _ in range(10):
+                self.model.execute_query(query, values)
+            # the query is prepared by psycopg after 5 executions on the connection.
+            self.assertGreater(self.model.execute_query(
+                "select count(*) from pg_prepared_statements where name like '_pg3_%%'").fetchone()['count'], 0)
+
+    def test_functions(self):
+        "it should execute the functions"
+        self.assertEqual(self.model.execute_function('add', 1, 2), [{'add': 3}])
+        self.assertEqual(
+            self.model.execute_function('concat_lower_or_upper', a='a', b='b', uppercase=True),
+            [{'concat_lower_or_upper': 'A B'}])
+
+    def test_transaction(self):
+        "it should rollback the transaction on error"
+        insert = "insert into actor.person (last_name, first_name, birth_date) values (%s, %s, now())"
+        with self.assertRaises(UniqueViolation):
+            with Transaction(self.model):
+                self.model.execute_query(insert, ('driver1', 'driver'))
+                self.model.execute_query(insert, ('driver1', 'driver'))
+        self.assertEqual(
+            self.model.execute_query(
+                "select count(*) from actor.person where last_name like 'driver%%'").fetchone()['count'], 0)
+
+    def test_pipeline(self):
+        "it should send the queries in pipeline mode"
+        insert = "insert into actor.person (last_name, first_name, birth_date) values (%s, %s, now())"
+        with self.model.pipeline():
+            with self.model._checkout() as conn:
+                self.assertIsNotNone(conn._pipeline)
+            for idx in range(10):
+                self.model.execute_query(insert, (f'driver{idx}', f'driver{idx}'))
+        self.assertIsNone(self.model._connection)
+        self.assertEqual(
+            self.model.execute_query(
+                "select count(*) from actor.person where last_name like 'driver%%'").fetchone()['count'], 10)
+
+    def test_pipeline_psycopg2(self):
+        "it should run the queries in a transaction with psycopg2"
+        with model.pipeline():
+            self.assertEqual(Transaction(model).level, 1)
+        self.assertEqual(Transaction(model).level, 0)
+
+    def test_server_cursor(self):
+        "it should stream the rows with a psycopg 3 server cursor"
+        pers = halftest.person_cls(last_name=('like', 'a%'), first_name=['aa', 'ab'])
+        query, values = pers._ho_prep_select('last_name')
+        batches = list(self.model._execute_batches(query, values, 4))
+        self.assertEqual([len(batch) for batch in batches], [4, 4, 2])
+        self.assertEqual(self.model.pool_stats()['in_use'], 0)
@@ -1,4 +1,4 @@
-from unittest import TestCase
+from unittest import TestCase, mock
 import pytest
 from ..init import halftest, model, HALFTEST_STR, HALFTEST_REL_LISTS
 from half_orm.model import Model
@@ -49,6 +49,17 @@ class Test(TestCase):
             id(model._import_class(PERSON)),
             id(model._import_class('"actor"."person"')))
 
+    def test__import_class_cache(self):
+        "it should import a class once until the metadata is reloaded"
+        model._reload_relations()
+        with mock.patch('builtins.__import__', side_effect=__import__) as import_:
+            klass = model._import_class('blog.comment')
+            self.assertIs(model._import_class('blog.comment'), klass)
+            model._reload_relations()
+            self.assertIs(model._import_class('blog.comment'), klass)
+        modules = [call.args[0] for call in import_.call_args_list]
+        self.assertEqual(len([name for name in modules if name.endswith('blog.comment')]), 2)
+
     def test_classes(self):
         "it should return all the classes in the model"
         classes = [
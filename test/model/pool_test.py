@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+#-*- coding:  utf-8 -*-
+
+import threading
+import time
+from unittest import TestCase
+
+from half_orm.model import Model
+from half_orm.model_errors import PoolTimeout
+from half_orm.pool import ConnectionPool
+from half_orm.transaction import Transaction
+
+from ..init import model
+
+class Test(TestCase):
+    def setUp(self):
+        self.model = Model('halftest_with_pool')
+
+    def tearDown(self):
+        self.model.disconnect()
+
+    def test_pool_config(self):
+        "it should read the [pool] section of the config file"
+        stats = self.model.pool_stats()
+        self.assertEqual(stats['minconn'], 1)
+        self.assertEqual(stats['maxconn'], 20)
+
+    def test_default_pool(self):
+        "it should use a single connection without [pool] section"
+        stats = model.pool_stats()
+        self.assertEqual(stats['maxconn'], 1)
+
+    def test_concurrent_queries(self):
+        "it should run the queries of several threads concurrently"
+        def sleep():
+            self.model.execute_query('select pg_sleep(0.3)')
+        threads = [threading.Thread(target=sleep) for _ in range(5)]
+        start = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertLess(time.monotonic() - start, 1.2)
+        stats = self.model.pool_stats()
+        self.assertEqual(stats['size'], 5)
+        self.assertEqual(stats['in_use'], 0)
+        self.assertEqual(stats['idle'], 5)
+
+    def test_transaction_pins_connection(self):
+        "it should use the same connection for the whole transaction"
+        query = 'select pg_backend_pid() as pid'
+        with Transaction(self.model):
+            pid = self.model.execute_query(query).fetchone()['pid']
+            self.assertEqual(self.model.pool_stats()['in_use'], 1)
+            for _ in range(3):
+                self.assertEqual(self.model.execute_query(query).fetchone()['pid'], pid)
+        self.assertEqual(self.model.pool_stats()['in_use'], 0)
+        self.assertIsNone(self.model._connection)
+
+    def test_broken_connection_is_replaced(self):
+        "it should replace a connection killed by the server"
+        pid = self.model.execute_query('select pg_backend_pid() as pid').fetchone()['pid']
+        model.execute_query('select pg_terminate_backend(%s)', (pid,))
+        time.sleep(0.1)
+        self.assertEqual(self.model.execute_query('select 1 as one').fetchone()['one'], 1)
+        self.assertEqual(self.model.pool_stats()['discarded'], 1)
+
+    def test_pool_timeout(self):
+        "it should raise PoolTimeout when no connection is available"
+        pool = ConnectionPool(self.model._Model__dbinfo, minconn=0, maxconn=1, timeout=0.1)
+        conn = pool.getconn()
+        with self.assertRaises(PoolTimeout):
+            pool.getconn()
+        self.assertEqual(pool.stats()['timeouts'], 1)
+        pool.putconn(conn)
+        self.assertIs(pool.getconn(), conn)
+        pool.close()
+
+    def test_waiters(self):
+        "it should count the threads waiting for a connection"
+        pool = ConnectionPool(self.model._Model__dbinfo, minconn=0, maxconn=1)
+        conn = pool.getconn()
+        waiter = threading.Thread(target=lambda: pool.putconn(pool.getconn()))
+        waiter.start()
+        time.sleep(0.1)
+        self.assertEqual(pool.stats()['waiters'], 1)
+        pool.putconn(conn)
+        waiter.join()
+        stats = pool.stats()
+        self.assertEqual(stats['waiters'], 0)
+        self.assertEqual(stats['checkouts'], 2)
+        self.assertGreater(stats['max_checkout_time'], 0.05)
+        pool.close()
+
+    def test_invalid_pool_size(self):
+        "it should reject inconsistent sizes"
+        with self.assertRaises(ValueError):
+            ConnectionPool({}, minconn=2, maxconn=1)
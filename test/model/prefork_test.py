@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+#-*- coding:  utf-8 -*-
+
+import gc
+import os
+from unittest import TestCase
+
+from half_orm.model import Model
+from half_orm.pg_meta import PgMeta
+
+from ..init import model, HALFTEST_REL_LISTS
+
+class Test(TestCase):
+    def tearDown(self):
+        gc.unfreeze()
+
+    def test_prefork(self):
+        "it should load the metadata and the classes, close the idle connections and freeze the objects"
+        lazy_model = Model('halftest', lazy=True)
+        try:
+            lazy_model.execute_query('select 1')
+            lazy_model.prefork()
+            self.assertNotIn('lazy', PgMeta.meta['halftest'])
+            for _, fqrn in HALFTEST_REL_LISTS:
+                self.assertIn(fqrn, model._classes_['halftest'])
+            self.assertEqual(lazy_model.pool_stats()['size'], 0)
+            self.assertGreater(gc.get_freeze_count(), 0)
+            self.assertEqual(lazy_model.execute_query('select 1 as one').fetchone()['one'], 1)
+        finally:
+            lazy_model.disconnect()
+
+    def test_fork(self):
+        "it should open new connections in the child and keep the connections of the parent"
+        pid = model.execute_query('select pg_backend_pid() as pid').fetchone()['pid']
+        child = os.fork()
+        if child == 0:
+            status = 1
+            try:
+                child_pid = model.execute_query('select pg_backend_pid() as pid').fetchone()['pid']
+                if child_pid != pid and model._relation_metadata(('halftest', 'actor', 'person')):
+                    status = 0
+            finally:
+                os._exit(status)
+        _, status = os.waitpid(child, 0)
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+        self.assertEqual(model.execute_query('select pg_backend_pid() as pid').fetchone()['pid'], pid)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+#-*- coding:  utf-8 -*-
+
+from unittest import TestCase, mock
+
+from half_orm.model import Model
+from half_orm.model_errors import MalformedConfigFile
+from half_orm.transaction import Transaction
+
+from ..init import halftest, model
+
+class Test(TestCase):
+    def setUp(self):
+        self.model = Model('halftest_replicas')
+
+    def tearDown(self):
+        self.model.disconnect()
+
+    def checkouts(self):
+        "Returns the number of checkouts on the primary and on each replica."
+        return [self.model.pool_stats()['checkouts']] + [
+            replica['pool']['checkouts'] for replica in self.model.replicas_stats()]
+
+    def test_config(self):
+        "it should load the replicas from the config file"
+        self.assertEqual(
+            [(replica['host'], replica['port'], replica['weight']) for replica in self.model.replicas_stats()],
+            [('127.0.0.1', '5432', 1.), ('127.0.0.1', '1', 1.)])
+        self.assertEqual(model.replicas_stats(), [])
+        with self.assertRaises(MalformedConfigFile):
+            Model('halftest_replicas_bad_weights')
+
+    def test_read_on_replica(self):
+        "it should send the reads to the replica and put aside the unreachable one"
+        before = self.checkouts()
+        # the unreachable replica is drawn first.
+        with mock.patch('half_orm.replicas.random.choices', lambda replicas, weights: replicas[-1:]):
+            for _ in range(10):
+                self.assertEqual(self.model._execute_read('select 1 as one').fetchone()['one'], 1)
+        self.assertEqual(self.model.execute_function('pg_is_in_recovery'), [{'pg_is_in_recovery': False}])
+        after = self.checkouts()
+        self.assertEqual([after[0] - before[0], after[1] - before[1], after[2]], [0, 11, 0])
+        self.assertEqual([replica['available'] for replica in self.model.replicas_stats()], [True, False])
+
+    def test_writes_on_primary(self):
+        "it should send the writes and the transactions to the primary"
+        self.model.execute_query('select 1')
+        before = self.checkouts()
+        self.model._execute_read('select 1')
+        with Transaction(self.model):
+            self.model._execute_read('select 1')
+        self.assertEqual([a - b for a, b in zip(self.checkouts(), before)], [2, 0, 0])
+
+    def test_read_your_writes(self):
+        "it should read from the replica after the read_your_writes window"
+        self.model.execute_query('select 1')
+        before = self.checkouts()[1]
+        self.model._execute_read('select 1')
+        self.assertEqual(self.checkouts()[1], before)
+        with mock.patch('half_orm.model.time.monotonic', return_value=10 ** 9):
+            self.model._execute_read('select 1')
+        self.assertEqual(self.checkouts()[1], before + 1)
+
+    def test_lagging_replica(self):
+        "it should not use a replica lagging more than max_lag"
+        lagging = Model('halftest_lagging_replica')
+        try:
+            lagging._execute_read('select 1')
+            stats = lagging.replicas_stats()[0]
+            self.assertEqual(stats['pool']['checkouts'], 1)
+            self.assertFalse(stats['available'])
+            self.assertEqual(lagging.pool_stats()['checkouts'], 2)
+        finally:
+            lagging.disconnect()
+
+    def test_relation_reads(self):
+        "it should route ho_select, ho_get, ho_count and ho_is_empty as reads"
+        with mock.patch.object(model, '_execute_read', wraps=model._execute_read) as read, \
+                mock.patch.object(model, 'execute_query') as write:
+            pers = halftest.person_cls(last_name='aa')
+            list(pers.ho_select())
+            pers.ho_get()
+            pers.ho_count()
+            pers.ho_is_empty()
+            list(pers)
+        self.assertGreaterEqual(read.call_count, 5)
+        write.assert_not_called()
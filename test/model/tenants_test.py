@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+#-*- coding:  utf-8 -*-
+
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from half_orm.meta_cache import MetadataCache
+
+from half_orm.model import Model
+from half_orm.model_errors import UnknownTenant
+from half_orm.pg_meta import PgMeta
+
+from ..init import model
+
+SCHEMA = """
+create schema {schema};
+create table {schema}.customer (id serial primary key, name text);
+create table {schema}.orders (
+    id serial primary key, customer_id int references {schema}.customer(id), amount int);
+"""
+
+class Test(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        model.execute_query('create database halftest_tenants owner halftest')
+        # the first model of the database: the relation classes are bound to it.
+        cls.lazy_model = Model('halftest_tenants', lazy=True)
+        for schema in ('tenant_template', 'tenant_1', 'tenant_2', 'other'):
+            cls.lazy_model.execute_query(SCHEMA.format(schema=schema))
+        cls.model = Model('halftest_tenants')
+        cls.Customer = cls.model.get_relation_class('tenant_template.customer')
+        cls.Orders = cls.model.get_relation_class('tenant_template.orders')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.model.disconnect()
+        cls.lazy_model.disconnect()
+        model.execute_query('drop database halftest_tenants with (force)')
+
+    def tearDown(self):
+        for schema in ('tenant_1', 'tenant_2'):
+            self.model.execute_query(f'truncate {schema}.orders, {schema}.customer')
+
+    def test_metadata(self):
+        "it should only load the template schema"
+        schemas = {fqrn[1] for _, fqrn in self.model._relations()}
+        self.assertEqual(schemas, {'tenant_template', 'other'})
+
+    def test_tenant(self):
+        "it should run the queries in the schema of the tenant of the context"
+        with self.model.tenant('tenant_1'):
+            self.Customer(name='one').ho_insert()
+            self.Customer(name='two').ho_insert()
+        with self.model.tenant('tenant_2'):
+            self.Customer(name='three').ho_insert()
+            self.assertEqual(self.Customer().ho_count(), 1)
+            self.assertEqual([elt['name'] for elt in self.Customer().ho_select('name')], ['three'])
+        with self.model.tenant('tenant_1'):
+            self.assertEqual(self.Customer().ho_count(), 2)
+            self.Customer(name='two').ho_update(name='deux')
+            self.Customer(name='one').ho_delete()
+            self.assertEqual([elt['name'] for elt in self.Customer().ho_select('name')], ['deux'])
+        self.assertEqual(self.Customer().ho_count(), 0)
+
+    def test_tenant_class(self):
+        "it should bind the class of a relation of a tenant schema to the tenant"
+        Orders_2 = self.model.get_relation_class('tenant_2.orders')
+        self.assertIs(Orders_2.__base__, self.Orders)
+        self.assertIs(self.model.get_relation_class('tenant_2.orders'), Orders_2)
+        self.assertEqual(Orders_2()._ho_qrn, '"tenant_2"."orders"')
+        customer = self.model.get_relation_class('tenant_2.customer')(name='three')
+        customer.ho_insert()
+        Orders_2(customer_id=customer.ho_get('id').id.value, amount=3).ho_insert()
+        order = Orders_2(amount=3)
+        self.assertEqual(order.ho_count(), 1)
+        self.assertEqual(order._ho_fkeys['orders_customer_id_fkey']()._ho_qrn, '"tenant_2"."customer"')
+        self.assertEqual(order._ho_fkeys['orders_customer_id_fkey']().ho_count(), 1)
+        with self.model.tenant('tenant_1'):
+            self.assertEqual(order.ho_count(), 1)
+            self.assertEqual(self.Orders(amount=3).ho_count(), 0)
+
+    def test_other_schemas(self):
+        "it should keep the schemas that don't match the tenants"
+        self.assertEqual(self.model.get_relation_class('other.orders')()._ho_qrn, '"other"."orders"')
+        with self.assertRaises(UnknownTenant):
+            with self.model.tenant('other'):
+                pass
+        with self.assertRaises(UnknownTenant):
+            with self.model.tenant('tenant_template'):
+                pass
+        with self.assertRaises(UnknownTenant):
+            with model.tenant('tenant_1'):
+                pass
+
+    def test_metadata_cache(self):
+        "it should cache the metadata of the tenants apart from the complete metadata"
+        directory = tempfile.mkdtemp()
+        cache = MetadataCache(directory)
+        tenants = self.model._pg_meta_options['tenants']
+        def load(tenants):
+            "Returns the schemas loaded and the number of files in the cache."
+            with self.model._checkout() as conn:
+                PgMeta(conn, reload=True, cache=cache, tenants=tenants)
+            schemas = {fqrn[1] for _, fqrn in PgMeta.meta['halftest_tenants']['relations_list']}
+            return schemas, len(os.listdir(directory))
+        try:
+            self.assertEqual(load(tenants), ({'tenant_template', 'other'}, 1))
+            self.assertEqual(
+                load(None), ({'tenant_template', 'tenant_1', 'tenant_2', 'other'}, 2))
+            self.assertEqual(load(tenants), ({'tenant_template', 'other'}, 2))
+            self.assertEqual(
+                load(None), ({'tenant_template', 'tenant_1', 'tenant_2', 'other'}, 2))
+        finally:
+            with self.model._checkout() as conn:
+                PgMeta(conn, reload=True, tenants=tenants)
+            shutil.rmtree(directory)
@@ -6,7 +6,7 @@ import io
 import re
 
 import sys
-from unittest import TestCase
+from unittest import TestCase, mock
 from time import sleep
 from random import randint
 
@@ -38,6 +38,18 @@ class Test(HoTestCase):
         self.assertRaises(
             relation_errors.ExpectedOneError, pers.ho_get)
 
+    def test_get_single_query(self):
+        "it should fetch the singleton with a single query"
+        pers = self.pers(last_name='ba')
+        model_ = pers._ho_model
+        with mock.patch.object(model_, '_execute_read', wraps=model_._execute_read) as execute:
+            self.assertEqual(pers.ho_get().last_name.value, 'ba')
+            self.assertEqual(execute.call_count, 1)
+            with self.assertRaises(relation_errors.ExpectedOneError) as exc:
+                self.pers(last_name=('like', 'b%')).ho_get()
+            self.assertEqual(exc.exception.count, 2)
+            self.assertEqual(execute.call_count, 2)
+
     def test_insert_error(self):
         pers = self.pers(last_name='ba')
         self.assertEqual(pers.ho_count(), 1)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+#-*- coding:  utf-8 -*-
+
+import datetime
+import uuid
+from decimal import Decimal
+from unittest import TestCase, mock
+
+from half_orm.relation import Page, _decode_cursor, _encode_cursor
+from half_orm.transaction import Transaction
+
+from ..init import halftest, model
+
+class Test(TestCase):
+    def setUp(self):
+        self.pers = halftest.person_cls(last_name=('like', 'a%'))
+        self.expected = list(self.pers.ho_order_by('id').ho_select('id', 'last_name'))
+
+    def test_paginate(self):
+        "it should yield the pages ordered by the key"
+        pages = list(self.pers.ho_paginate(4, 'last_name', order='id'))
+        self.assertEqual([len(page) for page in pages], [4, 4, 2])
+        self.assertIsInstance(pages[0], Page)
+        self.assertEqual([row for page in pages for row in page], self.expected)
+        self.assertIsNone(pages[-1].cursor)
+        self.assertEqual(
+            list(halftest.person_cls().ho_paginate(10, order='first_name, birth_date, last_name'))[0][0]['last_name'],
+            'aa')
+
+    def test_cursor(self):
+        "it should resume the pagination after the cursor"
+        page = next(self.pers.ho_paginate(3, 'last_name', order='id'))
+        pages = list(self.pers.ho_paginate(3, 'last_name', order='id', cursor=page.cursor))
+        self.assertEqual([row for page in pages for row in page], self.expected[3:])
+        with self.assertRaises(ValueError):
+            next(self.pers.ho_paginate(3, cursor=page.cursor))
+        with self.assertRaises(ValueError):
+            next(self.pers.ho_paginate(3, order='id', cursor='not a cursor'))
+
+    def test_seek_query(self):
+        "the pages should be selected after the last row, without an offset"
+        query, values = self.pers._Relation__prep_page((), ('id',), 3, [0])
+        self.assertIn('(r0."id") > (%s)', query)
+        self.assertIn('order by r0."id"\nlimit %s', query)
+        self.assertNotIn('offset', query)
+        self.assertEqual(values[-2:], (0, 4))
+
+    def test_last_page(self):
+        "the last page should have no cursor, even if it is full"
+        with mock.patch.object(model, '_execute_read', wraps=model._execute_read) as execute:
+            pages = list(self.pers.ho_paginate(5, order='id'))
+            self.assertEqual(execute.call_count, 2)
+        self.assertEqual([len(page) for page in pages], [5, 5])
+        self.assertIsNotNone(pages[0].cursor)
+        self.assertIsNone(pages[-1].cursor)
+
+    def test_cursor_types(self):
+        "the values of the cursor should be coerced to the types of the key"
+        order = 'first_name, last_name, birth_date'
+        page = next(halftest.person_cls().ho_paginate(7, order=order))
+        pages = list(halftest.person_cls().ho_paginate(7, order=order, cursor=page.cursor))
+        self.assertEqual(sum(len(page) for page in pages), 53)
+
+    def test_cursor_timestamp_uuid(self):
+        "the timestamp and uuid values of a key should be restored from the cursor"
+        model.execute_query(
+            'create table public.paginate_test (at timestamptz, id uuid, primary key (at, id))')
+        try:
+            model.execute_query(
+                "insert into public.paginate_test select "
+                "'2024-01-01 00:00:00.123456+02'::timestamptz + i * interval '1.5 second', "
+                "gen_random_uuid() from generate_series(1, 10) as i")
+            model._reload()
+            paginate_test = model.get_relation_class('public.paginate_test')()
+            expected = list(paginate_test.ho_order_by('at, id').ho_select())
+            page = next(paginate_test.ho_paginate(4))
+            self.assertEqual(_decode_cursor(('at', 'id'), page.cursor), list(page[-1].values()))
+            pages = list(paginate_test.ho_paginate(4, cursor=page.cursor))
+            self.assertEqual([row for page in pages for row in page], expected[4:])
+        finally:
+            model.execute_query('drop table public.paginate_test')
+            model._reload()
+
+    def test_cursor_values(self):
+        "the values of the cursor should keep their type, the unsupported types are rejected"
+        key = ('a', 'b', 'c', 'd')
+        after = [Decimal('1.10'), b'\x00\xff', datetime.time(12, 30, 0, 5), 'text']
+        self.assertEqual(_decode_cursor(key, _encode_cursor(key, after)), after)
+        self.assertEqual(
+            _decode_cursor(('a',), _encode_cursor(('a',), [memoryview(b'\x01')])), [b'\x01'])
+        with self.assertRaises(ValueError):
+            _encode_cursor(('a',), [datetime.timedelta(1)])
+
+    def test_order(self):
+        "it should raise a ValueError if order is not a key"
+        with self.assertRaises(ValueError):
+            next(self.pers.ho_paginate(3, order='first_name'))
+        with self.assertRaises(ValueError):
+            next(self.pers.ho_paginate(0))
+
+    def test_prefetch(self):
+        "it should prefetch the next page in a thread, outside of a transaction"
+        pages = list(self.pers.ho_paginate(3, 'last_name', order='id', prefetch=True))
+        self.assertEqual([row for page in pages for row in page], self.expected)
+        gen = self.pers.ho_paginate(3, order='id', prefetch=True)
+        next(gen)
+        gen.close()
+        with Transaction(model):
+            halftest.person_cls(last_name='a page', first_name='page', birth_date='1970-01-01').ho_insert()
+            pages = list(self.pers.ho_paginate(3, 'last_name', order='id', prefetch=True))
+            self.assertEqual(len([row for page in pages for row in page]), 11)
+            halftest.person_cls(last_name='a page').ho_delete()
+
+    def test_page(self):
+        "it should return the rows of the page and the total in a single query"
+        with mock.patch.object(model, '_execute_read', wraps=model._execute_read) as execute:
+            page = self.pers.ho_order_by('id').ho_page(4, 'id', 'last_name', offset=4)
+            self.assertEqual(execute.call_count, 1)
+        self.assertIn('with ho_total as', execute.call_args[0][0])
+        self.assertEqual(page, self.expected[4:8])
+        self.assertEqual(page.total, 10)
+        with mock.patch.object(model, '_execute_read', wraps=model._execute_read) as execute:
+            page = self.pers.ho_page(4, offset=20)
+            self.assertEqual(execute.call_count, 1)
+        self.assertEqual((page, page.total), ([], 10))
+        self.assertEqual(halftest.person_cls(last_name='no one').ho_page(4).total, 0)
+        self.assertEqual(halftest.person_cls().ho_page(4, estimate=True).total, 60)
+        page = halftest.person_cls().ho_distinct().ho_page(4, 'birth_date')
+        self.assertEqual((len(page), page.total), (1, 1))
+
+    def test_page_limit_offset(self):
+        "it should raise a ValueError if the relation is limited or has an offset"
+        with self.assertRaises(ValueError):
+            self.pers.ho_limit(5).ho_page(10, 'id')
+        with self.assertRaises(ValueError):
+            halftest.person_cls().ho_offset(5).ho_page(10, 'id')
@@ -2,8 +2,8 @@
 #-*- coding:  utf-8 -*-
 
 import uuid
-from unittest import TestCase
-from half_orm.relation import Relation
+from unittest import TestCase, mock
+from half_orm.relation import Relation, _LazyObjects
 from half_orm.relation_errors import IsFrozenError
 
 import psycopg2
@@ -86,6 +86,24 @@ class Test(TestCase):
         pers.ho_freeze()
         self.assertTrue(pers._ho_isfrozen)
 
+    def test_lazy_fields(self):
+        "it should create the fields and foreign keys on first access"
+        pers = self.pers(last_name='Lagaffe')
+        self.assertEqual(list(pers._ho_fields.created()), ['last_name'])
+        self.assertEqual(list(pers._ho_fields), ['id', 'first_name', 'last_name', 'birth_date'])
+        self.assertIs(pers.first_name, pers._ho_fields['first_name'])
+        self.assertEqual(list(pers._ho_fields.created()), ['first_name', 'last_name'])
+        self.assertEqual(list(pers._ho_pkey), ['first_name', 'last_name', 'birth_date'])
+        self.assertEqual(list(pers._ho_ukeys), ['id', 'last_name'])
+        self.assertEqual(pers._ho_fkeys.created(), {})
+        self.assertEqual(len(pers._ho_fkeys), 3)
+        self.assertIs(pers.__class__._ho_class_spec, self.pers()._ho_class_spec)
+        with self.assertRaises(AttributeError):
+            pers.lost_name
+        with self.assertRaises(TypeError):
+            # _create is abstract.
+            _LazyObjects(pers, {})
+
     def testho_unaccent(self):
         self.assertFalse(self.pers.first_name.unaccent)
         self.assertFalse(self.pers.last_name.unaccent)
@@ -114,11 +132,57 @@ class Test(TestCase):
         not_empty = self.pers()
         self.assertFalse(not_empty.ho_is_empty())
 
+    def test_exists(self):
+        "ho_is_empty, in and == should run a single NOT EXISTS query"
+        model = halftest.model
+        pers = self.pers(last_name=('like', 'a%'))
+        query, _ = pers._ho_prep_exists(pers, self.pers() - pers)
+        self.assertEqual(query.count('not exists (select'), 2)
+        self.assertNotIn('count(', query)
+        with mock.patch.object(model, '_execute_read', wraps=model._execute_read) as execute:
+            self.assertFalse(pers.ho_is_empty())
+            self.assertTrue(pers in self.pers())
+            self.assertFalse(self.pers() in pers)
+            self.assertTrue(pers == self.pers(last_name=('like', 'a%')))
+            self.assertFalse(pers == self.pers())
+            self.assertEqual(execute.call_count, 5)
+
     def test_ho_count_limit(self):
         pers = self.pers()
         pers.ho_limit(2)
         self.assertEqual(pers.ho_count(), 2)
 
+    def test_ho_count_query(self):
+        "the count should only be wrapped in a subquery if needed"
+        query, _ = self.pers(last_name=('like', 'a%'))._ho_prep_count()
+        self.assertNotIn('ho_count', query)
+        self.assertIn('ho_count', self.pers().ho_limit(2)._ho_prep_count()[0])
+        self.assertEqual(self.pers().ho_order_by('last_name').ho_count(), 60)
+
+    def test_ho_count_max(self):
+        "it should count up to max"
+        self.assertEqual(self.pers().ho_count(max=10), 10)
+        self.assertEqual(self.pers(last_name=('like', 'a%')).ho_count(max=100), 10)
+        self.assertEqual(self.pers().ho_limit(5).ho_count(max=10), 5)
+        self.assertEqual(self.pers().ho_offset(55).ho_count(max=10), 5)
+
+    def test_ho_count_estimate(self):
+        "it should estimate the count with the statistics or the planner"
+        model = halftest.model
+        model.execute_query('analyze actor.person')
+        with mock.patch.object(model, '_execute_read', wraps=model._execute_read) as execute:
+            self.assertEqual(self.pers().ho_count(estimate=True), 60)
+            self.assertIn('reltuples', execute.call_args[0][0])
+            self.assertEqual(self.pers().ho_count(estimate=True, max=10), 10)
+            estimate = self.pers(last_name=('like', 'a%')).ho_count(estimate=True)
+            self.assertIsInstance(estimate, int)
+            self.assertIn('explain', execute.call_args[0][0])
+        self.assertIsNone(self.pers(last_name='a')._ho_prep_estimate())
+        self.assertIn('inhparent', self.post()._ho_prep_estimate()[0])
+        post = self.post()
+        post.ho_only = True
+        self.assertNotIn('inhparent', post._ho_prep_estimate()[0])
+
     def test_ho_count_distinct(self):
         pers = self.pers()
         pers.ho_mogrify()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+#-*- coding:  utf-8 -*-
+
+from unittest import TestCase
+
+from half_orm.null import NULL
+from half_orm.sql_cache import SQL_CACHE, SqlCache
+
+from ..init import halftest
+
+class Test(TestCase):
+    def setUp(self):
+        SQL_CACHE.clear()
+        self.pers_cls = halftest.person_cls
+
+    def tearDown(self):
+        SQL_CACHE.maxsize = 1024
+        SQL_CACHE.clear()
+
+    def test_same_shape(self):
+        "it should reuse the SQL of a relation with the same shape"
+        query1, values1 = self.pers_cls(last_name='aa')._ho_prep_select()
+        query2, values2 = self.pers_cls(last_name='ab')._ho_prep_select()
+        self.assertEqual(query1, query2)
+        self.assertEqual([field.value for field in values1], ['aa'])
+        self.assertEqual([field.value for field in values2], ['ab'])
+        self.assertEqual(SQL_CACHE.info(), {'hits': 1, 'misses': 1, 'maxsize': 1024, 'currsize': 1})
+
+    def test_canonical_aliases(self):
+        "it should not put the ids of the objects in the SQL"
+        pers = self.pers_cls(last_name='aa')
+        posts = halftest.gaston.post_rfk(title='x') - halftest.post_cls(content='y')
+        for rel in (pers, posts):
+            query, _ = rel._ho_prep_select()
+            self.assertNotIn(str(rel.ho_id), query)
+        self.assertIn('"actor"."person" as r0', pers._ho_prep_select()[0])
+
+    def test_different_shapes(self):
+        "it should build a new query when the shape changes"
+        shapes = [
+            self.pers_cls(last_name='aa'),
+            self.pers_cls(last_name=('like', 'a%')),
+            self.pers_cls(last_name=['aa', 'ab']),
+            self.pers_cls(birth_date=NULL),
+            self.pers_cls(first_name='aa'),
+            -self.pers_cls(last_name='aa'),
+            self.pers_cls(last_name='aa') | self.pers_cls(last_name='ab'),
+            self.pers_cls(last_name='aa').ho_order_by('id'),
+            self.pers_cls(last_name='aa').ho_limit(3),
+        ]
+        unaccent = self.pers_cls(last_name='aa')
+        unaccent.ho_unaccent('last_name')
+        shapes.append(unaccent)
+        queries = {rel._ho_prep_select()[0] for rel in shapes}
+        self.assertEqual(len(queries), len(shapes))
+        self.assertEqual(len({rel._ho_prep_select('id')[0] for rel in shapes}), len(shapes))
+        self.assertEqual(SQL_CACHE.info()['hits'], 0)
+
+    def test_joins(self):
+        "it should cache the joins"
+        for last_name in ('aa', 'ab'):
+            pers = self.pers_cls(last_name=last_name)
+            posts = pers.post_rfk(title=('ilike', '%'))
+            query, values = posts._ho_prep_select()
+            self.assertEqual(
+                [field.value for field in values], [last_name, '%'])
+        self.assertEqual(SQL_CACHE.info()['hits'], 1)
+        self.assertEqual(posts.ho_count(), 0)
+
+    def test_update_delete(self):
+        "it should cache the update and delete queries"
+        queries = []
+        for last_name in ('aa', 'ab'):
+            queries.append(self.pers_cls(last_name=last_name)._ho_prep_update('id', first_name='x')[:2])
+            queries.append(self.pers_cls(last_name=last_name)._ho_prep_delete('id'))
+        self.assertEqual(queries[0][0], queries[2][0])
+        self.assertEqual(queries[1][0], queries[3][0])
+        self.assertEqual(queries[2][1][0], 'x')
+        self.assertEqual(queries[3][1][0].value, 'ab')
+        self.assertEqual(SQL_CACHE.info()['hits'], 2)
+
+    def test_lru(self):
+        "it should evict the least recently used query"
+        cache = SqlCache(maxsize=2)
+        cache.set('a', 'query a')
+        cache.set('b', 'query b')
+        self.assertEqual(cache.get('a'), 'query a')
+        cache.set('c', 'query c')
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 'query a')
+        self.assertEqual(cache.info(), {'hits': 2, 'misses': 1, 'maxsize': 2, 'currsize': 2})
+        cache.clear()
+        self.assertEqual(cache.info(), {'hits': 0, 'misses': 0, 'maxsize': 2, 'currsize': 0})
+
+    def test_disabled(self):
+        "it should not cache anything when maxsize is 0"
+        SQL_CACHE.maxsize = 0
+        pers = self.pers_cls(last_name='aa')
+        self.assertIn(str(pers.ho_id), pers._ho_prep_select()[0])
+        self.assertEqual(SQL_CACHE.info()['currsize'], 0)
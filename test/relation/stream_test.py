@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+#-*- coding:  utf-8 -*-
+
+from unittest import TestCase
+
+from half_orm.model import Model
+from half_orm.transaction import Transaction
+
+from ..init import halftest, model
+
+class Test(TestCase):
+    def setUp(self):
+        self.pers = halftest.person_cls(last_name=('like', '_a'))
+
+    def test_stream(self):
+        "it should return the same rows as ho_select"
+        expected = list(self.pers.ho_order_by('last_name').ho_select('last_name'))
+        self.assertEqual(len(expected), 6)
+        self.assertEqual(
+            list(self.pers.ho_order_by('last_name').ho_select('last_name', stream=True, itersize=4)),
+            expected)
+        self.assertEqual(list(self.pers.ho_order_by('last_name').ho_stream('last_name')), expected)
+        self.assertEqual(model.pool_stats()['in_use'], 0)
+
+    def test_select_batches(self):
+        "it should yield the rows by batches"
+        batches = list(self.pers.ho_order_by('last_name').ho_select_batches(4, 'last_name'))
+        self.assertEqual([len(batch) for batch in batches], [4, 2])
+        self.assertEqual(
+            [elt['last_name'] for batch in batches for elt in batch],
+            ['aa', 'ba', 'ca', 'da', 'ea', 'fa'])
+
+    def test_stream_in_transaction(self):
+        "it should stream the uncommitted rows of the transaction"
+        with Transaction(model):
+            halftest.person_cls(last_name='stream', first_name='stream', birth_date='1970-01-01').ho_insert()
+            rows = list(halftest.person_cls(last_name='stream').ho_stream('last_name'))
+            self.assertEqual(rows, [{'last_name': 'stream'}])
+            halftest.person_cls(last_name='stream').ho_delete()
+
+    def test_dedicated_connection(self):
+        "it should stream on a connection outside of the pool until the generator is closed"
+        pool_model = Model('halftest_with_pool')
+        try:
+            gen = pool_model._execute_batches('select * from actor.person', size=10)
+            self.assertEqual(len(next(gen)), 10)
+            self.assertEqual(pool_model.pool_stats()['in_use'], 0)
+            self.assertEqual(pool_model.execute_query('select 1 as one').fetchone()['one'], 1)
+            self.assertEqual(len(next(gen)), 10)
+            gen.close()
+            self.assertEqual(pool_model.pool_stats()['in_use'], 0)
+            self.assertEqual(
+                pool_model.execute_query('select count(*) from pg_cursors').fetchone()['count'], 0)
+        finally:
+            pool_model.disconnect()
+
+    def test_nested_query(self):
+        "it should run a query while streaming with a pool of a single connection"
+        self.assertEqual(model.pool_stats()['maxconn'], 1)
+        counts = [
+            halftest.person_cls().ho_count()
+            for _ in halftest.person_cls().ho_stream('id', itersize=2)]
+        self.assertEqual(counts, [60] * 60)
+        self.assertEqual(model.pool_stats()['in_use'], 0)
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+#-*- coding:  utf-8 -*-
+
+from unittest import TestCase
+
+from half_orm.model import Model
+from half_orm.template import Param
+from half_orm.transaction import Transaction
+
+from ..init import halftest, model
+
+PREPARED = 'select count(*) from pg_prepared_statements where name = %s'
+
+class Test(TestCase):
+    def setUp(self):
+        self.pers_cls = halftest.person_cls
+        self.tmpl = self.pers_cls.ho_template(
+            'last_name', last_name=Param('ln'), first_name=('like', Param('fn')))
+
+    def prepared(self, name):
+        return model.execute_query(PREPARED, (name,)).fetchone()['count']
+
+    def test_execute(self):
+        "it should return the same rows as ho_select"
+        self.assertEqual(self.tmpl.params, ['fn', 'ln'])
+        for last_name in ('aa', 'ba', 'zz'):
+            self.assertEqual(
+                self.tmpl.execute(ln=last_name, fn='%'),
+                list(self.pers_cls(last_name=last_name, first_name=('like', '%')).ho_select('last_name')))
+        self.assertEqual(self.prepared(self.tmpl.name), 1)
+
+    def test_constants_and_repeated_params(self):
+        "it should render the constants and reuse the position of a repeated parameter"
+        tmpl = self.pers_cls.ho_template(
+            'last_name', last_name=Param('name'), first_name=Param('name'), birth_date=('>', '1900-01-01'))
+        self.assertIn("'1900-01-01'::date", tmpl.query)
+        self.assertEqual(tmpl.query.count('$1'), 2)
+        self.assertEqual(tmpl.execute(name='aa'), [{'last_name': 'aa'}])
+
+    def test_wrong_params(self):
+        "it should raise a TypeError on a missing or unknown parameter"
+        with self.assertRaises(TypeError):
+            self.tmpl.execute(ln='aa')
+        with self.assertRaises(TypeError):
+            self.tmpl.execute(ln='aa', fn='a', xx=1)
+
+    def test_deallocated(self):
+        "it should prepare the statement again after a deallocate"
+        self.assertEqual(self.tmpl.execute(ln='aa', fn='%'), [{'last_name': 'aa'}])
+        model.execute_query('deallocate all')
+        self.assertEqual(self.prepared(self.tmpl.name), 0)
+        self.assertEqual(self.tmpl.execute(ln='aa', fn='%'), [{'last_name': 'aa'}])
+        self.assertEqual(self.prepared(self.tmpl.name), 1)
+
+    def test_reconnect(self):
+        "it should prepare the statement on the new connection"
+        self.tmpl.execute(ln='aa', fn='%')
+        model.disconnect()
+        model.ping()
+        self.assertEqual(self.tmpl.execute(ln='aa', fn='%'), [{'last_name': 'aa'}])
+
+    def test_ddl(self):
+        "it should prepare the statement again if its result type has changed"
+        model.execute_query('create table public.tmpl_test (id int, val int)')
+        try:
+            model._reload()
+            TmplTest = model.get_relation_class('public.tmpl_test')
+            TmplTest(id=1, val=1).ho_insert()
+            tmpl = TmplTest.ho_template(id=Param('id'))
+            self.assertEqual(tmpl.execute(id=1), [{'id': 1, 'val': 1}])
+            model.execute_query('alter table public.tmpl_test alter column val type text')
+            self.assertEqual(tmpl.execute(id=1), [{'id': 1, 'val': '1'}])
+            model.execute_query('alter table public.tmpl_test alter column val type bigint using val::bigint')
+            with self.assertRaises(model._driver.Error):
+                with Transaction(model):
+                    tmpl.execute(id=1)
+            self.assertEqual(tmpl.execute(id=1), [{'id': 1, 'val': 1}])
+        finally:
+            model.execute_query('drop table public.tmpl_test')
+            model._reload()
+
+    def test_psycopg3(self):
+        "it should work with the psycopg3 driver"
+        model3 = Model('halftest_psycopg3')
+        try:
+            Person = model3.get_relation_class('actor.person')
+            tmpl = Person.ho_template('last_name', last_name=Param('ln'), first_name=('like', Param('fn')))
+            self.assertEqual(tmpl.query, self.tmpl.query)
+            self.assertEqual(tmpl.execute(ln='aa', fn='%'), [{'last_name': 'aa'}])
+            model3.execute_query('deallocate all')
+            self.assertEqual(tmpl.execute(ln='aa', fn='%'), [{'last_name': 'aa'}])
+        finally:
+            model3.disconnect()